@@ -0,0 +1,12 @@
+"""
+Benchmark suite for the Inventory Management System
+
+    python -m benchmarks generate --scale small
+    python -m benchmarks run --scale small --output results.json
+    python -m benchmarks run --scale small --save-baseline
+    python -m benchmarks compare old.json new.json
+
+Run from the application directory. Datasets are generated once per scale
+and seed (see dataset.py) and every run works on a fresh copy, so write
+benchmarks never change the next run's data.
+"""
@@ -0,0 +1,94 @@
+"""
+Command line for the benchmark suite (python -m benchmarks --help)
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+from . import dataset, results, suite
+
+def generate(args):
+    """Generate (or regenerate) the dataset for a scale"""
+    directory = dataset.generate(args.scale, args.seed, args.data_dir)
+    print(f"Dataset written to {directory}")
+    return 0
+
+def run(args):
+    """Time every case on a fresh copy of the dataset"""
+    from src.models.database import Database
+    
+    directory, meta = dataset.ensure(args.scale, args.seed, args.data_dir)
+    copy = dataset.working_copy(directory)
+    cwd = os.getcwd()
+    os.chdir(copy)
+    try:
+        cases = suite.run(meta, args.seed, args.cases)
+    finally:
+        os.chdir(cwd)
+        # The copy is as big as the dataset; close its connections and drop it
+        Database.close_all()
+        shutil.rmtree(copy, ignore_errors=True)
+    
+    uncovered = suite.uncovered()
+    if uncovered:
+        print(f"Public methods without a benchmark: {', '.join(uncovered)}")
+    report = results.build(meta, cases, uncovered)
+    
+    if args.output:
+        results.save(report, args.output)
+        print(f"Results written to {args.output}")
+    if args.save_baseline:
+        results.save(report, results.baseline_path(args.scale))
+        print(f"Baseline written to {results.baseline_path(args.scale)}")
+        return 0
+    
+    baseline = args.baseline or results.baseline_path(args.scale)
+    if not os.path.exists(baseline):
+        print(f"No baseline at {baseline}; run with --save-baseline to store one")
+        return 0
+    rows = results.compare(results.load(baseline), report, args.threshold)
+    if args.cases:
+        rows = [row for row in rows if row[0] in cases]
+    return 1 if results.print_comparison(rows) else 0
+
+def compare(args):
+    """Compare two result files"""
+    rows = results.compare(results.load(args.baseline), results.load(args.current), args.threshold)
+    return 1 if results.print_comparison(rows) else 0
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    def dataset_options(command):
+        command.add_argument('--scale', choices=sorted(dataset.SCALES), default='tiny')
+        command.add_argument('--seed', type=int, default=1)
+        command.add_argument('--data-dir', help="where to keep the generated dataset")
+    
+    generate_parser = commands.add_parser('generate', help=generate.__doc__)
+    dataset_options(generate_parser)
+    generate_parser.set_defaults(func=generate)
+    
+    run_parser = commands.add_parser('run', help=run.__doc__)
+    dataset_options(run_parser)
+    run_parser.add_argument('--cases', nargs='+', help="only cases whose name contains one of these")
+    run_parser.add_argument('--output', help="write the results JSON here")
+    run_parser.add_argument('--baseline', help="compare with this file (default baselines/<scale>.json)")
+    run_parser.add_argument('--save-baseline', action='store_true',
+                            help="store these results as the baseline for the scale")
+    run_parser.add_argument('--threshold', type=float, default=results.THRESHOLD)
+    run_parser.set_defaults(func=run)
+    
+    compare_parser = commands.add_parser('compare', help=compare.__doc__)
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=results.THRESHOLD)
+    compare_parser.set_defaults(func=compare)
+    
+    args = parser.parse_args()
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Concurrent sales benchmark: N processes post sales against one database
+file, the way several counter instances share inventory.db, and report
+throughput and latency percentiles.
+
+    python benchmarks/concurrent_sales.py --processes 8 --sales 500
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+def post_sales(directory, worker, sales, products, start, results):
+    """Worker process: record `sales` single-unit sales, timing each one"""
+    os.chdir(directory)
+    from src.models.product import Product
+    
+    product_model = Product()
+    latencies = []
+    failures = 0
+    errors = 0
+    start.wait()
+    for i in range(sales):
+        product_id = 1 + (worker * sales + i) % products
+        began = time.perf_counter()
+        try:
+            if not product_model.update_stock(product_id, -1, 'sale', 1, "benchmark"):
+                failures += 1
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - began)
+    results.put((latencies, failures, errors))
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent sales benchmark")
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--sales', type=int, default=500, help="sales per process")
+    parser.add_argument('--products', type=int, default=50)
+    args = parser.parse_args()
+    
+    directory = tempfile.mkdtemp(prefix='inventory-bench-')
+    cwd = os.getcwd()
+    os.chdir(directory)
+    from src.models.database import Database
+    from src.models.product import Product
+    
+    try:
+        product_model = Product()
+        for i in range(args.products):
+            product_model.add_product(f"Product {i}", "", "Benchmark", 1.0,
+                                      args.processes * args.sales, 0, "")
+        
+        start = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=post_sales,
+                                           args=(directory, n, args.sales, args.products, start, results))
+                   for n in range(args.processes)]
+        for worker in workers:
+            worker.start()
+        
+        began = time.perf_counter()
+        start.set()
+        outcomes = [results.get() for _ in workers]
+        elapsed = time.perf_counter() - began
+        for worker in workers:
+            worker.join()
+    finally:
+        os.chdir(cwd)
+        Database.close_all()
+        shutil.rmtree(directory, ignore_errors=True)
+    
+    latencies = [latency for outcome in outcomes for latency in outcome[0]]
+    failures = sum(outcome[1] for outcome in outcomes)
+    errors = sum(outcome[2] for outcome in outcomes)
+    completed = len(latencies) - failures - errors
+    
+    print(f"Processes: {args.processes}, sales per process: {args.sales}")
+    print(f"Completed: {completed}, rejected: {failures}, errors: {errors}")
+    print(f"Throughput: {completed / elapsed:.0f} sales/s over {elapsed:.2f}s")
+    print(f"Latency p50: {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p99: {percentile(latencies, 0.99) * 1000:.2f} ms, "
+          f"max: {max(latencies) * 1000:.2f} ms")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Seeded synthetic databases for the benchmark suite.
+
+The same scale and seed always produce the same rows: product popularity
+and categories follow a Zipf-like skew, a few percent of products are low
+or out of stock, and transactions are spread over DAYS days ending at a
+fixed date, mostly sales with some restocks, returns and adjustments.
+"""
+
+import json
+import os
+import random
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+SCALES = {
+    'tiny': {'products': 1000, 'transactions': 20000, 'users': 10},
+    'small': {'products': 100000, 'transactions': 1000000, 'users': 25},
+    'medium': {'products': 1000000, 'transactions': 2000000, 'users': 50},
+    'large': {'products': 1000000, 'transactions': 10000000, 'users': 100},
+}
+
+DAYS = 730
+END_DATE = datetime(2025, 7, 1)
+PASSWORD = 'benchmark'
+
+ADJECTIVES = ['Steel', 'Copper', 'Plastic', 'Wooden', 'Glass', 'Rubber', 'Cotton', 'Paper',
+              'Heavy', 'Compact', 'Wireless', 'Portable', 'Premium', 'Basic', 'Mini', 'Large']
+NOUNS = ['Bolt', 'Hinge', 'Cable', 'Charger', 'Notebook', 'Bottle', 'Hammer', 'Lamp',
+         'Chair', 'Glove', 'Filter', 'Valve', 'Sensor', 'Router', 'Shelf', 'Brush']
+SUPPLIERS = [f'Supplier {i}' for i in range(40)]
+CATEGORIES = [f'Category {i}' for i in range(60)]
+TRANSACTION_TYPES = [('sale', 0.80), ('restock', 0.12), ('return', 0.05), ('adjustment', 0.03)]
+
+BATCH_SIZE = 50000
+
+def default_directory(scale, seed):
+    return os.path.join(tempfile.gettempdir(), 'inventory-benchmarks', f'{scale}-{seed}')
+
+def zipf_weights(count, exponent=1.1):
+    """Cumulative weights for random.choices: rank r is picked with
+    probability proportional to 1 / r ** exponent"""
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+def metadata(scale, seed):
+    sizes = SCALES[scale]
+    return {'scale': scale, 'seed': seed, 'days': DAYS,
+            'start_date': (END_DATE - timedelta(days=DAYS)).strftime('%Y-%m-%d'),
+            'end_date': END_DATE.strftime('%Y-%m-%d'), **sizes}
+
+def ensure(scale, seed=1, directory=None, progress=print):
+    """Return (directory, metadata) of the dataset, generating it if needed"""
+    directory = directory or default_directory(scale, seed)
+    meta_path = os.path.join(directory, 'dataset.json')
+    expected = metadata(scale, seed)
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) == expected:
+                return directory, expected
+    generate(scale, seed, directory, progress)
+    return directory, expected
+
+def generate(scale, seed=1, directory=None, progress=print):
+    """Build the dataset in directory/data/inventory.db through the models,
+    so every trigger-maintained table is filled as in production"""
+    directory = directory or default_directory(scale, seed)
+    meta = metadata(scale, seed)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        from src.models.database import Database
+        from src.models.product_import import ProductImporter
+        from src.models.user import User
+        
+        rng = random.Random(seed)
+        user_model = User()
+        for i in range(meta['users'] - 1):
+            user_model.create_user(f'clerk{i}', PASSWORD, 'admin' if i < 2 else 'user')
+        
+        progress(f"Generating {meta['products']} products")
+        importer = ProductImporter(chunk_size=BATCH_SIZE)
+        category_weights = zipf_weights(len(CATEGORIES))
+        chunk = []
+        for product_id in range(1, meta['products'] + 1):
+            chunk.append(_product(rng, product_id, category_weights))
+            if len(chunk) == BATCH_SIZE:
+                importer.write_chunk(chunk)
+                chunk = []
+        if chunk:
+            importer.write_chunk(chunk)
+        
+        progress(f"Generating {meta['transactions']} transactions")
+        _transactions(rng, Database(), meta)
+        
+        Database.close_all()
+    finally:
+        os.chdir(cwd)
+    
+    with open(os.path.join(directory, 'dataset.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return directory
+
+def _product(rng, product_id, category_weights):
+    roll = rng.random()
+    min_stock_level = rng.randint(5, 25)
+    if roll < 0.03:
+        quantity = 0
+    elif roll < 0.10:
+        quantity = rng.randint(1, min_stock_level)
+    else:
+        quantity = rng.randint(min_stock_level + 1, 100000)
+    name = f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {product_id}'
+    return (
+        product_id,
+        name,
+        f'{name} for benchmark use',
+        rng.choices(CATEGORIES, cum_weights=category_weights)[0],
+        round(rng.uniform(0.5, 500), 2),
+        quantity,
+        min_stock_level,
+        rng.choice(SUPPLIERS)
+    )
+
+def _transactions(rng, db, meta):
+    """Insert transactions in time order, ids rising with created_at.
+    Popular products are shuffled so they are not simply the lowest ids."""
+    products = list(range(1, meta['products'] + 1))
+    rng.shuffle(products)
+    weights = zipf_weights(len(products))
+    types = [name for name, _ in TRANSACTION_TYPES]
+    type_weights = list(accumulate(weight for _, weight in TRANSACTION_TYPES))
+    
+    conn = db.get_connection()
+    prices = dict(conn.execute('SELECT id, price FROM products'))
+    
+    count = meta['transactions']
+    start = END_DATE - timedelta(days=meta['days'])
+    step = meta['days'] * 86400 / count
+    batch = []
+    for n in range(count):
+        created_at = start + timedelta(seconds=n * step + rng.random() * step)
+        product_id = rng.choices(products, cum_weights=weights)[0]
+        transaction_type = rng.choices(types, cum_weights=type_weights)[0]
+        quantity = rng.randint(1, 5) if transaction_type != 'restock' else rng.randint(20, 200)
+        batch.append((product_id, transaction_type, quantity, prices[product_id],
+                      rng.randint(1, meta['users']), '', created_at.strftime('%Y-%m-%d %H:%M:%S')))
+        if len(batch) == BATCH_SIZE or n == count - 1:
+            with db.transaction() as cursor:
+                cursor.executemany('''
+                    INSERT INTO transactions (product_id, transaction_type, quantity, price,
+                                              user_id, notes, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', batch)
+            batch = []
+
+def working_copy(directory):
+    """Copy the dataset to a fresh temporary directory and return its path;
+    the caller removes it when done"""
+    copy = tempfile.mkdtemp(prefix='inventory-bench-run-')
+    shutil.copytree(os.path.join(directory, 'data'), os.path.join(copy, 'data'))
+    return copy
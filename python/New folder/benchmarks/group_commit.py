@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Group commit benchmark: T threads post sales and wait for each to be
+committed, once through update_stock (one commit per sale) and once through
+the StockWriter queue (one commit per group), and report throughput and
+latency percentiles for each.
+
+    python benchmarks/group_commit.py --threads 16 --sales 200
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import STOCK_WRITER_MAX_BATCH, STOCK_WRITER_MAX_LATENCY_MS
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run(threads, sales, products, sell):
+    """Start threads that each call sell(product_id) sales times; return
+    (elapsed seconds, latencies, sales refused or failed)"""
+    latencies = []
+    failures = []
+    start = threading.Barrier(threads + 1)
+    
+    def worker(n):
+        mine = []
+        failed = 0
+        start.wait()
+        for i in range(sales):
+            began = time.perf_counter()
+            try:
+                if not sell(1 + (n * sales + i) % products):
+                    failed += 1
+            except Exception:
+                failed += 1
+            mine.append(time.perf_counter() - began)
+        latencies.extend(mine)
+        failures.append(failed)
+    
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - began, latencies, sum(failures)
+
+def report(label, elapsed, latencies, failures):
+    completed = len(latencies) - failures
+    print(f"{label:<28} {completed / elapsed:>8.0f} sales/s  "
+          f"p50 {percentile(latencies, 0.50) * 1000:6.2f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:6.2f} ms  failed {failures}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Group commit benchmark")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--sales', type=int, default=200, help="sales per thread")
+    parser.add_argument('--products', type=int, default=50)
+    parser.add_argument('--max-batch', type=int, default=STOCK_WRITER_MAX_BATCH)
+    parser.add_argument('--max-latency-ms', type=float, default=STOCK_WRITER_MAX_LATENCY_MS)
+    args = parser.parse_args()
+    
+    directory = tempfile.mkdtemp(prefix='inventory-bench-')
+    cwd = os.getcwd()
+    os.chdir(directory)
+    from src.models.database import Database
+    from src.models.product import Product
+    from src.models.stock_writer import StockWriter
+    
+    try:
+        product_model = Product()
+        for i in range(args.products):
+            product_model.add_product(f"Product {i}", "", "Benchmark", 1.0,
+                                      3 * args.threads * args.sales, 0, "")
+        
+        print(f"Threads: {args.threads}, sales per thread: {args.sales}")
+        for synchronous in ('NORMAL', 'FULL'):
+            configured = threading.local()
+            
+            def sell(product_id):
+                if getattr(configured, 'done', False) is False:
+                    product_model.db.get_connection().execute(f'PRAGMA synchronous = {synchronous}')
+                    configured.done = True
+                return product_model.update_stock(product_id, -1, 'sale', 1, "benchmark")
+            
+            report(f"per-call commit ({synchronous})", *run(args.threads, args.sales, args.products, sell))
+        
+        writer = StockWriter(product_model.db, product_model._apply_stock_change,
+                             args.max_batch, args.max_latency_ms)
+        
+        def sell(product_id):
+            return writer.submit(product_id, -1, 'sale', 1, "benchmark").result()
+        
+        report("group commit (writer)", *run(args.threads, args.sales, args.products, sell))
+        writer.close()
+        stats = writer.stats()
+        print(f"Writer: {stats['batches']} commits, {stats['average_batch']:.1f} sales per commit")
+    finally:
+        os.chdir(cwd)
+        Database.close_all()
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Load test for the headless API (server.py). Each of C client threads keeps
+one HTTP/1.1 connection open and sends requests back to back; the report
+gives requests per second, latency percentiles and error counts.
+
+Without --url a server is started on a fresh database in a temporary
+directory and stopped afterwards.
+
+    python benchmarks/http_load.py --clients 32 --requests 200 --scenario mixed
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def start_server(products, workers):
+    """Seed a temporary database and run server.py on it; return (url,
+    process, directory), the directory to remove with stop_server()"""
+    directory = tempfile.mkdtemp(prefix='inventory-bench-')
+    cwd = os.getcwd()
+    os.chdir(directory)
+    from src.models.database import Database
+    from src.models.product import Product
+    
+    try:
+        product_model = Product()
+        for i in range(products):
+            product_model.add_product(f"Product {i}", "", "Benchmark", 1.0, 1000000, 0, "")
+    finally:
+        os.chdir(cwd)
+        Database.close_all()
+    
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'server.py'),
+                                '--port', str(port), '--workers', str(workers)],
+                               cwd=directory, stdout=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return url, process, directory
+        except OSError:
+            time.sleep(0.1)
+    stop_server(process, directory)
+    raise RuntimeError("server.py did not start")
+
+def stop_server(process, directory):
+    process.terminate()
+    process.wait()
+    shutil.rmtree(directory, ignore_errors=True)
+
+class Client:
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        self.headers = {'Content-Type': 'application/json'}
+    
+    def request(self, method, path, body=None):
+        self.conn.request(method, path, json.dumps(body) if body is not None else None, self.headers)
+        response = self.conn.getresponse()
+        return response.status, json.loads(response.read())
+    
+    def login(self, username, password):
+        status, payload = self.request('POST', '/api/login',
+                                       {'username': username, 'password': password})
+        if status != 200:
+            raise RuntimeError(f"Login failed: {payload}")
+        self.headers['Authorization'] = f"Bearer {payload['token']}"
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP API load test")
+    parser.add_argument('--url', help="server to test (default: start one)")
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help="requests per client")
+    parser.add_argument('--scenario', choices=['lookup', 'sale', 'mixed'], default='mixed',
+                        help="product lookups, sales, or 80%% lookups / 20%% sales")
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=8, help="workers of the started server")
+    args = parser.parse_args()
+    
+    process = None
+    url = args.url
+    if url is None:
+        url, process, directory = start_server(args.products, args.workers)
+    
+    latencies = []
+    statuses = {}
+    failures = []
+    lock = threading.Lock()
+    start = threading.Barrier(args.clients + 1)
+    
+    def worker(n):
+        rng = random.Random(n)
+        try:
+            client = Client(url)
+            client.login(args.username, args.password)
+        except Exception as e:
+            failures.append(f"client {n}: {e}")
+            # Release everyone waiting at the start instead of leaving them there
+            start.abort()
+            return
+        mine = []
+        counts = {}
+        try:
+            start.wait()
+        except threading.BrokenBarrierError:
+            return
+        for _ in range(args.requests):
+            product_id = rng.randint(1, args.products)
+            sale = args.scenario == 'sale' or (args.scenario == 'mixed' and rng.random() < 0.2)
+            began = time.perf_counter()
+            try:
+                if sale:
+                    status, _ = client.request('POST', '/api/stock',
+                                               {'product_id': product_id, 'quantity': 1,
+                                                'transaction_type': 'sale'})
+                else:
+                    status, _ = client.request('GET', f'/api/products/{product_id}')
+            except (OSError, http.client.HTTPException, ValueError):
+                status = 'connection error'
+                client = Client(url)
+                client.login(args.username, args.password)
+            mine.append(time.perf_counter() - began)
+            counts[status] = counts.get(status, 0) + 1
+        with lock:
+            latencies.extend(mine)
+            for status, count in counts.items():
+                statuses[status] = statuses.get(status, 0) + count
+    
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.clients)]
+    try:
+        for thread in threads:
+            thread.start()
+        try:
+            start.wait()
+        except threading.BrokenBarrierError:
+            for thread in threads:
+                thread.join()
+            print("Clients could not log in: " + '; '.join(failures))
+            return 1
+        began = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+    finally:
+        if process is not None:
+            stop_server(process, directory)
+    
+    print(f"Scenario: {args.scenario}, clients: {args.clients}, requests per client: {args.requests}")
+    print(f"Throughput: {len(latencies) / elapsed:.0f} requests/s over {elapsed:.2f}s")
+    print(f"Latency p50: {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p95: {percentile(latencies, 0.95) * 1000:.2f} ms, "
+          f"p99: {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print("Responses: " + ', '.join(f"{status}: {count}" for status, count in sorted(statuses.items(), key=str)))
+    return 0 if set(statuses) == {200} else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Benchmark results as JSON, and comparison against a stored baseline.
+"""
+
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime
+
+BASELINE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+# A case regresses when its median is THRESHOLD times the baseline's and at
+# least NOISE_MS slower; sub-millisecond jitter alone is not a regression.
+THRESHOLD = 1.25
+NOISE_MS = 0.05
+
+def baseline_path(scale):
+    return os.path.join(BASELINE_DIRECTORY, f'{scale}.json')
+
+def build(meta, cases, uncovered):
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine()
+        },
+        'dataset': meta,
+        'cases': cases,
+        'uncovered': uncovered
+    }
+
+def save(results, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def compare(baseline, current, threshold=THRESHOLD, noise_ms=NOISE_MS):
+    """Return [(case, baseline ms, current ms, status)] with status one of
+    regression, improvement, ok, new, missing or skipped"""
+    if baseline['dataset'] != current['dataset']:
+        raise ValueError("Results are for different datasets: "
+                         f"{baseline['dataset']} vs {current['dataset']}")
+    
+    rows = []
+    for name in sorted(set(baseline['cases']) | set(current['cases'])):
+        before = baseline['cases'].get(name, {}).get('median_ms')
+        after = current['cases'].get(name, {}).get('median_ms')
+        if name not in baseline['cases']:
+            status = 'new'
+        elif name not in current['cases']:
+            status = 'missing'
+        elif before is None or after is None:
+            status = 'skipped'
+        elif after > before * threshold and after - before >= noise_ms:
+            status = 'regression'
+        elif before > after * threshold and before - after >= noise_ms:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append((name, before, after, status))
+    return rows
+
+def print_comparison(rows, out=sys.stdout):
+    for name, before, after, status in rows:
+        ratio = f'{after / before:6.2f}x' if before and after else '       '
+        before = f'{before:10.3f}' if before is not None else ' ' * 10
+        after = f'{after:10.3f}' if after is not None else ' ' * 10
+        print(f'{name:<55} {before} {after} ms {ratio}  {status}', file=out)
+    regressions = sum(1 for row in rows if row[3] == 'regression')
+    print(f'{regressions} regression(s) in {len(rows)} cases', file=out)
+    return regressions
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
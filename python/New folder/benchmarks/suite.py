@@ -0,0 +1,447 @@
+"""
+Timed cases for every public model method and the report refresh paths.
+
+A case is a function registered with @case that gets the Context and
+returns the callable to time (any setup happens before it returns). Cases
+named "Class.method[variant]" cover Class.method; uncovered() lists public
+methods nobody times yet, so new model methods do not go unmeasured.
+"""
+
+import collections
+import inspect
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+CASES = []
+
+class Case:
+    def __init__(self, name, setup, max_rows=None, max_repeats=None):
+        self.name = name
+        self.setup = setup
+        # Skip when the dataset has more rows than this (e.g. full loads)
+        self.max_rows = max_rows
+        self.max_repeats = max_repeats
+    
+    @property
+    def covers(self):
+        return self.name.split('[')[0]
+
+def case(name, max_rows=None, max_repeats=None):
+    def register(setup):
+        CASES.append(Case(name, setup, max_rows, max_repeats))
+        return setup
+    return register
+
+class Context:
+    """Models and sample keys for one run on a working copy of a dataset"""
+    
+    def __init__(self, meta, seed):
+        from src.models.product import Product
+        from src.models.transaction import Transaction
+        from src.models.user import User
+        
+        self.meta = meta
+        self.rng = random.Random(seed)
+        self.product_model = Product()
+        self.transaction_model = Transaction()
+        self.user_model = User()
+        self.end_date = datetime.strptime(meta['end_date'], '%Y-%m-%d')
+        
+        conn = self.product_model.db.get_connection()
+        # Products by number of transactions: one hot, one typical
+        ranked = conn.execute('''
+            SELECT product_id FROM transactions GROUP BY product_id ORDER BY COUNT(*) DESC
+        ''').fetchall()
+        self.hot_product = ranked[0][0]
+        self.typical_product = ranked[len(ranked) // 2][0]
+        self.product_ids = [row[0] for row in conn.execute('SELECT id FROM products')]
+        self.transaction_ids = self.transaction_model.get_last_id()
+    
+    def product_id(self):
+        return self.rng.choice(self.product_ids)
+    
+    def days_ago(self, days):
+        return (self.end_date - timedelta(days=days)).strftime('%Y-%m-%d')
+    
+    def rows(self):
+        return max(self.meta['products'], self.meta['transactions'])
+
+def measure(func, min_time=0.5, min_repeats=3, max_repeats=200, slow=2.0):
+    """Time func() until min_time has passed (at least min_repeats calls,
+    at most max_repeats); a call slower than `slow` seconds is timed once"""
+    func()
+    samples = []
+    total = 0.0
+    while len(samples) < max_repeats:
+        began = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - began
+        samples.append(elapsed)
+        total += elapsed
+        if elapsed > slow or (total >= min_time and len(samples) >= min_repeats):
+            break
+    samples.sort()
+    return {
+        'repeats': len(samples),
+        'median_ms': statistics.median(samples) * 1000,
+        'min_ms': samples[0] * 1000,
+        'p95_ms': samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000,
+        'mean_ms': statistics.fmean(samples) * 1000
+    }
+
+def run(meta, seed=1, selected=None, progress=print):
+    """Run the cases (all, or those whose name contains one of selected)
+    in the current directory; return {case name: result}"""
+    context = Context(meta, seed)
+    results = {}
+    for entry in CASES:
+        if selected and not any(pattern in entry.name for pattern in selected):
+            continue
+        if entry.max_rows is not None and context.rows() > entry.max_rows:
+            results[entry.name] = {'skipped': f"dataset has more than {entry.max_rows} rows"}
+            continue
+        func = entry.setup(context)
+        results[entry.name] = measure(func, max_repeats=entry.max_repeats or 200)
+        progress(f"{entry.name:<55} {results[entry.name]['median_ms']:10.3f} ms")
+    return results
+
+def uncovered():
+    """Public methods of Product, Transaction and User without a case"""
+    from src.models.product import Product
+    from src.models.transaction import Transaction
+    from src.models.user import User
+    
+    covered = {entry.covers for entry in CASES}
+    return [f'{cls.__name__}.{name}'
+            for cls in (Product, Transaction, User)
+            for name, member in inspect.getmembers(cls, inspect.isfunction)
+            if not name.startswith('_') and f'{cls.__name__}.{name}' not in covered]
+
+def consume(batches):
+    for _ in batches:
+        pass
+
+# Product
+
+@case('Product.add_product')
+def add_product(ctx):
+    return lambda: ctx.product_model.add_product('Benchmark Widget', 'Added by the benchmark',
+                                                 'Benchmark', 9.99, 50, 10, 'Benchmark Supplier')
+
+@case('Product.update_product')
+def update_product(ctx):
+    product = ctx.product_model.get_product_by_id(ctx.typical_product)
+    return lambda: ctx.product_model.update_product(*product[:8])
+
+@case('Product.delete_product', max_repeats=500)
+def delete_product(ctx):
+    first = ctx.product_model.add_product('Doomed Widget 0', '', 'Benchmark', 1.0, 1, 0, '')
+    for i in range(1, 501):
+        ctx.product_model.add_product(f'Doomed Widget {i}', '', 'Benchmark', 1.0, 1, 0, '')
+    doomed = iter(range(first, first + 501))
+    return lambda: ctx.product_model.delete_product(next(doomed))
+
+@case('Product.get_all_products[cold]')
+def get_all_products(ctx):
+    def load():
+        ctx.product_model.cache.clear()
+        ctx.product_model.get_all_products()
+    return load
+
+@case('Product.get_all_products[cached]')
+def get_all_products_cached(ctx):
+    return ctx.product_model.get_all_products
+
+@case('Product.get_products_page[first]')
+def get_products_page(ctx):
+    return lambda: ctx.product_model.get_products_page(limit=200)
+
+@case('Product.get_products_page[middle]')
+def get_products_page_middle(ctx):
+    from src.models.product import Product
+    middle = ctx.product_model.get_product_by_id(ctx.product_ids[len(ctx.product_ids) // 2])
+    return lambda: ctx.product_model.get_products_page(after=Product.page_key(middle), limit=200)
+
+@case('Product.iter_products')
+def iter_products(ctx):
+    return lambda: consume(ctx.product_model.iter_products())
+
+@case('Product.page_key')
+def product_page_key(ctx):
+    from src.models.product import Product
+    product = ctx.product_model.get_product_by_id(ctx.typical_product)
+    return lambda: Product.page_key(product)
+
+@case('Product.get_product_by_id[cold]')
+def get_product_by_id(ctx):
+    def lookup():
+        ctx.product_model.cache.clear()
+        ctx.product_model.get_product_by_id(ctx.product_id())
+    return lookup
+
+@case('Product.get_product_by_id[cached]')
+def get_product_by_id_cached(ctx):
+    return lambda: ctx.product_model.get_product_by_id(ctx.typical_product)
+
+@case('Product.search_products[word]')
+def search_products(ctx):
+    return lambda: ctx.product_model.search_products('copper hinge', 500)
+
+@case('Product.search_products[prefix]')
+def search_products_prefix(ctx):
+    return lambda: ctx.product_model.search_products('wir', 500)
+
+@case('Product.search_products[one letter]')
+def search_products_letter(ctx):
+    return lambda: ctx.product_model.search_products('b', 500)
+
+@case('Product.get_inventory_totals')
+def get_inventory_totals(ctx):
+    return ctx.product_model.get_inventory_totals
+
+@case('Product.compute_inventory_totals')
+def compute_inventory_totals(ctx):
+    return ctx.product_model.compute_inventory_totals
+
+@case('Product.rebuild_inventory_totals')
+def rebuild_inventory_totals(ctx):
+    return ctx.product_model.rebuild_inventory_totals
+
+@case('Product.get_low_stock_products[cold]')
+def get_low_stock_products(ctx):
+    def load():
+        ctx.product_model.cache.clear()
+        ctx.product_model.get_low_stock_products()
+    return load
+
+@case('Product.get_low_stock_products[cached]')
+def get_low_stock_products_cached(ctx):
+    return ctx.product_model.get_low_stock_products
+
+@case('Product.iter_low_stock_products')
+def iter_low_stock_products(ctx):
+    return lambda: consume(ctx.product_model.iter_low_stock_products())
+
+@case('Product.count_low_stock_products')
+def count_low_stock_products(ctx):
+    return ctx.product_model.count_low_stock_products
+
+@case('Product.get_stock_alerts_since')
+def get_stock_alerts_since(ctx):
+    return lambda: ctx.product_model.get_stock_alerts_since(0, limit=100)
+
+@case('Product.get_last_stock_alert_id')
+def get_last_stock_alert_id(ctx):
+    return ctx.product_model.get_last_stock_alert_id
+
+@case('Product.update_stock')
+def update_stock(ctx):
+    return lambda: ctx.product_model.update_stock(ctx.product_id(), 1, 'restock', 1, 'benchmark')
+
+@case('Product.submit_stock_change')
+def submit_stock_change(ctx):
+    return lambda: ctx.product_model.submit_stock_change(ctx.product_id(), 1, 'restock', 1,
+                                                         'benchmark').result()
+
+@case('Product.update_stock_many')
+def update_stock_many(ctx):
+    return lambda: ctx.product_model.update_stock_many(
+        [(ctx.product_id(), 1, 'restock', 1, 'benchmark') for _ in range(5)])
+
+# Transaction
+
+@case('Transaction.get_all_transactions', max_rows=2000000)
+def get_all_transactions(ctx):
+    return ctx.transaction_model.get_all_transactions
+
+@case('Transaction.get_transactions_page[first]')
+def get_transactions_page(ctx):
+    return lambda: ctx.transaction_model.get_transactions_page(limit=200)
+
+@case('Transaction.get_transactions_page[middle]')
+def get_transactions_page_middle(ctx):
+    after = (ctx.days_ago(ctx.meta['days'] // 2) + ' 12:00:00', ctx.transaction_ids)
+    return lambda: ctx.transaction_model.get_transactions_page(after=after, limit=200)
+
+@case('Transaction.get_transactions_page[hot product]')
+def get_transactions_page_product(ctx):
+    return lambda: ctx.transaction_model.get_transactions_page(limit=200, product_id=ctx.hot_product)
+
+@case('Transaction.get_transactions_page[type and dates]')
+def get_transactions_page_filtered(ctx):
+    return lambda: ctx.transaction_model.get_transactions_page(
+        limit=200, transaction_type='return', start_date=ctx.days_ago(90), end_date=ctx.days_ago(30))
+
+@case('Transaction.page_key')
+def transaction_page_key(ctx):
+    from src.models.transaction import Transaction
+    row = ctx.transaction_model.get_transactions_page(limit=1)[0]
+    return lambda: Transaction.page_key(row)
+
+@case('Transaction.get_last_id')
+def get_last_id(ctx):
+    return ctx.transaction_model.get_last_id
+
+@case('Transaction.get_since')
+def get_since(ctx):
+    last_id = ctx.transaction_model.get_last_id()
+    return lambda: ctx.transaction_model.get_since(last_id - 100)
+
+@case('Transaction.get_transactions_by_product')
+def get_transactions_by_product(ctx):
+    return lambda: ctx.transaction_model.get_transactions_by_product(ctx.typical_product)
+
+@case('Transaction.get_sales_summary[all time]')
+def get_sales_summary(ctx):
+    return ctx.transaction_model.get_sales_summary
+
+@case('Transaction.get_sales_summary[30 days]')
+def get_sales_summary_days(ctx):
+    return lambda: ctx.transaction_model.get_sales_summary(ctx.days_ago(30))
+
+@case('Transaction.get_sales_summary[partial day]')
+def get_sales_summary_raw(ctx):
+    start = ctx.days_ago(1) + ' 06:00:00'
+    return lambda: ctx.transaction_model.get_sales_summary(start)
+
+@case('Transaction.iter_sales_summary')
+def iter_sales_summary(ctx):
+    return lambda: consume(ctx.transaction_model.iter_sales_summary(ctx.days_ago(90)))
+
+@case('Transaction.rebuild_sales_rollup')
+def rebuild_sales_rollup(ctx):
+    return ctx.transaction_model.rebuild_sales_rollup
+
+@case('Transaction.check_sales_rollup')
+def check_sales_rollup(ctx):
+    return ctx.transaction_model.check_sales_rollup
+
+# User
+
+@case('User.authenticate')
+def authenticate(ctx):
+    from .dataset import PASSWORD
+    return lambda: ctx.user_model.authenticate('clerk0', PASSWORD)
+
+@case('User.authenticate[wrong password]')
+def authenticate_wrong(ctx):
+    return lambda: ctx.user_model.authenticate('clerk0', 'not the password')
+
+@case('User.get_all_users')
+def get_all_users(ctx):
+    return ctx.user_model.get_all_users
+
+@case('User.create_user')
+def create_user(ctx):
+    names = (f'benchmark_user_{n}' for n in range(1000000))
+    return lambda: ctx.user_model.create_user(next(names), 'benchmark')
+
+# Report refresh paths: the model calls and row formatting each refresh
+# method of ReportsFrame does, without the Tk widgets
+
+@case('reports.refresh_inventory_report')
+def refresh_inventory_report(ctx):
+    from src.views.reports import ReportsFrame
+    from src.config import TREE_PAGE_SIZE
+    
+    def refresh():
+        rows = ctx.product_model.get_products_page(limit=TREE_PAGE_SIZE)
+        [ReportsFrame.make_inventory_item(None, row) for row in rows]
+        ctx.product_model.get_inventory_totals()
+    return refresh
+
+@case('reports.refresh_sales_report[all time]')
+def refresh_sales_report(ctx):
+    from src.views.reports import ReportsFrame
+    
+    def refresh():
+        sales = ctx.transaction_model.get_sales_summary(None)
+        [ReportsFrame.make_sales_item(None, sale) for sale in sales]
+    return refresh
+
+@case('reports.refresh_sales_report[last 30 days]')
+def refresh_sales_report_days(ctx):
+    from src.views.reports import ReportsFrame
+    
+    def refresh():
+        sales = ctx.transaction_model.get_sales_summary(ctx.days_ago(30))
+        [ReportsFrame.make_sales_item(None, sale) for sale in sales]
+    return refresh
+
+@case('reports.refresh_low_stock_report')
+def refresh_low_stock_report(ctx):
+    from src.views.reports import ReportsFrame
+    
+    def refresh():
+        ctx.product_model.cache.clear()
+        rows = ctx.product_model.get_low_stock_products()
+        [ReportsFrame.make_low_stock_item(None, row) for row in rows]
+        ReportsFrame.count_alerts(rows)
+    return refresh
+
+# Treeview refresh after one row of a 50k-row view changed: TreeBinding.sync
+# against reloading every row, as refreshes did before. Runs headless, so a
+# stand-in counts the Tk calls instead of drawing them.
+
+class CountingTree:
+    """The parts of ttk.Treeview TreeBinding uses, counting each call"""
+    
+    def __init__(self):
+        self.children = []
+        self.calls = collections.Counter()
+    
+    def get_children(self):
+        self.calls['get_children'] += 1
+        return tuple(self.children)
+    
+    def insert(self, parent, index, iid, values, tags):
+        self.calls['insert'] += 1
+        if index == 'end' or index >= len(self.children):
+            self.children.append(iid)
+        else:
+            self.children.insert(index, iid)
+    
+    def item(self, iid, values, tags):
+        self.calls['item'] += 1
+    
+    def move(self, iid, parent, index):
+        self.calls['move'] += 1
+        self.children.remove(iid)
+        self.children.insert(index, iid)
+    
+    def delete(self, *iids):
+        self.calls['delete'] += len(iids)
+        doomed = set(iids)
+        self.children = [iid for iid in self.children if iid not in doomed]
+
+def inventory_binding(rows=50000):
+    from src.views.reports import ReportsFrame
+    from src.views.tree_binding import TreeBinding
+    
+    products = [(n, f'Product {n:05}', '', 'Benchmark', 1.0 + n % 100, n % 50, 10, '',
+                 '2024-01-01 00:00:00', '2024-01-01 00:00:00') for n in range(1, rows + 1)]
+    binding = TreeBinding(CountingTree(), lambda row: ReportsFrame.make_inventory_item(None, row))
+    binding.sync(products)
+    return binding, products
+
+@case('tree_binding.sync[50k rows, one changed]')
+def tree_binding_sync(ctx):
+    binding, products = inventory_binding()
+    
+    def refresh():
+        index = ctx.rng.randrange(len(products))
+        product = products[index]
+        products[index] = product[:5] + (product[5] + 1,) + product[6:]
+        binding.sync(products)
+    return refresh
+
+@case('tree_binding.reload[50k rows]', max_repeats=20)
+def tree_binding_reload(ctx):
+    binding, products = inventory_binding()
+    
+    def reload():
+        binding.clear()
+        binding.insert(products)
+    return reload
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the Inventory Management System
+"""
+
+import argparse
+import sys
+import os
+
+# Add src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.models.product import Product
+from src.models.transaction import Transaction
+from src.models.archive import TransactionArchive
+from src.utils import passwords
+
+def rebuild_rollup(args):
+    """Regenerate the daily sales rollup from raw transactions"""
+    rows = Transaction().rebuild_sales_rollup()
+    print(f"Rebuilt daily sales rollup ({rows} product-days)")
+    return 0
+
+def check_rollup(args):
+    """Compare the daily sales rollup with raw transactions"""
+    mismatches = Transaction().check_sales_rollup()
+    for product_id, rollup, raw in mismatches:
+        print(f"Product {product_id}: rollup sold {rollup[0]} / ${rollup[1]:.2f}, "
+              f"transactions sold {raw[0]} / ${raw[1]:.2f}")
+    if mismatches:
+        print(f"{len(mismatches)} products differ; run 'rebuild-rollup' to fix")
+        return 1
+    print("Daily sales rollup matches transactions")
+    return 0
+
+def rebuild_totals(args):
+    """Recompute the inventory totals row from the products table"""
+    totals = Product().rebuild_inventory_totals()
+    print(f"Rebuilt inventory totals ({totals['total_products']} products, "
+          f"${totals['total_value']:.2f})")
+    return 0
+
+def archive(args):
+    """Move old transactions into per-year archive files"""
+    moved = TransactionArchive().archive_before(args.before, vacuum=args.vacuum)
+    for year, rows in sorted(moved.items()):
+        print(f"{year}: archived {rows} transactions")
+    if not moved:
+        print("Nothing to archive")
+    return 0
+
+def calibrate_password_hash(args):
+    """Pick the password hash cost that takes about --target-ms here"""
+    algorithm = passwords.effective_algorithm(args.algorithm)
+    cost, elapsed = passwords.calibrate(args.target_ms, algorithm)
+    print(f"{algorithm}: one hash takes {elapsed:.0f} ms at this cost. "
+          f"Set in src/config.py:")
+    if algorithm == 'scrypt':
+        print("PASSWORD_HASH_ALGORITHM = 'scrypt'")
+        print(f"PASSWORD_SCRYPT_N = 2 ** {cost.bit_length() - 1}")
+    else:
+        print("PASSWORD_HASH_ALGORITHM = 'pbkdf2_sha256'")
+        print(f"PASSWORD_PBKDF2_ITERATIONS = {cost}")
+    print("Existing passwords are rehashed with it at their next login.")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory Management System maintenance")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    commands.add_parser('rebuild-rollup', help=rebuild_rollup.__doc__).set_defaults(func=rebuild_rollup)
+    commands.add_parser('check-rollup', help=check_rollup.__doc__).set_defaults(func=check_rollup)
+    commands.add_parser('rebuild-totals', help=rebuild_totals.__doc__).set_defaults(func=rebuild_totals)
+    
+    archive_parser = commands.add_parser('archive', help=archive.__doc__)
+    archive_parser.add_argument('--before', metavar='YYYY-MM-DD',
+                                help="cutoff date (default: ARCHIVE_AFTER_DAYS ago)")
+    archive_parser.add_argument('--vacuum', action='store_true',
+                                help="compact the working database afterwards")
+    archive_parser.set_defaults(func=archive)
+    
+    calibrate_parser = commands.add_parser('calibrate-password-hash',
+                                           help=calibrate_password_hash.__doc__)
+    calibrate_parser.add_argument('--target-ms', type=float, default=250,
+                                  help="login time to aim for (default 250)")
+    calibrate_parser.add_argument('--algorithm', choices=['scrypt', 'pbkdf2_sha256'],
+                                  help="default: PASSWORD_HASH_ALGORITHM")
+    calibrate_parser.set_defaults(func=calibrate_password_hash)
+    
+    args = parser.parse_args()
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
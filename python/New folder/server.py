@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Headless JSON API for the Inventory Management System
+Serves products, stock changes, transactions and reports to POS terminals
+"""
+
+import argparse
+import signal
+import sys
+import os
+
+# Add src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.controllers.api_server import ApiServer
+from src.config import API_HOST, API_PORT, API_WORKERS, QUERY_TRACE_ENABLED
+
+def main():
+    """Server entry point"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT)
+    parser.add_argument('--workers', type=int, default=API_WORKERS,
+                        help="threads running database work")
+    args = parser.parse_args()
+    
+    if QUERY_TRACE_ENABLED and hasattr(signal, 'SIGUSR1'):
+        # kill -USR1 <pid> writes the query latency histograms
+        from src.models.query_trace import tracer
+        signal.signal(signal.SIGUSR1, lambda signum, frame: tracer.dump())
+    
+    ApiServer(args.host, args.port, args.workers).run()
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,30 @@ import os
 # Database configuration
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'inventory.db')
 
+# Several app instances may share one database file. WAL lets readers and
+# the writer work at the same time; a writer that finds the database busy
+# waits up to DATABASE_BUSY_TIMEOUT_MS, and write methods then retry the
+# whole transaction up to WRITE_RETRY_ATTEMPTS times with doubling backoff.
+# DATABASE_SYNCHRONOUS = 'NORMAL' roughly doubles write throughput under WAL,
+# but a power loss can then drop the last committed sales; only opt into it
+# where losing them is acceptable.
+DATABASE_JOURNAL_MODE = 'WAL'
+DATABASE_SYNCHRONOUS = 'FULL'
+DATABASE_BUSY_TIMEOUT_MS = 5000
+WRITE_RETRY_ATTEMPTS = 5
+WRITE_RETRY_BACKOFF_MS = 50
+
+# Product.submit_stock_change queues sales on one writer thread that commits
+# up to STOCK_WRITER_MAX_BATCH of them together. Changes queued while a group
+# commits form the next group; STOCK_WRITER_MAX_LATENCY_MS above 0 also holds
+# a group back that long to fill, which only pays off when callers do not
+# wait on each result. With STOCK_WRITE_BEHIND off every change is committed
+# on its own, as update_stock does.
+STOCK_WRITE_BEHIND = False
+STOCK_WRITER_MAX_BATCH = 256
+STOCK_WRITER_MAX_LATENCY_MS = 0
+STOCK_WRITER_SYNCHRONOUS = 'FULL'
+
 # Application settings
 APP_NAME = "Inventory Management System"
 APP_VERSION = "1.0.0"
@@ -15,10 +39,61 @@ APP_VERSION = "1.0.0"
 DEFAULT_ADMIN_USERNAME = "admin"
 DEFAULT_ADMIN_PASSWORD = "admin123"
 
+# Password hashing: new and rehashed passwords use PASSWORD_HASH_ALGORITHM
+# ('scrypt', or 'pbkdf2_sha256'). "manage.py calibrate-password-hash" picks
+# the cost for a target login time on this machine. Stored hashes made with
+# other settings, or the old unsalted SHA-256, are rehashed at next login.
+PASSWORD_HASH_ALGORITHM = 'scrypt'
+PASSWORD_SCRYPT_N = 2 ** 15
+PASSWORD_SCRYPT_R = 8
+PASSWORD_SCRYPT_P = 1
+PASSWORD_PBKDF2_ITERATIONS = 600000
+
 # UI settings
 WINDOW_WIDTH = 1200
 WINDOW_HEIGHT = 800
 
+# Product lists load TREE_PAGE_SIZE rows at a time and keep at most
+# TREE_MAX_PAGES pages in memory while scrolling
+TREE_PAGE_SIZE = 200
+TREE_MAX_PAGES = 5
+
+# Products kept in the shared product cache
+PRODUCT_CACHE_SIZE = 5000
+
+# Search settings
+SEARCH_DEBOUNCE_MS = 250
+SEARCH_RESULT_LIMIT = 500
+
+# How often open windows check for changes made by other clients
+CHANGE_POLL_MS = 1000
+
+# Transactions older than this are moved to per-year archive files by
+# "manage.py archive"
+ARCHIVE_AFTER_DAYS = 365
+
+# Headless API (server.py): database work runs on API_WORKERS threads
+API_HOST = "127.0.0.1"
+API_PORT = 8080
+API_WORKERS = 8
+API_PAGE_LIMIT = 500
+API_SESSION_HOURS = 12
+API_MAX_BODY_BYTES = 1024 * 1024
+API_IDLE_TIMEOUT_S = 30
+
+# Query tracing: when enabled every statement is logged to QUERY_TRACE_LOG
+# (None: not logged, only counted), statements taking SLOW_QUERY_MS or more
+# go to SLOW_QUERY_LOG with their query plan, and per-method latency
+# histograms are written to QUERY_STATS_FILE on request (View menu, or
+# SIGUSR1 for server.py). Off, it costs nothing.
+LOG_DIRECTORY = os.path.join(os.path.dirname(__file__), '..', 'logs')
+QUERY_TRACE_ENABLED = False
+QUERY_TRACE_LOG = None
+QUERY_TRACE_RECENT = 1000
+SLOW_QUERY_MS = 100
+SLOW_QUERY_LOG = os.path.join(LOG_DIRECTORY, 'slow_queries.log')
+QUERY_STATS_FILE = os.path.join(LOG_DIRECTORY, 'query_stats.txt')
+
 # Report settings
 EXPORT_DIRECTORY = os.path.join(os.path.dirname(__file__), '..', 'exports')
 
@@ -0,0 +1,271 @@
+import json
+import re
+import secrets
+import threading
+import time
+from datetime import datetime
+from ..models.product import Product
+from ..models.transaction import Transaction
+from ..models.user import User
+from ..config import API_SESSION_HOURS, API_PAGE_LIMIT
+
+PRODUCT_FIELDS = ('id', 'name', 'description', 'category', 'price', 'quantity',
+                  'min_stock_level', 'supplier', 'created_at', 'updated_at')
+TRANSACTION_FIELDS = ('id', 'product', 'transaction_type', 'quantity', 'price',
+                      'username', 'notes', 'created_at')
+ALERT_FIELDS = ('id', 'product_id', 'product', 'state', 'quantity', 'min_stock_level',
+                'created_at')
+TRANSACTION_TYPES = ('sale', 'restock', 'return', 'adjustment')
+
+
+class ApiError(Exception):
+    """A request the API refuses, reported to the client as {'error': message}"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ApiController:
+    """JSON API over the models, for the headless server (server.py).
+
+    handle() takes an already parsed request and returns (status, payload).
+    It blocks on the database, so the server runs it on its worker pool;
+    the models keep one connection per thread, so one controller serves
+    every worker. Clients POST /api/login for a bearer token and send it in
+    the Authorization header of every other request.
+    """
+
+    def __init__(self):
+        self.product_model = Product()
+        self.transaction_model = Transaction()
+        self.user_model = User()
+
+        # token -> (user, expires at)
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+        self.routes = [
+            ('POST', r'/api/login', self.login, False),
+            ('GET', r'/api/products', self.list_products, True),
+            ('GET', r'/api/products/low-stock', self.low_stock_products, True),
+            ('GET', r'/api/products/(\d+)', self.get_product, True),
+            ('POST', r'/api/stock', self.post_stock_change, True),
+            ('POST', r'/api/sales', self.post_sale, True),
+            ('GET', r'/api/transactions', self.list_transactions, True),
+            ('GET', r'/api/alerts', self.list_stock_alerts, True),
+            ('GET', r'/api/reports/inventory', self.inventory_report, True),
+            ('GET', r'/api/reports/sales', self.sales_report, True),
+        ]
+        self.routes = [(method, re.compile(pattern + '$'), handler, auth)
+                       for method, pattern, handler, auth in self.routes]
+
+    def handle(self, method, path, query, body, authorization=None):
+        """Run one request; query is a parse_qs dict and body raw bytes"""
+        try:
+            allowed = False
+            for route_method, pattern, handler, auth in self.routes:
+                match = pattern.match(path)
+                if not match:
+                    continue
+                allowed = True
+                if route_method != method:
+                    continue
+                user = self._authorize(authorization) if auth else None
+                request = {'query': {key: values[-1] for key, values in query.items()},
+                           'body': self._parse_body(body) if method == 'POST' else {},
+                           'user': user}
+                return handler(request, *match.groups())
+            if allowed:
+                raise ApiError(405, "Method not allowed")
+            raise ApiError(404, "Not found")
+        except ApiError as e:
+            return e.status, {'error': e.message}
+
+    def login(self, request):
+        body = request['body']
+        user = self.user_model.authenticate(str(body.get('username', '')),
+                                            str(body.get('password', '')))
+        if not user:
+            raise ApiError(401, "Invalid username or password")
+
+        token = secrets.token_urlsafe(32)
+        expires = time.time() + API_SESSION_HOURS * 3600
+        with self._sessions_lock:
+            self._sessions = {key: session for key, session in self._sessions.items()
+                              if session[1] > time.time()}
+            self._sessions[token] = (user, expires)
+        return 200, {'token': token, 'user': user}
+
+    def list_products(self, request):
+        """Keyset-paged products; ?search= returns the best matches instead"""
+        query = request['query']
+        limit = self._int(query, 'limit', API_PAGE_LIMIT, 1, API_PAGE_LIMIT)
+        if query.get('search'):
+            rows = self.product_model.search_products(query['search'], limit)
+            return 200, {'products': self._records(PRODUCT_FIELDS, rows), 'next': None}
+
+        after = None
+        if 'after_id' in query:
+            after = (query.get('after_name', ''), self._int(query, 'after_id'))
+        rows = self.product_model.get_products_page(after=after, limit=limit)
+        next_page = None
+        if len(rows) == limit:
+            name, product_id = Product.page_key(rows[-1])
+            next_page = {'after_name': name, 'after_id': product_id}
+        return 200, {'products': self._records(PRODUCT_FIELDS, rows), 'next': next_page}
+
+    def low_stock_products(self, request):
+        rows = self.product_model.get_low_stock_products()
+        return 200, {'products': self._records(PRODUCT_FIELDS, rows)}
+
+    def get_product(self, request, product_id):
+        product = self.product_model.get_product_by_id(int(product_id))
+        if product is None:
+            raise ApiError(404, "Product not found")
+        return 200, dict(zip(PRODUCT_FIELDS, product))
+
+    def post_stock_change(self, request):
+        """One stock change, with quantity signed the way the inventory tab
+        does it: sales take stock out, restocks and returns put it back and
+        adjustments apply the quantity as given"""
+        body = request['body']
+        product_id = self._int(body, 'product_id')
+        transaction_type = body.get('transaction_type', 'sale')
+        change = self._quantity_change(transaction_type, body.get('quantity'))
+
+        future = self.product_model.submit_stock_change(product_id, change, transaction_type,
+                                                        request['user']['id'],
+                                                        str(body.get('notes', '')))
+        if not future.result():
+            raise ApiError(409, "Unknown product or insufficient stock")
+        return 200, {'applied': True, 'product_id': product_id, 'quantity_change': change}
+
+    def post_sale(self, request):
+        """A basket of sales committed together: all lines or none"""
+        body = request['body']
+        items = body.get('items')
+        if not isinstance(items, list) or not items:
+            raise ApiError(400, "items must be a non-empty list")
+
+        user_id = request['user']['id']
+        notes = str(body.get('notes', ''))
+        changes = [(self._int(item, 'product_id'), self._quantity_change('sale', item.get('quantity')),
+                    'sale', user_id, notes)
+                   for item in items if isinstance(item, dict)]
+        if len(changes) != len(items):
+            raise ApiError(400, "Every item must be an object")
+
+        results = self.product_model.update_stock_many(changes)
+        if not all(results):
+            failed = [change[0] for change, result in zip(changes, results) if not result]
+            raise ApiError(409, f"Unknown product or insufficient stock for {failed}")
+        return 200, {'applied': True, 'lines': len(changes)}
+
+    def list_transactions(self, request):
+        """Newest-first history, keyset-paged like the inventory tab.
+
+        ?since_id=N instead returns everything newer than transaction N,
+        oldest first, for clients that tail the history.
+        """
+        query = request['query']
+        filters = {
+            'product_id': self._int(query, 'product_id') if 'product_id' in query else None,
+            'user_id': self._int(query, 'user_id') if 'user_id' in query else None,
+            'transaction_type': query.get('type'),
+            'start_date': self._date(query, 'start_date'),
+            'end_date': self._date(query, 'end_date')
+        }
+        if 'since_id' in query:
+            rows = self.transaction_model.get_since(self._int(query, 'since_id'), **filters)
+            return 200, {'transactions': self._records(TRANSACTION_FIELDS, rows)}
+
+        limit = self._int(query, 'limit', API_PAGE_LIMIT, 1, API_PAGE_LIMIT)
+        after = None
+        if 'after_id' in query:
+            after = (self._date(query, 'after_created_at', required=True),
+                     self._int(query, 'after_id'))
+        rows = self.transaction_model.get_transactions_page(after=after, limit=limit, **filters)
+        next_page = None
+        if len(rows) == limit:
+            created_at, transaction_id = Transaction.page_key(rows[-1])
+            next_page = {'after_created_at': created_at, 'after_id': transaction_id}
+        return 200, {'transactions': self._records(TRANSACTION_FIELDS, rows), 'next': next_page}
+
+    def list_stock_alerts(self, request):
+        """Low stock crossings newer than alert ?since_id=N (default 0),
+        oldest first; pass the last id back to tail the alert queue."""
+        query = request['query']
+        since_id = self._int(query, 'since_id', 0, 0)
+        limit = self._int(query, 'limit', API_PAGE_LIMIT, 1, API_PAGE_LIMIT)
+        rows = self.product_model.get_stock_alerts_since(since_id, limit=limit)
+        return 200, {'alerts': self._records(ALERT_FIELDS, rows)}
+
+    def inventory_report(self, request):
+        return 200, self.product_model.get_inventory_totals()
+
+    def sales_report(self, request):
+        query = request['query']
+        rows = self.transaction_model.get_sales_summary(self._date(query, 'start_date'),
+                                                        self._date(query, 'end_date'))
+        return 200, {'sales': self._records(('product', 'quantity_sold', 'revenue'), rows)}
+
+    def _authorize(self, authorization):
+        scheme, _, token = (authorization or '').partition(' ')
+        with self._sessions_lock:
+            session = self._sessions.get(token) if scheme.lower() == 'bearer' else None
+        if session is None or session[1] <= time.time():
+            raise ApiError(401, "Log in first (POST /api/login) and send the token")
+        return session[0]
+
+    @staticmethod
+    def _parse_body(body):
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            raise ApiError(400, "Request body must be JSON")
+        if not isinstance(data, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+        return data
+
+    @staticmethod
+    def _int(values, name, default=None, minimum=None, maximum=None):
+        value = values.get(name, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ApiError(400, f"{name} must be an integer")
+        if minimum is not None:
+            value = max(minimum, value)
+        if maximum is not None:
+            value = min(maximum, value)
+        return value
+
+    @staticmethod
+    def _date(values, name, required=False):
+        """An ISO date or timestamp parameter, as the string the models compare"""
+        value = values.get(name)
+        if not value and not required:
+            return None
+        try:
+            datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ApiError(400, f"{name} must be a date (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)")
+        return value
+
+    def _quantity_change(self, transaction_type, quantity):
+        if transaction_type not in TRANSACTION_TYPES:
+            raise ApiError(400, f"transaction_type must be one of {', '.join(TRANSACTION_TYPES)}")
+        quantity = self._int({'quantity': quantity}, 'quantity')
+        if transaction_type == 'adjustment':
+            if quantity == 0:
+                raise ApiError(400, "quantity must not be zero")
+            return quantity
+        if quantity <= 0:
+            raise ApiError(400, "quantity must be positive")
+        return -quantity if transaction_type == 'sale' else quantity
+
+    @staticmethod
+    def _records(fields, rows):
+        return [dict(zip(fields, row)) for row in rows]
@@ -0,0 +1,102 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+from .api_controller import ApiController
+from ..config import API_WORKERS, API_MAX_BODY_BYTES, API_IDLE_TIMEOUT_S
+
+
+class ApiServer:
+    """Minimal HTTP/1.1 JSON server for ApiController.
+
+    The asyncio loop owns the sockets and parses requests, so idle and
+    keep-alive connections cost no thread; each request's database work
+    runs on a pool of at most `workers` threads (one SQLite connection
+    each), which bounds how many requests hit the database at once.
+    """
+
+    def __init__(self, host, port, workers=API_WORKERS, controller=None):
+        self.host = host
+        self.port = port
+        self.controller = controller or ApiController()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api')
+
+    def run(self):
+        """Serve until interrupted"""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.executor.shutdown(wait=True)
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        addresses = ', '.join(f'{s.getsockname()[0]}:{s.getsockname()[1]}' for s in server.sockets)
+        print(f"Serving the inventory API on {addresses}")
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while await self.handle_request(reader, writer):
+                pass
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, reader, writer):
+        """Answer one request; return whether to keep the connection open"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), API_IDLE_TIMEOUT_S)
+        except asyncio.LimitOverrunError:
+            await self.respond(writer, 431, {'error': "Request headers too large"}, False)
+            return False
+
+        request_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+        try:
+            method, target, version = request_line.split(' ')
+        except ValueError:
+            await self.respond(writer, 400, {'error': "Malformed request line"}, False)
+            return False
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            length = -1
+        if not 0 <= length <= API_MAX_BODY_BYTES:
+            await self.respond(writer, 413, {'error': "Request body too large"}, False)
+            return False
+        body = await reader.readexactly(length)
+
+        url = urlsplit(target)
+        loop = asyncio.get_running_loop()
+        try:
+            status, payload = await loop.run_in_executor(
+                self.executor, self.controller.handle, method, url.path,
+                parse_qs(url.query), body, headers.get('authorization'))
+        except Exception as e:
+            status, payload = 500, {'error': f"Internal error: {e}"}
+
+        await self.respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, default=str).encode()
+        writer.write(
+            f'HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+            f'\r\n'.encode('latin-1') + body
+        )
+        await writer.drain()
@@ -1,3 +1,4 @@
+import time
 from ..views.login_window import LoginWindow
 from ..views.main_window import MainWindow
 
@@ -5,6 +6,7 @@ class AppController:
     def __init__(self):
         self.current_user = None
         self.main_window = None
+        self.login_time = None
     
     def start_application(self):
         """Start the application with login window"""
@@ -13,11 +15,12 @@ class AppController:
     
     def on_login_success(self, user):
         """Handle successful login"""
+        self.login_time = time.perf_counter()
         self.current_user = user
         self.show_main_window()
     
     def show_main_window(self):
         """Show main application window"""
         if self.current_user:
-            self.main_window = MainWindow(self.current_user)
+            self.main_window = MainWindow(self.current_user, started_at=self.login_time)
             self.main_window.run()
@@ -0,0 +1,179 @@
+import os
+from datetime import datetime, timedelta
+from .database import Database, retry_on_busy
+from ..config import ARCHIVE_AFTER_DAYS
+
+
+class TransactionArchive:
+    """Cold storage for old transactions: one SQLite file per year.
+
+    archive_before() moves transactions older than a cutoff out of the
+    working database into archive/transactions_<year>.db next to it, and
+    records each year in the transaction_archives table. Readers call
+    attach() for the years a query actually needs; everything newer than
+    newest_archived() is still in the working database.
+
+    Archived sales stay counted in the daily_sales rollup, so whole-day and
+    All Time sales summaries never need the archives.
+    """
+
+    DIRECTORY = 'archive'
+    # SQLite allows 10 attached databases by default; leave room for others
+    MAX_ATTACHED = 8
+
+    COLUMNS = 'id, product_id, transaction_type, quantity, price, user_id, notes, created_at'
+
+    def __init__(self, db=None):
+        self.db = db or Database()
+        self.directory = os.path.join(os.path.dirname(os.path.abspath(self.db.db_path)),
+                                      self.DIRECTORY)
+
+    def years(self, start_date=None, end_date=None):
+        """Archived years, newest first, that may hold rows in [start_date, end_date)"""
+        conn = self.db.get_connection()
+
+        query = 'SELECT year FROM transaction_archives WHERE 1 = 1'
+        params = []
+        if start_date:
+            query += ' AND year >= ?'
+            params.append(int(start_date[:4]))
+        if end_date:
+            query += ' AND year <= ?'
+            params.append(int(end_date[:4]))
+        query += ' ORDER BY year DESC'
+
+        return [row[0] for row in conn.execute(query, params)]
+
+    def newest_archived(self):
+        """created_at of the newest archived transaction, or None"""
+        conn = self.db.get_connection()
+
+        cursor = conn.execute('SELECT MAX(newest_created_at) FROM transaction_archives')
+        return cursor.fetchone()[0]
+
+    def path(self, year):
+        return os.path.join(self.directory, f'transactions_{year}.db')
+
+    def attach(self, year, conn=None):
+        """Attach the archive for year to conn (this thread's connection by
+        default) if it is not attached yet, and return its schema name"""
+        conn = conn or self.db.get_connection()
+        schema = f'archive_{year}'
+
+        attached = [row[1] for row in conn.execute('PRAGMA database_list')]
+        if schema in attached:
+            return schema
+
+        path = self.path(year)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Transaction archive for {year} is missing: {path}")
+
+        archives = [name for name in attached if name.startswith('archive_')]
+        if len(archives) >= self.MAX_ATTACHED:
+            conn.execute(f'DETACH DATABASE {archives[0]}')
+        conn.execute(f'ATTACH DATABASE ? AS {schema}', (path,))
+        return schema
+
+    def archive_before(self, cutoff=None, vacuum=False):
+        """Move transactions created before cutoff ('YYYY-MM-DD', default
+        ARCHIVE_AFTER_DAYS ago) into the per-year archives.
+
+        Each batch of up to MAX_ATTACHED years is copied into the archives
+        in one transaction, and the copied rows are then deleted from the
+        working database in a second one. A transaction across attached
+        files is not atomic under WAL, so the delete only removes rows the
+        archive holds: an interrupted run leaves copies, never losses, and
+        running it again (INSERT OR IGNORE) completes it. vacuum=True
+        compacts the working database afterwards. Returns {year: rows moved}.
+        """
+        if cutoff is None:
+            cutoff = (datetime.now() - timedelta(days=ARCHIVE_AFTER_DAYS)).strftime('%Y-%m-%d')
+
+        conn = self.db.get_connection()
+        years = [int(row[0]) for row in conn.execute('''
+            SELECT DISTINCT strftime('%Y', created_at) FROM transactions
+            WHERE created_at < ? ORDER BY 1
+        ''', (cutoff,)) if row[0] is not None]
+
+        moved = {}
+        os.makedirs(self.directory, exist_ok=True)
+        for start in range(0, len(years), self.MAX_ATTACHED):
+            batch = years[start:start + self.MAX_ATTACHED]
+            schemas = [self._attach_for_write(conn, year) for year in batch]
+            try:
+                self._copy(batch, schemas, cutoff)
+                moved.update(self._delete(batch, schemas, cutoff))
+            finally:
+                for schema in schemas:
+                    conn.execute(f'DETACH DATABASE {schema}')
+
+        if vacuum and moved:
+            conn.execute('VACUUM')
+        return moved
+
+    def _attach_for_write(self, conn, year):
+        schema = f'archive_{year}'
+        if schema in [row[1] for row in conn.execute('PRAGMA database_list')]:
+            conn.execute(f'DETACH DATABASE {schema}')
+        conn.execute(f'ATTACH DATABASE ? AS {schema}', (self.path(year),))
+
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {schema}.transactions (
+                id INTEGER PRIMARY KEY,
+                product_id INTEGER,
+                transaction_type TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                price REAL,
+                user_id INTEGER,
+                notes TEXT,
+                created_at TIMESTAMP
+            )
+        ''')
+        conn.execute(f'''
+            CREATE INDEX IF NOT EXISTS {schema}.idx_transactions_created
+            ON transactions (created_at)
+        ''')
+        conn.execute(f'''
+            CREATE INDEX IF NOT EXISTS {schema}.idx_transactions_product_created
+            ON transactions (product_id, created_at)
+        ''')
+        conn.commit()
+        return schema
+
+    @retry_on_busy
+    def _copy(self, years, schemas, cutoff):
+        with self.db.transaction(immediate=True) as cursor:
+            for year, schema in zip(years, schemas):
+                cursor.execute(f'''
+                    INSERT OR IGNORE INTO {schema}.transactions ({self.COLUMNS})
+                    SELECT {self.COLUMNS} FROM main.transactions
+                    WHERE created_at >= ? AND created_at < ? AND created_at < ?
+                ''', (f'{year}-01-01', f'{year + 1}-01-01', cutoff))
+
+                cursor.execute(f'''
+                    INSERT INTO transaction_archives (year, filename, row_count, newest_created_at)
+                    SELECT ?, ?, COUNT(*), MAX(created_at) FROM {schema}.transactions WHERE 1
+                    ON CONFLICT (year) DO UPDATE SET
+                        row_count = excluded.row_count,
+                        newest_created_at = excluded.newest_created_at
+                ''', (year, os.path.basename(self.path(year))))
+
+    @retry_on_busy
+    def _delete(self, years, schemas, cutoff):
+        # Only main is written here, so this commit is atomic even under WAL,
+        # and only rows the archive already holds are deleted
+        moved = {}
+        with self.db.transaction(immediate=True) as cursor:
+            # Keep daily_sales as is: archived sales still count in the rollup
+            cursor.execute('INSERT INTO transactions_archiving (flag) VALUES (1)')
+
+            for year, schema in zip(years, schemas):
+                cursor.execute(f'''
+                    DELETE FROM main.transactions
+                    WHERE created_at >= ? AND created_at < ? AND created_at < ?
+                      AND id IN (SELECT id FROM {schema}.transactions)
+                ''', (f'{year}-01-01', f'{year + 1}-01-01', cutoff))
+                moved[year] = cursor.rowcount
+
+            cursor.execute('DELETE FROM transactions_archiving')
+        return moved
@@ -1,70 +1,187 @@
 import sqlite3
-import hashlib
+import threading
+import atexit
+import functools
+import random
+import time
+from contextlib import contextmanager
 from datetime import datetime
 import os
 
+from . import migrations
+from ..config import (DATABASE_JOURNAL_MODE, DATABASE_SYNCHRONOUS, DATABASE_BUSY_TIMEOUT_MS,
+                      WRITE_RETRY_ATTEMPTS, WRITE_RETRY_BACKOFF_MS, QUERY_TRACE_ENABLED)
+
+if QUERY_TRACE_ENABLED:
+    from .query_trace import TracedConnection, tracer
+
+
+def is_busy_error(error):
+    """True if error is SQLite reporting the database busy or locked"""
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+
+def retry_on_busy(method):
+    """Re-run a write method when the database stays busy past the timeout.
+
+    The method must make its changes in a single transaction, so a failed
+    attempt has rolled back before the next one starts.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        delay = WRITE_RETRY_BACKOFF_MS / 1000
+        for attempt in range(WRITE_RETRY_ATTEMPTS):
+            try:
+                return method(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == WRITE_RETRY_ATTEMPTS - 1:
+                    raise
+            # Jitter keeps competing processes from retrying in lockstep
+            time.sleep(delay * random.uniform(0.5, 1.5))
+            delay *= 2
+    return wrapper
+
+
 class Database:
+    # One long-lived connection per (thread, database file), shared by every
+    # Database instance so the models stop paying connect/warmup per call.
+    _local = threading.local()
+    _connections = []
+    _lock = threading.Lock()
+
+    # Database files already migrated by this process.
+    _initialized = set()
+    _init_lock = threading.Lock()
+
+    STATEMENT_CACHE_SIZE = 256
+
     def __init__(self, db_path="data/inventory.db"):
         self.db_path = db_path
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.init_database()
-    
+
+        key = os.path.abspath(db_path)
+        if key in Database._initialized:
+            return
+        with Database._init_lock:
+            if key not in Database._initialized:
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+                self.init_database()
+                Database._initialized.add(key)
+
     def get_connection(self):
-        return sqlite3.connect(self.db_path)
-    
-    def init_database(self):
+        """Return this thread's pooled connection, opening it on first use"""
+        pool = getattr(self._local, 'pool', None)
+        if pool is None:
+            pool = self._local.pool = {}
+
+        key = os.path.abspath(self.db_path)
+        conn = pool.get(key)
+        if conn is None:
+            # Traced connections only exist when tracing is on, so with it
+            # off there is nothing between the models and sqlite3
+            conn = sqlite3.connect(self.db_path,
+                                   timeout=DATABASE_BUSY_TIMEOUT_MS / 1000,
+                                   cached_statements=self.STATEMENT_CACHE_SIZE,
+                                   check_same_thread=False,
+                                   factory=TracedConnection if QUERY_TRACE_ENABLED else sqlite3.Connection)
+            if QUERY_TRACE_ENABLED:
+                conn.set_trace_callback(tracer.on_trace)
+            conn.execute(f'PRAGMA synchronous = {DATABASE_SYNCHRONOUS}')
+            pool[key] = conn
+            with Database._lock:
+                Database._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """Yield a cursor; commit on success, roll back on error.
+
+        immediate=True takes the write lock up front (BEGIN IMMEDIATE), so
+        reads inside the transaction cannot be invalidated by another writer.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
-        
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                role TEXT NOT NULL DEFAULT 'user',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Products table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT,
-                category TEXT,
-                price REAL NOT NULL,
-                quantity INTEGER NOT NULL DEFAULT 0,
-                min_stock_level INTEGER DEFAULT 10,
-                supplier TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Transactions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                product_id INTEGER,
-                transaction_type TEXT NOT NULL,
-                quantity INTEGER NOT NULL,
-                price REAL,
-                user_id INTEGER,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (product_id) REFERENCES products (id),
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Create default admin user
-        admin_password = hashlib.sha256("admin123".encode()).hexdigest()
-        cursor.execute('''
-            INSERT OR IGNORE INTO users (username, password_hash, role)
-            VALUES (?, ?, ?)
-        ''', ("admin", admin_password, "admin"))
-        
-        conn.commit()
-        conn.close()
+        try:
+            if immediate:
+                cursor.execute('BEGIN IMMEDIATE')
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def iter_rows(self, query, params=(), batch_size=1000):
+        """Yield the rows of query in fetchmany batches instead of all at once"""
+        cursor = self.get_connection().execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    def data_version(self):
+        """PRAGMA data_version of this thread's connection.
+
+        It changes whenever another connection (another thread or process)
+        commits to the file, so polling it is a cheap way to notice writes
+        made elsewhere. Writes on this same connection do not change it.
+        """
+        return self.get_connection().execute('PRAGMA data_version').fetchone()[0]
+
+    def table_versions(self):
+        """Return {table: version} from change_counters; a table's version
+        goes up with every row inserted, updated or deleted in it"""
+        cursor = self.get_connection().execute('SELECT table_name, version FROM change_counters')
+        return dict(cursor.fetchall())
+
+    @classmethod
+    def close_all(cls):
+        """Close every pooled connection (called at shutdown)"""
+        with cls._lock:
+            connections = cls._connections
+            cls._connections = []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        cls._local = threading.local()
+
+    @classmethod
+    def close_thread(cls):
+        """Close the calling thread's pooled connections.
+
+        Short-lived worker threads call this when they finish; otherwise
+        their connections stay open until close_all() at exit.
+        """
+        pool = getattr(cls._local, 'pool', None)
+        if not pool:
+            return
+        cls._local.pool = {}
+        closing = list(pool.values())
+        with cls._lock:
+            cls._connections = [conn for conn in cls._connections
+                                if all(conn is not other for other in closing)]
+        for conn in closing:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def init_database(self):
+        """Set the journal mode and bring the schema up to date (see migrations.py)"""
+        conn = self.get_connection()
+        # Persistent in the file; a no-op once set
+        conn.execute(f'PRAGMA journal_mode = {DATABASE_JOURNAL_MODE}')
+        migrations.migrate(conn)
+
+
+atexit.register(Database.close_all)
@@ -0,0 +1,498 @@
+"""
+Versioned schema migrations for the inventory database.
+
+Each migration is a function taking a cursor. Its version is its position in
+MIGRATIONS (1-based) and the applied version is stored in PRAGMA user_version,
+so append new migrations to the end and never edit or reorder old ones.
+"""
+
+import hashlib
+import sqlite3
+
+
+def create_initial_schema(cursor):
+    # Users table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'user',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Products table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            category TEXT,
+            price REAL NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            min_stock_level INTEGER DEFAULT 10,
+            supplier TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Transactions table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER,
+            transaction_type TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            price REAL,
+            user_id INTEGER,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (product_id) REFERENCES products (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    # Create default admin user
+    admin_password = hashlib.sha256("admin123".encode()).hexdigest()
+    cursor.execute('''
+        INSERT OR IGNORE INTO users (username, password_hash, role)
+        VALUES (?, ?, ?)
+    ''', ("admin", admin_password, "admin"))
+
+
+def create_query_indexes(cursor):
+    # Transaction history per product, newest first
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_product_created
+        ON transactions (product_id, created_at)
+    ''')
+
+    # Full transaction history, newest first
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_created
+        ON transactions (created_at)
+    ''')
+
+    # Sales summary: covers the type/date filter and the summed columns
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_type_created
+        ON transactions (transaction_type, created_at, product_id, quantity, price)
+    ''')
+
+    # Product listings ordered by name
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_products_name
+        ON products (name)
+    ''')
+
+    # Low stock lookup; queries must use the same expression to hit it
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_products_stock_margin
+        ON products (quantity - min_stock_level)
+    ''')
+
+
+def create_product_search_index(cursor):
+    # External-content FTS5 index over the searchable product columns. SQLite
+    # builds without FTS5 skip this and Product.search_products uses LIKE.
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                name, description, category,
+                content='products', content_rowid='id',
+                prefix='2 3'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        return
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts (rowid, name, description, category)
+            VALUES (new.id, new.name, new.description, new.category);
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description, category)
+            VALUES ('delete', old.id, old.name, old.description, old.category);
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS products_fts_update
+        AFTER UPDATE OF name, description, category ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description, category)
+            VALUES ('delete', old.id, old.name, old.description, old.category);
+            INSERT INTO products_fts (rowid, name, description, category)
+            VALUES (new.id, new.name, new.description, new.category);
+        END
+    ''')
+
+    # Default ranking for ORDER BY rank: bm25 with name weighted highest
+    cursor.execute("INSERT INTO products_fts (products_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 3.0)')")
+
+    # Index the rows that existed before this migration
+    cursor.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+
+def defer_product_search_sync(cursor):
+    # Bulk imports insert a row into products_fts_deferred for the length of
+    # their transaction and index the new products in one statement, since
+    # feeding FTS5 row by row from the trigger is several times slower.
+    row = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='products_fts'"
+    ).fetchone()
+    if row is None:
+        return
+
+    cursor.execute('CREATE TABLE IF NOT EXISTS products_fts_deferred (flag INTEGER)')
+    cursor.execute('DROP TRIGGER IF EXISTS products_fts_insert')
+    cursor.execute('''
+        CREATE TRIGGER products_fts_insert AFTER INSERT ON products
+        WHEN NOT EXISTS (SELECT 1 FROM products_fts_deferred) BEGIN
+            INSERT INTO products_fts (rowid, name, description, category)
+            VALUES (new.id, new.name, new.description, new.category);
+        END
+    ''')
+
+
+def create_daily_sales_rollup(cursor):
+    # Sales per product per day, kept current by triggers on transactions so
+    # sales summaries read a few rows per day instead of every raw sale.
+    # NULL prices count as 0 revenue.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_sales (
+            day TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, product_id)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS daily_sales_insert AFTER INSERT ON transactions
+        WHEN new.transaction_type = 'sale' BEGIN
+            INSERT INTO daily_sales (day, product_id, quantity, revenue)
+            VALUES (date(new.created_at), new.product_id, new.quantity,
+                    new.quantity * COALESCE(new.price, 0))
+            ON CONFLICT (day, product_id) DO UPDATE SET
+                quantity = quantity + excluded.quantity,
+                revenue = revenue + excluded.revenue;
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS daily_sales_delete AFTER DELETE ON transactions
+        WHEN old.transaction_type = 'sale' BEGIN
+            UPDATE daily_sales
+            SET quantity = quantity - old.quantity,
+                revenue = revenue - old.quantity * COALESCE(old.price, 0)
+            WHERE day = date(old.created_at) AND product_id = old.product_id;
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS daily_sales_update
+        AFTER UPDATE OF product_id, transaction_type, quantity, price, created_at ON transactions
+        BEGIN
+            UPDATE daily_sales
+            SET quantity = quantity - old.quantity,
+                revenue = revenue - old.quantity * COALESCE(old.price, 0)
+            WHERE old.transaction_type = 'sale'
+              AND day = date(old.created_at) AND product_id = old.product_id;
+            INSERT INTO daily_sales (day, product_id, quantity, revenue)
+            SELECT date(new.created_at), new.product_id, new.quantity,
+                   new.quantity * COALESCE(new.price, 0)
+            WHERE new.transaction_type = 'sale'
+            ON CONFLICT (day, product_id) DO UPDATE SET
+                quantity = quantity + excluded.quantity,
+                revenue = revenue + excluded.revenue;
+        END
+    ''')
+
+    # Backfill from the sales recorded so far
+    cursor.execute('''
+        INSERT INTO daily_sales (day, product_id, quantity, revenue)
+        SELECT date(created_at), product_id, SUM(quantity),
+               SUM(quantity * COALESCE(price, 0))
+        FROM transactions
+        WHERE transaction_type = 'sale' AND product_id IS NOT NULL
+        GROUP BY date(created_at), product_id
+    ''')
+
+
+def create_inventory_totals(cursor):
+    # One-row table of inventory KPIs, kept current by triggers on products
+    # so the summary is a single-row read however large the catalog gets.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS inventory_totals (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_products INTEGER NOT NULL DEFAULT 0,
+            total_value REAL NOT NULL DEFAULT 0,
+            low_stock_count INTEGER NOT NULL DEFAULT 0,
+            out_of_stock_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS inventory_totals_insert AFTER INSERT ON products BEGIN
+            UPDATE inventory_totals SET
+                total_products = total_products + 1,
+                total_value = total_value + new.price * new.quantity,
+                low_stock_count = low_stock_count
+                    + IFNULL(new.quantity > 0 AND new.quantity <= new.min_stock_level, 0),
+                out_of_stock_count = out_of_stock_count + (new.quantity <= 0)
+            WHERE id = 1;
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS inventory_totals_delete AFTER DELETE ON products BEGIN
+            UPDATE inventory_totals SET
+                total_products = total_products - 1,
+                total_value = total_value - old.price * old.quantity,
+                low_stock_count = low_stock_count
+                    - IFNULL(old.quantity > 0 AND old.quantity <= old.min_stock_level, 0),
+                out_of_stock_count = out_of_stock_count - (old.quantity <= 0)
+            WHERE id = 1;
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS inventory_totals_update
+        AFTER UPDATE OF price, quantity, min_stock_level ON products BEGIN
+            UPDATE inventory_totals SET
+                total_value = total_value - old.price * old.quantity
+                    + new.price * new.quantity,
+                low_stock_count = low_stock_count
+                    - IFNULL(old.quantity > 0 AND old.quantity <= old.min_stock_level, 0)
+                    + IFNULL(new.quantity > 0 AND new.quantity <= new.min_stock_level, 0),
+                out_of_stock_count = out_of_stock_count
+                    - (old.quantity <= 0) + (new.quantity <= 0)
+            WHERE id = 1;
+        END
+    ''')
+
+    cursor.execute('''
+        INSERT OR REPLACE INTO inventory_totals
+            (id, total_products, total_value, low_stock_count, out_of_stock_count)
+        SELECT 1, COUNT(*),
+               COALESCE(SUM(price * quantity), 0),
+               COALESCE(SUM(quantity > 0 AND quantity <= min_stock_level), 0),
+               COALESCE(SUM(quantity <= 0), 0)
+        FROM products
+    ''')
+
+
+def create_change_counters(cursor):
+    # A version number per table, bumped by triggers on every row change, so
+    # views can tell whether anything they show changed without re-querying.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_counters (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    for table in ('products', 'transactions', 'users'):
+        cursor.execute('INSERT OR IGNORE INTO change_counters (table_name) VALUES (?)', (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_changes_{event.lower()}
+                AFTER {event} ON {table} BEGIN
+                    UPDATE change_counters SET version = version + 1
+                    WHERE table_name = '{table}';
+                END
+            ''')
+
+
+def create_history_user_index(cursor):
+    # Transaction history filtered by user, newest first
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_user_created
+        ON transactions (user_id, created_at)
+    ''')
+
+
+def create_transaction_archives(cursor):
+    # Per-year archive files of old transactions (see archive.py). Archiving
+    # inserts a row into transactions_archiving for the length of its
+    # transaction so the deleted sales stay counted in daily_sales.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transaction_archives (
+            year INTEGER PRIMARY KEY,
+            filename TEXT NOT NULL,
+            row_count INTEGER NOT NULL DEFAULT 0,
+            newest_created_at TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE TABLE IF NOT EXISTS transactions_archiving (flag INTEGER)')
+
+    cursor.execute('DROP TRIGGER IF EXISTS daily_sales_delete')
+    cursor.execute('''
+        CREATE TRIGGER daily_sales_delete AFTER DELETE ON transactions
+        WHEN old.transaction_type = 'sale'
+         AND NOT EXISTS (SELECT 1 FROM transactions_archiving) BEGIN
+            UPDATE daily_sales
+            SET quantity = quantity - old.quantity,
+                revenue = revenue - old.quantity * COALESCE(old.price, 0)
+            WHERE day = date(old.created_at) AND product_id = old.product_id;
+        END
+    ''')
+
+
+def _stock_state(row):
+    # 'out', 'low' or 'ok' for old/new in a products trigger; a product is low
+    # on the same condition as Product.LOW_STOCK_QUERY
+    return f'''CASE WHEN {row}.quantity <= {row}.min_stock_level
+                THEN (CASE WHEN {row}.quantity <= 0 THEN 'out' ELSE 'low' END)
+                ELSE 'ok' END'''
+
+
+def create_stock_alerts(cursor):
+    # Low stock threshold crossings, recorded by triggers on products as they
+    # happen: a product going low or out of stock, and back to 'ok'. Inserts
+    # bump the stock_alerts change counter, which is how open windows hear
+    # about new alerts.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stock_alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            min_stock_level INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS stock_alerts_product_insert AFTER INSERT ON products
+        WHEN new.quantity <= new.min_stock_level BEGIN
+            INSERT INTO stock_alerts (product_id, state, quantity, min_stock_level)
+            VALUES (new.id, {_stock_state('new')}, new.quantity, new.min_stock_level);
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS stock_alerts_product_update
+        AFTER UPDATE OF quantity, min_stock_level ON products
+        WHEN {_stock_state('old')} != {_stock_state('new')} BEGIN
+            INSERT INTO stock_alerts (product_id, state, quantity, min_stock_level)
+            VALUES (new.id, {_stock_state('new')}, new.quantity, new.min_stock_level);
+        END
+    ''')
+
+    cursor.execute("INSERT OR IGNORE INTO change_counters (table_name) VALUES ('stock_alerts')")
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS stock_alerts_changes_insert
+        AFTER INSERT ON stock_alerts BEGIN
+            UPDATE change_counters SET version = version + 1
+            WHERE table_name = 'stock_alerts';
+        END
+    ''')
+
+    # Products already low when alerts start being recorded
+    cursor.execute('''
+        INSERT INTO stock_alerts (product_id, state, quantity, min_stock_level)
+        SELECT id, CASE WHEN quantity <= 0 THEN 'out' ELSE 'low' END, quantity, min_stock_level
+        FROM products WHERE quantity <= min_stock_level ORDER BY id
+    ''')
+
+    # Only low products are in this index, already in report order, so the
+    # current low stock set is read without touching the rest of the catalog.
+    # It replaces the expression index over every product.
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_products_low_stock
+        ON products (quantity) WHERE quantity <= min_stock_level
+    ''')
+    cursor.execute('DROP INDEX IF EXISTS idx_products_stock_margin')
+
+
+def skip_unlinked_sales_in_rollup(cursor):
+    # transactions.product_id is nullable, but daily_sales.product_id is not:
+    # a sale without a product made the rollup triggers fail the insert.
+    # Such sales are left out of the rollup, as the backfill already did.
+    cursor.execute('DROP TRIGGER IF EXISTS daily_sales_insert')
+    cursor.execute('''
+        CREATE TRIGGER daily_sales_insert AFTER INSERT ON transactions
+        WHEN new.transaction_type = 'sale' AND new.product_id IS NOT NULL BEGIN
+            INSERT INTO daily_sales (day, product_id, quantity, revenue)
+            VALUES (date(new.created_at), new.product_id, new.quantity,
+                    new.quantity * COALESCE(new.price, 0))
+            ON CONFLICT (day, product_id) DO UPDATE SET
+                quantity = quantity + excluded.quantity,
+                revenue = revenue + excluded.revenue;
+        END
+    ''')
+
+    cursor.execute('DROP TRIGGER IF EXISTS daily_sales_update')
+    cursor.execute('''
+        CREATE TRIGGER daily_sales_update
+        AFTER UPDATE OF product_id, transaction_type, quantity, price, created_at ON transactions
+        BEGIN
+            UPDATE daily_sales
+            SET quantity = quantity - old.quantity,
+                revenue = revenue - old.quantity * COALESCE(old.price, 0)
+            WHERE old.transaction_type = 'sale'
+              AND day = date(old.created_at) AND product_id = old.product_id;
+            INSERT INTO daily_sales (day, product_id, quantity, revenue)
+            SELECT date(new.created_at), new.product_id, new.quantity,
+                   new.quantity * COALESCE(new.price, 0)
+            WHERE new.transaction_type = 'sale' AND new.product_id IS NOT NULL
+            ON CONFLICT (day, product_id) DO UPDATE SET
+                quantity = quantity + excluded.quantity,
+                revenue = revenue + excluded.revenue;
+        END
+    ''')
+
+
+MIGRATIONS = [
+    create_initial_schema,
+    create_query_indexes,
+    create_product_search_index,
+    defer_product_search_sync,
+    create_daily_sales_rollup,
+    create_inventory_totals,
+    create_change_counters,
+    create_history_user_index,
+    create_transaction_archives,
+    create_stock_alerts,
+    skip_unlinked_sales_in_rollup,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending migrations, each in its own write transaction"""
+    if get_version(conn) >= SCHEMA_VERSION:
+        return
+
+    cursor = conn.cursor()
+    try:
+        while True:
+            # BEGIN IMMEDIATE takes the write lock before re-reading the version,
+            # so two processes starting together never run the same migration.
+            cursor.execute('BEGIN IMMEDIATE')
+            version = get_version(conn)
+            if version >= SCHEMA_VERSION:
+                conn.rollback()
+                break
+
+            try:
+                MIGRATIONS[version](cursor)
+                cursor.execute(f'PRAGMA user_version = {version + 1}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    finally:
+        cursor.close()
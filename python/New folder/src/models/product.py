@@ -1,138 +1,375 @@
-from .database import Database
+import re
+import sqlite3
+from concurrent.futures import Future
+from .database import Database, retry_on_busy
+from .product_cache import ProductCache
+from .stock_writer import StockWriter
+from ..config import STOCK_WRITE_BEHIND
 from datetime import datetime
 
 class Product:
+    # Whether products_fts is usable, per database file
+    _fts_enabled = {}
+    
     def __init__(self):
         self.db = Database()
+        # Shared by every Product instance using this database file
+        self.cache = ProductCache.for_database(self.db)
     
+    @retry_on_busy
     def add_product(self, name, description, category, price, quantity, min_stock_level, supplier):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO products (name, description, category, price, quantity, min_stock_level, supplier)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (name, description, category, price, quantity, min_stock_level, supplier))
-        
-        product_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.db.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO products (name, description, category, price, quantity, min_stock_level, supplier)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (name, description, category, price, quantity, min_stock_level, supplier))
+            
+            product_id = cursor.lastrowid
+        self.cache.record_write([product_id])
         return product_id
     
+    @retry_on_busy
     def update_product(self, product_id, name, description, category, price, quantity, min_stock_level, supplier):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE products 
-            SET name=?, description=?, category=?, price=?, quantity=?, 
-                min_stock_level=?, supplier=?, updated_at=CURRENT_TIMESTAMP
-            WHERE id=?
-        ''', (name, description, category, price, quantity, min_stock_level, supplier, product_id))
-        
-        conn.commit()
-        conn.close()
-        return cursor.rowcount > 0
+        with self.db.transaction() as cursor:
+            cursor.execute('''
+                UPDATE products 
+                SET name=?, description=?, category=?, price=?, quantity=?, 
+                    min_stock_level=?, supplier=?, updated_at=CURRENT_TIMESTAMP
+                WHERE id=?
+            ''', (name, description, category, price, quantity, min_stock_level, supplier, product_id))
+            
+            updated = cursor.rowcount > 0
+        if updated:
+            self.cache.record_write([product_id])
+        return updated
     
+    @retry_on_busy
     def delete_product(self, product_id):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM products WHERE id=?', (product_id,))
-        conn.commit()
-        conn.close()
-        return cursor.rowcount > 0
+        with self.db.transaction() as cursor:
+            cursor.execute('DELETE FROM products WHERE id=?', (product_id,))
+            deleted = cursor.rowcount > 0
+        if deleted:
+            self.cache.record_write([product_id])
+        return deleted
     
     def get_all_products(self):
+        return self.cache.get_list('all', self._fetch_all_products)
+    
+    def _fetch_all_products(self):
         conn = self.db.get_connection()
-        cursor = conn.cursor()
         
-        cursor.execute('''
+        cursor = conn.execute('''
             SELECT id, name, description, category, price, quantity, 
                    min_stock_level, supplier, created_at, updated_at
             FROM products ORDER BY name
         ''')
         
-        products = cursor.fetchall()
-        conn.close()
-        return products
+        return cursor.fetchall()
+    
+    def get_products_page(self, after=None, before=None, limit=100):
+        """Return up to limit products in (name, id) order.
+        
+        after/before are the (name, id) key of an already loaded row; the
+        page starts just past it (or ends just before it), so each page is an
+        index seek instead of an OFFSET scan.
+        """
+        generation = self.cache.generation
+        rows = self._fetch_products_page(after, before, limit)
+        # Rows on screen are the ones most likely to be looked up next
+        self.cache.put_many(rows, generation)
+        return rows
+    
+    def _fetch_products_page(self, after, before, limit):
+        conn = self.db.get_connection()
+        
+        query = '''
+            SELECT id, name, description, category, price, quantity, 
+                   min_stock_level, supplier, created_at, updated_at
+            FROM products
+        '''
+        if before is not None:
+            cursor = conn.execute(query + '''
+                WHERE (name, id) < (?, ?)
+                ORDER BY name DESC, id DESC LIMIT ?
+            ''', (before[0], before[1], limit))
+            return cursor.fetchall()[::-1]
+        
+        if after is not None:
+            cursor = conn.execute(query + '''
+                WHERE (name, id) > (?, ?)
+                ORDER BY name, id LIMIT ?
+            ''', (after[0], after[1], limit))
+        else:
+            cursor = conn.execute(query + ' ORDER BY name, id LIMIT ?', (limit,))
+        return cursor.fetchall()
+    
+    def iter_products(self, batch_size=1000):
+        """Yield every product in (name, id) order, one keyset page at a time.
+        
+        Each page is its own short read, so a long export never holds the
+        database open against writers.
+        """
+        after = None
+        while True:
+            page = self._fetch_products_page(after, None, batch_size)
+            if not page:
+                return
+            yield page
+            after = self.page_key(page[-1])
+    
+    @staticmethod
+    def page_key(product):
+        """Keyset position of a product row for get_products_page"""
+        return (product[1], product[0])
     
     def get_product_by_id(self, product_id):
+        return self.cache.get(product_id, self._fetch_product)
+    
+    def _fetch_product(self, product_id):
         conn = self.db.get_connection()
-        cursor = conn.cursor()
         
-        cursor.execute('''
+        cursor = conn.execute('''
             SELECT id, name, description, category, price, quantity, 
                    min_stock_level, supplier, created_at, updated_at
             FROM products WHERE id=?
         ''', (product_id,))
         
         product = cursor.fetchone()
-        conn.close()
+        cursor.close()
         return product
     
-    def search_products(self, search_term):
+    def search_products(self, search_term, limit=None):
+        """Search name, description and category.
+        
+        Uses the products_fts index (prefix match on every word, ranked by
+        bm25 with name weighted highest) and falls back to a LIKE scan when
+        the SQLite build has no FTS5 or the term is a single character.
+        Pass limit to return only the best matches.
+        """
+        match_query = self._fts_match_query(search_term)
+        if match_query and self._fts_available():
+            try:
+                return self._search_fts(match_query, limit)
+            except sqlite3.OperationalError:
+                # products_fts exists but this SQLite build cannot read it
+                Product._fts_enabled[self.db.db_path] = False
+        
+        return self._search_like(search_term, limit)
+    
+    def _fts_available(self):
+        enabled = Product._fts_enabled.get(self.db.db_path)
+        if enabled is None:
+            conn = self.db.get_connection()
+            row = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='products_fts'"
+            ).fetchone()
+            enabled = Product._fts_enabled[self.db.db_path] = row is not None
+        return enabled
+    
+    @staticmethod
+    def _fts_match_query(search_term):
+        # Quote each word so FTS5 operators in user input are taken literally
+        words = re.findall(r'\w+', search_term or '')
+        if not any(len(word) > 1 for word in words):
+            # A lone one-letter prefix matches most of the catalog; the
+            # name-ordered LIKE scan stops sooner for that case.
+            return ''
+        return ' '.join(f'"{word}"*' for word in words)
+    
+    def _search_fts(self, match_query, limit=None):
         conn = self.db.get_connection()
-        cursor = conn.cursor()
         
-        cursor.execute('''
+        cursor = conn.execute('''
+            SELECT p.id, p.name, p.description, p.category, p.price, p.quantity,
+                   p.min_stock_level, p.supplier, p.created_at, p.updated_at
+            FROM products_fts
+            JOIN products p ON p.id = products_fts.rowid
+            WHERE products_fts MATCH ?
+            ORDER BY products_fts.rank
+            LIMIT ?
+        ''', (match_query, -1 if limit is None else limit))
+        
+        return cursor.fetchall()
+    
+    def _search_like(self, search_term, limit=None):
+        conn = self.db.get_connection()
+        
+        cursor = conn.execute('''
             SELECT id, name, description, category, price, quantity, 
                    min_stock_level, supplier, created_at, updated_at
             FROM products 
             WHERE name LIKE ? OR description LIKE ? OR category LIKE ?
             ORDER BY name
-        ''', (f'%{search_term}%', f'%{search_term}%', f'%{search_term}%'))
+            LIMIT ?
+        ''', (f'%{search_term}%', f'%{search_term}%', f'%{search_term}%',
+              -1 if limit is None else limit))
         
-        products = cursor.fetchall()
-        conn.close()
-        return products
+        return cursor.fetchall()
     
-    def get_low_stock_products(self):
+    INVENTORY_TOTALS_QUERY = '''
+        SELECT COUNT(*),
+               COALESCE(SUM(price * quantity), 0),
+               COALESCE(SUM(quantity > 0 AND quantity <= min_stock_level), 0),
+               COALESCE(SUM(quantity <= 0), 0)
+        FROM products
+    '''
+    
+    def get_inventory_totals(self):
+        """Product count, stock value and low/out-of-stock counts.
+        
+        Read from the trigger-maintained inventory_totals row, so this costs
+        the same for ten products as for a million.
+        """
         conn = self.db.get_connection()
-        cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT id, name, description, category, price, quantity, 
-                   min_stock_level, supplier, created_at, updated_at
-            FROM products 
-            WHERE quantity <= min_stock_level
-            ORDER BY quantity ASC
+        cursor = conn.execute('''
+            SELECT total_products, total_value, low_stock_count, out_of_stock_count
+            FROM inventory_totals WHERE id = 1
         ''')
         
-        products = cursor.fetchall()
-        conn.close()
-        return products
+        return self._totals_dict(cursor.fetchone())
     
-    def update_stock(self, product_id, quantity_change, transaction_type, user_id, notes=""):
+    def compute_inventory_totals(self):
+        """Same figures as get_inventory_totals, aggregated from products"""
         conn = self.db.get_connection()
-        cursor = conn.cursor()
         
-        # Get current quantity
-        cursor.execute('SELECT quantity, price FROM products WHERE id=?', (product_id,))
-        result = cursor.fetchone()
-        if not result:
-            conn.close()
-            return False
+        cursor = conn.execute(self.INVENTORY_TOTALS_QUERY)
+        return self._totals_dict(cursor.fetchone())
+    
+    @retry_on_busy
+    def rebuild_inventory_totals(self):
+        """Recompute inventory_totals from products and return the new totals"""
+        with self.db.transaction(immediate=True) as cursor:
+            cursor.execute('''
+                INSERT OR REPLACE INTO inventory_totals
+                    (id, total_products, total_value, low_stock_count, out_of_stock_count)
+                SELECT 1, * FROM (''' + self.INVENTORY_TOTALS_QUERY + ')')
+        return self.get_inventory_totals()
+    
+    @staticmethod
+    def _totals_dict(row):
+        total_products, total_value, low_stock_count, out_of_stock_count = row
+        return {
+            'total_products': total_products,
+            'total_value': total_value,
+            'low_stock_count': low_stock_count,
+            'out_of_stock_count': out_of_stock_count
+        }
+    
+    # The WHERE clause must match idx_products_low_stock, a partial index
+    # holding only low products, for SQLite to read from it
+    LOW_STOCK_QUERY = '''
+        SELECT id, name, description, category, price, quantity, 
+               min_stock_level, supplier, created_at, updated_at
+        FROM products 
+        WHERE quantity <= min_stock_level
+        ORDER BY quantity ASC
+    '''
+    
+    def get_low_stock_products(self):
+        return self.cache.get_list('low_stock', self._fetch_low_stock_products)
+    
+    def _fetch_low_stock_products(self):
+        conn = self.db.get_connection()
         
-        current_quantity, price = result
-        new_quantity = current_quantity + quantity_change
+        cursor = conn.execute(self.LOW_STOCK_QUERY)
         
-        if new_quantity < 0:
-            conn.close()
-            return False
+        return cursor.fetchall()
+    
+    def iter_low_stock_products(self, batch_size=1000):
+        """Yield low stock products in batches (for exports)"""
+        return self.db.iter_rows(self.LOW_STOCK_QUERY, batch_size=batch_size)
+    
+    def count_low_stock_products(self):
+        conn = self.db.get_connection()
+        
+        cursor = conn.execute('SELECT COUNT(*) FROM products WHERE quantity <= min_stock_level')
+        return cursor.fetchone()[0]
+    
+    def get_stock_alerts_since(self, last_id, limit=None):
+        """Low stock threshold crossings recorded after alert last_id, oldest
+        first: (id, product_id, product name, state, quantity,
+        min_stock_level, created_at), state being 'low', 'out' or 'ok'
+        (back above the minimum). Alerts of deleted products are left out.
+        """
+        conn = self.db.get_connection()
         
-        # Update product quantity
+        cursor = conn.execute('''
+            SELECT a.id, a.product_id, p.name, a.state, a.quantity,
+                   a.min_stock_level, a.created_at
+            FROM stock_alerts a
+            JOIN products p ON p.id = a.product_id
+            WHERE a.id > ?
+            ORDER BY a.id
+            LIMIT ?
+        ''', (last_id, -1 if limit is None else limit))
+        return cursor.fetchall()
+    
+    def get_last_stock_alert_id(self):
+        """Id of the newest stock alert (0 if none), for get_stock_alerts_since"""
+        conn = self.db.get_connection()
+        
+        cursor = conn.execute('SELECT COALESCE(MAX(id), 0) FROM stock_alerts')
+        return cursor.fetchone()[0]
+    
+    @retry_on_busy
+    def update_stock(self, product_id, quantity_change, transaction_type, user_id, notes=""):
+        with self.db.transaction(immediate=True) as cursor:
+            applied = self._apply_stock_change(cursor, product_id, quantity_change,
+                                               transaction_type, user_id, notes)
+        if applied:
+            self.cache.record_write([product_id])
+        return applied
+    
+    def submit_stock_change(self, product_id, quantity_change, transaction_type, user_id, notes=""):
+        """Like update_stock, but return a Future of its result.
+        
+        With STOCK_WRITE_BEHIND the change is queued on the shared
+        StockWriter and committed together with other queued changes;
+        otherwise it is committed right away and the future is already done.
+        """
+        if STOCK_WRITE_BEHIND:
+            writer = StockWriter.for_database(self.db, self._apply_stock_change)
+            return writer.submit(product_id, quantity_change, transaction_type, user_id, notes)
+        
+        future = Future()
+        try:
+            future.set_result(self.update_stock(product_id, quantity_change,
+                                                transaction_type, user_id, notes))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    @retry_on_busy
+    def update_stock_many(self, items):
+        """Apply many stock changes (a basket, a goods receipt) in one transaction.
+        
+        items are (product_id, quantity_change, transaction_type, user_id[, notes])
+        tuples, applied in order. Returns one bool per line; the batch is only
+        committed when every line succeeds, so all(results) tells whether
+        anything was written.
+        """
+        with self.db.transaction(immediate=True) as cursor:
+            results = [self._apply_stock_change(cursor, *item) for item in items]
+            if not all(results):
+                cursor.connection.rollback()
+        if all(results):
+            self.cache.record_write([item[0] for item in items])
+        return results
+    
+    def _apply_stock_change(self, cursor, product_id, quantity_change, transaction_type, user_id, notes=""):
+        # Single conditional update: no read-modify-write window, never below zero
         cursor.execute('''
-            UPDATE products SET quantity=?, updated_at=CURRENT_TIMESTAMP 
-            WHERE id=?
-        ''', (new_quantity, product_id))
+            UPDATE products SET quantity = quantity + ?, updated_at=CURRENT_TIMESTAMP 
+            WHERE id=? AND quantity + ? >= 0
+        ''', (quantity_change, product_id, quantity_change))
+        if cursor.rowcount == 0:
+            return False
         
         # Record transaction
         cursor.execute('''
             INSERT INTO transactions (product_id, transaction_type, quantity, price, user_id, notes)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (product_id, transaction_type, abs(quantity_change), price, user_id, notes))
+            SELECT id, ?, ?, price, ?, ? FROM products WHERE id=?
+        ''', (transaction_type, abs(quantity_change), user_id, notes, product_id))
         
-        conn.commit()
-        conn.close()
         return True
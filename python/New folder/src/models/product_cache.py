@@ -0,0 +1,162 @@
+import os
+import threading
+from collections import OrderedDict
+from ..config import PRODUCT_CACHE_SIZE
+
+
+class ProductCache:
+    """Process-wide LRU cache of product rows, one per database file.
+
+    Holds up to capacity products by id plus a few whole result lists (all
+    products, low stock). Writes made through Product report the ids they
+    changed with record_write(), which drops just those rows. Any other
+    change to products (another process, a bulk import on another thread)
+    is caught by checking PRAGMA data_version and, when it moved, the
+    products change counter; an unexplained change empties the cache.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def for_database(cls, db):
+        key = os.path.abspath(db.db_path)
+        cache = cls._instances.get(key)
+        if cache is None:
+            with cls._instances_lock:
+                cache = cls._instances.setdefault(key, cls(db))
+        return cache
+
+    def __init__(self, db, capacity=PRODUCT_CACHE_SIZE):
+        self.db = db
+        self.capacity = capacity
+
+        self._rows = OrderedDict()
+        self._lists = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation; a fetch that raced one is not stored
+        self._generation = 0
+        # products change counter value the cached rows are known to match
+        self._version = None
+        # data_version last checked on each thread's connection
+        self._seen = threading.local()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, product_id, fetch):
+        """Return the product with product_id, calling fetch(product_id) on a miss"""
+        self._validate()
+        with self._lock:
+            row = self._rows.get(product_id)
+            if row is not None:
+                self._rows.move_to_end(product_id)
+                self.hits += 1
+                return row
+            self.misses += 1
+            generation = self._generation
+
+        row = fetch(product_id)
+        if row is not None:
+            self.put_many([row], generation)
+        return row
+
+    def get_list(self, name, fetch):
+        """Return the cached result list name, calling fetch() on a miss"""
+        self._validate()
+        with self._lock:
+            rows = self._lists.get(name)
+            if rows is not None:
+                self.hits += 1
+                return list(rows)
+            self.misses += 1
+            generation = self._generation
+
+        rows = fetch()
+        with self._lock:
+            if generation == self._generation and len(rows) <= self.capacity:
+                self._lists[name] = list(rows)
+        self.put_many(rows[:self.capacity], generation)
+        return rows
+
+    def put_many(self, rows, generation=None):
+        """Cache product rows just read (e.g. a page shown in a list)"""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            for row in rows:
+                self._rows[row[0]] = row
+                self._rows.move_to_end(row[0])
+            while len(self._rows) > self.capacity:
+                self._rows.popitem(last=False)
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def record_write(self, product_ids=None):
+        """Call after committing a change to products.
+
+        product_ids are the rows the commit changed (one counter bump each);
+        None means unknown, e.g. a bulk import, and drops everything.
+        """
+        data_version = self.db.data_version()
+        version = self._products_version()
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._lists.clear()
+            if (product_ids is None or self._version is None
+                    or version != self._version + len(product_ids)):
+                # Someone else wrote too; we cannot tell which rows changed
+                self._rows.clear()
+            else:
+                for product_id in product_ids:
+                    self._rows.pop(product_id, None)
+            self._version = version
+        self._seen.data_version = data_version
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._rows.clear()
+            self._lists.clear()
+            self._version = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'size': len(self._rows),
+                'capacity': self.capacity
+            }
+
+    def _validate(self):
+        # Writes from other connections move this connection's data_version;
+        # only then is the products counter worth reading.
+        data_version = self.db.data_version()
+        if getattr(self._seen, 'data_version', None) == data_version:
+            return
+        self._seen.data_version = data_version
+
+        version = self._products_version()
+        with self._lock:
+            if version != self._version:
+                self._generation += 1
+                if self._rows or self._lists:
+                    self.invalidations += 1
+                self._rows.clear()
+                self._lists.clear()
+                self._version = version
+
+    def _products_version(self):
+        cursor = self.db.get_connection().execute(
+            "SELECT version FROM change_counters WHERE table_name = 'products'"
+        )
+        return cursor.fetchone()[0]
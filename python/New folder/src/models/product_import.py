@@ -0,0 +1,200 @@
+import csv
+import math
+import os
+import sqlite3
+from .database import Database, retry_on_busy
+from .product_cache import ProductCache
+from ..utils.validators import Validator
+from ..config import DEFAULT_MIN_STOCK_LEVEL
+
+
+class ProductImporter:
+    """Stream products from a CSV file into the products table.
+
+    The file needs a header row naming the product columns (name, price
+    and quantity are required; id, description, category, min_stock_level
+    and supplier are optional). Rows with an id that already exists update
+    that product, all others are inserted. Rows failing validation are
+    reported and skipped without aborting the import.
+    """
+
+    REQUIRED = ('name', 'price', 'quantity')
+    # Largest integer SQLite stores; binding a bigger one raises
+    MAX_INTEGER = 2 ** 63 - 1
+
+    def __init__(self, chunk_size=5000):
+        self.db = Database()
+        self.chunk_size = chunk_size
+
+        conn = self.db.get_connection()
+        self.defer_search_index = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='products_fts_deferred'"
+        ).fetchone() is not None
+
+    def import_file(self, path, progress=None, cancel_event=None):
+        """Import path and return {'imported': n, 'errors': [(line, message)],
+        'cancelled': bool}.
+
+        progress(bytes_read, total_bytes) is called after each chunk, and
+        setting cancel_event stops the import after the current chunk (chunks
+        already written stay committed).
+        """
+        total_bytes = os.path.getsize(path)
+        imported = 0
+        errors = []
+        cancelled = False
+
+        with open(path, newline='', encoding='utf-8-sig') as csvfile:
+            counter = _CountingLines(csvfile)
+            reader = csv.DictReader(counter)
+            header = [name.strip().lower() for name in reader.fieldnames or []]
+            missing = [name for name in self.REQUIRED if name not in header]
+            if missing:
+                raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+            reader.fieldnames = header
+
+            chunk = []
+            lines = []
+            for row in reader:
+                values, error = self.parse_row(row)
+                if error:
+                    errors.append((reader.line_num, error))
+                else:
+                    chunk.append(values)
+                    lines.append(reader.line_num)
+
+                if len(chunk) >= self.chunk_size:
+                    imported += self.write_rows(chunk, lines, errors)
+                    chunk = []
+                    lines = []
+                    if progress:
+                        progress(counter.chars, total_bytes)
+                    if cancel_event is not None and cancel_event.is_set():
+                        cancelled = True
+                        break
+            else:
+                if chunk:
+                    imported += self.write_rows(chunk, lines, errors)
+                if progress:
+                    progress(total_bytes, total_bytes)
+
+        return {'imported': imported, 'errors': errors, 'cancelled': cancelled}
+
+    def parse_row(self, row):
+        """Validate a CSV row; return (values, None) or (None, error message)"""
+        def field(name):
+            return (row.get(name) or '').strip()
+
+        valid, msg = Validator.validate_product_name(field('name'))
+        if not valid:
+            return None, msg
+
+        valid, msg = Validator.validate_price(field('price'))
+        if not valid:
+            return None, msg
+        # float() also takes nan and inf, which the products table cannot hold
+        if not math.isfinite(float(field('price'))):
+            return None, "Price must be a valid number"
+
+        valid, msg = Validator.validate_quantity(field('quantity'))
+        if not valid:
+            return None, msg
+
+        min_stock_level = field('min_stock_level') or str(DEFAULT_MIN_STOCK_LEVEL)
+        valid, msg = Validator.validate_quantity(min_stock_level)
+        if not valid:
+            return None, f"Min stock level: {msg}"
+
+        product_id = field('id')
+        # isdigit() alone also takes digits int() cannot parse, such as '²'
+        if product_id and not (product_id.isascii() and product_id.isdigit()):
+            return None, "ID must be a positive integer"
+
+        numbers = (product_id or '0', field('quantity'), min_stock_level)
+        if any(int(number) > self.MAX_INTEGER for number in numbers):
+            return None, "Number is too large"
+
+        return (
+            int(product_id) if product_id else None,
+            field('name'),
+            field('description'),
+            field('category'),
+            float(field('price')),
+            int(field('quantity')),
+            int(min_stock_level),
+            field('supplier')
+        ), None
+
+    def write_rows(self, chunk, lines, errors):
+        """Write chunk, falling back to one row at a time if a row breaks a
+        constraint; failing rows are added to errors as (line, message) and
+        the number of rows written is returned"""
+        try:
+            return self.write_chunk(chunk)
+        except sqlite3.IntegrityError:
+            pass
+
+        written = 0
+        for values, line in zip(chunk, lines):
+            try:
+                written += self.write_chunk([values])
+            except sqlite3.IntegrityError as e:
+                errors.append((line, f"Rejected by the database: {e}"))
+        return written
+
+    @retry_on_busy
+    def write_chunk(self, chunk):
+        keyed = [values for values in chunk if values[0] is not None]
+        new = [values[1:] for values in chunk if values[0] is None]
+
+        with self.db.transaction(immediate=True) as cursor:
+            if keyed:
+                cursor.executemany('''
+                    INSERT INTO products (id, name, description, category, price, quantity,
+                                          min_stock_level, supplier)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (id) DO UPDATE SET
+                        name=excluded.name, description=excluded.description,
+                        category=excluded.category, price=excluded.price,
+                        quantity=excluded.quantity, min_stock_level=excluded.min_stock_level,
+                        supplier=excluded.supplier, updated_at=CURRENT_TIMESTAMP
+                ''', keyed)
+
+            if new:
+                if self.defer_search_index:
+                    cursor.execute('INSERT INTO products_fts_deferred (flag) VALUES (1)')
+                    cursor.execute('SELECT COALESCE(MAX(id), 0) FROM products')
+                    last_id = cursor.fetchone()[0]
+
+                cursor.executemany('''
+                    INSERT INTO products (name, description, category, price, quantity,
+                                          min_stock_level, supplier)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', new)
+
+                if self.defer_search_index:
+                    # New ids are all above the previous maximum (AUTOINCREMENT)
+                    cursor.execute('''
+                        INSERT INTO products_fts (rowid, name, description, category)
+                        SELECT id, name, description, category FROM products WHERE id > ?
+                    ''', (last_id,))
+                    cursor.execute('DELETE FROM products_fts_deferred')
+
+        ProductCache.for_database(self.db).record_write()
+        return len(chunk)
+
+
+class _CountingLines:
+    """Line iterator that counts characters read, for progress reporting"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.chars = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self.lines)
+        self.chars += len(line)
+        return line
@@ -0,0 +1,320 @@
+import bisect
+import contextlib
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from ..config import (QUERY_TRACE_LOG, SLOW_QUERY_MS, SLOW_QUERY_LOG, QUERY_STATS_FILE,
+                      QUERY_TRACE_RECENT)
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is open)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Spelled like __file__ (not made absolute) so they compare equal to the
+# co_filename of frames in these modules, whatever sys.path entry they came from
+MODELS_DIRECTORY = os.path.dirname(__file__)
+# Frames in these files are plumbing, not the method that asked for the SQL
+PLUMBING = {os.path.join(MODELS_DIRECTORY, name) for name in ('database.py', 'query_trace.py')}
+PLUMBING.add(contextlib.__file__)
+
+
+class QueryTracer:
+    """Records every statement run on a traced connection.
+
+    Each statement is logged with the shape of its parameters, its duration
+    (execute plus fetching its rows, plus COMMIT for the commit itself) and
+    the model method that ran it. Statements slower than SLOW_QUERY_MS also
+    go to the slow query log with their EXPLAIN QUERY PLAN and how many
+    trigger programs SQLite ran for them. Durations are kept as per-method
+    histograms; dump() writes them out.
+
+    Connections are only traced when QUERY_TRACE_ENABLED is set, so with it
+    off the models talk to plain sqlite3 connections.
+    """
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self.recent = deque(maxlen=QUERY_TRACE_RECENT)
+        # method -> [count, total ms, max ms, bucket counts]
+        self.histograms = {}
+        self._lock = threading.Lock()
+        # Statement being executed on each thread, for the trace callback
+        self._local = threading.local()
+
+        self.log = _file_logger('inventory.queries', QUERY_TRACE_LOG)
+        self.slow_log = _file_logger('inventory.queries.slow', SLOW_QUERY_LOG)
+
+    def begin(self, conn, sql, parameters, many=False):
+        if getattr(self._local, 'explaining', False):
+            return None
+        record = _Statement(conn, sql, parameters, many, _calling_method())
+        self._local.current = record
+        return record
+
+    def on_trace(self, sql):
+        """sqlite3 trace callback, called for every program SQLite starts:
+        the statement, each trigger it fires (reported with the statement's
+        own text) and the implicit BEGIN sqlite3 issues before a write"""
+        record = getattr(self._local, 'current', None)
+        if record is None:
+            return
+        if sql.startswith('BEGIN'):
+            record.opened_transaction = True
+        else:
+            record.programs += 1
+
+    def executed(self):
+        self._local.current = None
+
+    def finish(self, record):
+        elapsed_ms = record.elapsed * 1000
+        entry = (datetime.now().isoformat(timespec='milliseconds'), record.method,
+                 elapsed_ms, record.sql, record.shape)
+        with self._lock:
+            self.recent.append(entry)
+            histogram = self.histograms.get(record.method)
+            if histogram is None:
+                histogram = self.histograms[record.method] = [0, 0.0, 0.0, [0] * (len(BUCKETS_MS) + 1)]
+            histogram[0] += 1
+            histogram[1] += elapsed_ms
+            histogram[2] = max(histogram[2], elapsed_ms)
+            histogram[3][bisect.bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+
+        self.log.debug('%.3f ms %s %s %s', elapsed_ms, record.method, record.sql, record.shape)
+        if elapsed_ms >= self.slow_ms:
+            self.slow_log.warning('%.3f ms in %s\n  %s\n  parameters: %s%s\n  plan:\n%s',
+                                  elapsed_ms, record.method, record.sql, record.shape,
+                                  self._details(record), self._plan(record))
+
+    @staticmethod
+    def _details(record):
+        details = ''
+        if record.programs > 1:
+            # SQLite reports several programs per trigger that fired (its
+            # statements included), so this is a cost, not a trigger count
+            details += f', trigger programs: {record.programs - 1}'
+        if record.opened_transaction:
+            details += ', began a transaction'
+        return details
+
+    def _plan(self, record):
+        if record.parameters is None or not record.sql.lstrip()[:6].upper() in (
+                'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLAC'):
+            return '    (none)'
+        self._local.explaining = True
+        try:
+            rows = record.conn.execute('EXPLAIN QUERY PLAN ' + record.sql, record.parameters).fetchall()
+            return '\n'.join(f'    {row[0]:>3} {row[1]:>3} {row[3]}' for row in rows)
+        except sqlite3.Error as e:
+            return f'    (unavailable: {e})'
+        finally:
+            self._local.explaining = False
+
+    def stats(self):
+        """{method: {'count', 'total_ms', 'max_ms', 'buckets': {bound: count}}}"""
+        with self._lock:
+            return {
+                method: {
+                    'count': count,
+                    'total_ms': total,
+                    'max_ms': longest,
+                    'buckets': dict(zip([f'<={bound}ms' for bound in BUCKETS_MS] + ['slower'], buckets))
+                }
+                for method, (count, total, longest, buckets) in self.histograms.items()
+            }
+
+    def dump(self, path=QUERY_STATS_FILE):
+        """Write the per-method histograms to path and return the path"""
+        stats = self.stats()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(f"Query statistics at {datetime.now().isoformat(timespec='seconds')}\n\n")
+            for method, data in sorted(stats.items(), key=lambda item: -item[1]['total_ms']):
+                f.write(f"{method}: {data['count']} statements, "
+                        f"{data['total_ms']:.1f} ms total, "
+                        f"{data['total_ms'] / data['count']:.3f} ms mean, "
+                        f"{data['max_ms']:.3f} ms max\n")
+                f.write('  ' + '  '.join(f'{bound} {count}' for bound, count in data['buckets'].items()
+                                         if count) + '\n')
+        return path
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.recent.clear()
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose cursors report to the tracer, and whose commits are
+    timed too"""
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or TracedCursor)
+
+    # The C implementations of these make a plain cursor, not self.cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        if not self.in_transaction:
+            return super().commit()
+        record = tracer.begin(self, 'COMMIT', None)
+        began = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            if record is not None:
+                record.elapsed = time.perf_counter() - began
+                tracer.executed()
+                tracer.finish(record)
+
+
+class TracedCursor(sqlite3.Cursor):
+    _record = None
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters, False)
+
+    def executemany(self, sql, seq_of_parameters):
+        # Materialize generators so the row count and first row are known
+        seq_of_parameters = list(seq_of_parameters)
+        return self._run(super().executemany, sql, seq_of_parameters, True)
+
+    def executescript(self, sql_script):
+        return self._run(lambda sql, _: super(TracedCursor, self).executescript(sql), sql_script,
+                         None, False)
+
+    def _run(self, method, sql, parameters, many):
+        self._finish()
+        record = tracer.begin(self.connection, sql, parameters, many)
+        began = time.perf_counter()
+        try:
+            method(sql, parameters)
+        finally:
+            if record is not None:
+                record.elapsed += time.perf_counter() - began
+                tracer.executed()
+        self._record = record
+        if self.description is None:
+            # Nothing to fetch: the statement is done
+            self._finish()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            return self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+    def _timed(self, method, *args):
+        record = self._record
+        if record is None:
+            return method(*args)
+        began = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            record.elapsed += time.perf_counter() - began
+
+    def _finish(self):
+        record, self._record = self._record, None
+        if record is not None:
+            tracer.finish(record)
+
+
+class _Statement:
+    __slots__ = ('conn', 'sql', 'parameters', 'shape', 'method', 'elapsed', 'programs',
+                 'opened_transaction')
+
+    def __init__(self, conn, sql, parameters, many, method):
+        self.conn = conn
+        self.sql = ' '.join(sql.split())
+        if many:
+            self.shape = f'{len(parameters)} x {_shape(parameters[0] if parameters else ())}'
+            parameters = parameters[0] if parameters else None
+        else:
+            self.shape = _shape(parameters)
+        self.parameters = parameters
+        self.method = method
+        self.elapsed = 0.0
+        self.programs = 0
+        self.opened_transaction = False
+
+
+def _shape(parameters):
+    """Types of the parameters, never their values (they may be passwords)"""
+    if parameters is None:
+        return '-'
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{key}: {type(value).__name__}' for key, value in parameters.items()) + '}'
+    return '(' + ', '.join(type(value).__name__ for value in parameters) + ')'
+
+
+def _calling_method():
+    """'Class.method' (or 'module.function') of the first caller outside
+    the connection plumbing"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename not in PLUMBING:
+            owner = frame.f_locals.get('self')
+            name = frame.f_code.co_name
+            if owner is not None:
+                return f'{type(owner).__name__}.{name}'
+            module = os.path.splitext(os.path.basename(filename))[0]
+            return f'{module}.{name}'
+        frame = frame.f_back
+    return '?'
+
+
+def _file_logger(name, path):
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    if path and not logger.handlers:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = logging.FileHandler(path, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+    return logger
+
+
+tracer = QueryTracer()
@@ -0,0 +1,139 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from .database import Database, retry_on_busy
+from .product_cache import ProductCache
+from ..config import STOCK_WRITER_MAX_BATCH, STOCK_WRITER_MAX_LATENCY_MS, STOCK_WRITER_SYNCHRONOUS
+
+
+class StockWriter:
+    """Single writer thread that commits queued stock changes in groups.
+
+    submit() queues one change and returns a Future. The writer takes the
+    first queued change, keeps collecting for up to max_latency_ms or until
+    max_batch changes are waiting, and applies them all in one transaction,
+    so a burst of sales pays for one commit (and one fsync) instead of one
+    each. The writer's connection runs with STOCK_WRITER_SYNCHRONOUS, and
+    each future resolves to True/False (applied or refused for lack of
+    stock) only after its group has committed, or to the exception that
+    stopped it.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def for_database(cls, db, apply_change):
+        key = os.path.abspath(db.db_path)
+        with cls._instances_lock:
+            writer = cls._instances.get(key)
+            if writer is None or writer.closed:
+                writer = cls._instances[key] = cls(db, apply_change)
+        return writer
+
+    @classmethod
+    def close_all(cls):
+        """Commit whatever is queued and stop every writer (called at shutdown)"""
+        with cls._instances_lock:
+            writers = list(cls._instances.values())
+            cls._instances.clear()
+        for writer in writers:
+            writer.close()
+
+    def __init__(self, db, apply_change, max_batch=STOCK_WRITER_MAX_BATCH,
+                 max_latency_ms=STOCK_WRITER_MAX_LATENCY_MS):
+        """apply_change(cursor, product_id, quantity_change, transaction_type,
+        user_id, notes) makes one change inside the open transaction and
+        returns whether it was applied (see Product._apply_stock_change)"""
+        self.db = db
+        self.apply_change = apply_change
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000
+        self.closed = False
+
+        self.batches = 0
+        self.changes = 0
+
+        self._queue = queue.Queue()
+        self._cache = ProductCache.for_database(db)
+        self._thread = threading.Thread(target=self._run, name='stock-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, product_id, quantity_change, transaction_type, user_id, notes=""):
+        """Queue a stock change; the returned Future resolves once it is committed"""
+        if self.closed:
+            raise RuntimeError("Stock writer is closed")
+        future = Future()
+        self._queue.put((future, (product_id, quantity_change, transaction_type, user_id, notes)))
+        return future
+
+    def close(self, timeout=None):
+        """Stop accepting changes, commit the queued ones and stop the thread"""
+        if not self.closed:
+            self.closed = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'changes': self.changes,
+            'average_batch': self.changes / self.batches if self.batches else 0.0
+        }
+
+    def _run(self):
+        self.db.get_connection().execute(f'PRAGMA synchronous = {STOCK_WRITER_SYNCHRONOUS}')
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_latency
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._write([entry for entry in batch if entry[0].set_running_or_notify_cancel()])
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            results = self._commit([change for _, change in batch])
+        except Exception:
+            # One bad change must not fail the rest: commit them one by one
+            for future, change in batch:
+                try:
+                    self._finish([(future, change)], self._commit([change]))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        self._finish(batch, results)
+
+    @retry_on_busy
+    def _commit(self, changes):
+        with self.db.transaction(immediate=True) as cursor:
+            return [self.apply_change(cursor, *change) for change in changes]
+
+    def _finish(self, batch, results):
+        self.batches += 1
+        self.changes += len(batch)
+        applied = [change[0] for (_, change), result in zip(batch, results) if result]
+        if applied:
+            self._cache.record_write(applied)
+        for (future, _), result in zip(batch, results):
+            future.set_result(result)
+
+
+atexit.register(StockWriter.close_all)
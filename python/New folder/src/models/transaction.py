@@ -1,48 +1,216 @@
-from .database import Database
+from datetime import datetime
+from .database import Database, retry_on_busy
+from .archive import TransactionArchive
 
 class Transaction:
     def __init__(self):
         self.db = Database()
+        self.archive = TransactionArchive(self.db)
     
     def get_all_transactions(self):
+        """Every transaction, newest first, archived years included"""
+        return self._all_history()
+    
+    HISTORY_QUERY = '''
+        SELECT t.id, p.name, t.transaction_type, t.quantity, t.price, 
+               u.username, t.notes, t.created_at
+        FROM {transactions}
+        JOIN products p ON t.product_id = p.id
+        JOIN users u ON t.user_id = u.id
+        WHERE 1 = 1
+    '''
+    
+    def get_transactions_page(self, after=None, before=None, limit=100, product_id=None,
+                              user_id=None, transaction_type=None, start_date=None,
+                              end_date=None):
+        """Return up to limit transactions, newest first.
+        
+        Pages are keyset-paged on (created_at, id): after/before are the
+        page_key of an already loaded row and the page continues with older
+        (or newer) rows. Optional filters narrow the history to one product,
+        user or transaction type, and to created_at >= start_date and
+        < end_date.
+        """
+        filters = (product_id, user_id, transaction_type, start_date, end_date)
+        rows = self._history_page('transactions t', after, before, limit, filters)
+        
+        # Archived rows are all older than newest_archived, so most pages
+        # never need to open an archive
+        newest = self.archive.newest_archived()
+        if newest is None or (start_date is not None and start_date > newest):
+            return rows
+        if before is None and len(rows) == limit and rows[-1][7] > newest:
+            return rows
+        if before is not None and before[0] > newest:
+            return rows
+        
+        years = self.archive.years(start_date, end_date)
+        if after is not None:
+            years = [year for year in years if year <= int(after[0][:4])]
+        if before is not None:
+            years = [year for year in years if year >= int(before[0][:4])]
+        if not years:
+            return rows
+        
+        for year in years:
+            schema = self.archive.attach(year)
+            rows += self._history_page(f'{schema}.transactions t', after, before, limit, filters)
+        rows.sort(key=self.page_key, reverse=True)
+        return rows[-limit:] if before is not None else rows[:limit]
+    
+    def _history_page(self, transactions, after, before, limit, filters):
         conn = self.db.get_connection()
-        cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT t.id, p.name, t.transaction_type, t.quantity, t.price, 
-                   u.username, t.notes, t.created_at
-            FROM transactions t
-            JOIN products p ON t.product_id = p.id
-            JOIN users u ON t.user_id = u.id
-            ORDER BY t.created_at DESC
-        ''')
+        query, params = self._history_query(*filters, transactions)
+        
+        if before is not None:
+            query += '''
+                AND (t.created_at, t.id) > (?, ?)
+                ORDER BY t.created_at, t.id LIMIT ?
+            '''
+            cursor = conn.execute(query, params + [before[0], before[1], limit])
+            return cursor.fetchall()[::-1]
+        
+        if after is not None:
+            query += ' AND (t.created_at, t.id) < (?, ?)'
+            params += [after[0], after[1]]
+        query += ' ORDER BY t.created_at DESC, t.id DESC LIMIT ?'
+        
+        cursor = conn.execute(query, params + [limit])
+        return cursor.fetchall()
+    
+    @staticmethod
+    def page_key(transaction):
+        """Keyset position of a history row for get_transactions_page"""
+        return (transaction[7], transaction[0])
+    
+    def get_last_id(self):
+        """Id of the newest transaction (0 if there are none), for get_since"""
+        conn = self.db.get_connection()
         
-        transactions = cursor.fetchall()
-        conn.close()
-        return transactions
+        cursor = conn.execute('SELECT COALESCE(MAX(id), 0) FROM transactions')
+        return cursor.fetchone()[0]
+    
+    def get_since(self, last_id, until_id=None, product_id=None, user_id=None,
+                  transaction_type=None, start_date=None, end_date=None):
+        """Return history rows with id > last_id (and <= until_id), oldest first.
+        
+        Ids only grow, so last_id works as a watermark: this is a rowid range
+        read whose cost depends on the number of new rows, not on the size of
+        the table. Takes the same filters as get_transactions_page.
+        """
+        conn = self.db.get_connection()
+        
+        # NOT INDEXED keeps SQLite on the rowid range even when a filter
+        # column has an index (which would read all of that product's rows)
+        query, params = self._history_query(product_id, user_id, transaction_type,
+                                            start_date, end_date,
+                                            'transactions t NOT INDEXED')
+        query += ' AND t.id > ?'
+        params.append(last_id)
+        if until_id is not None:
+            query += ' AND t.id <= ?'
+            params.append(until_id)
+        query += ' ORDER BY t.id'
+        
+        cursor = conn.execute(query, params)
+        return cursor.fetchall()
+    
+    def _history_query(self, product_id, user_id, transaction_type, start_date, end_date,
+                       transactions='transactions t'):
+        query = self.HISTORY_QUERY.format(transactions=transactions)
+        params = []
+        for condition, value in (('t.product_id = ?', product_id),
+                                 ('t.user_id = ?', user_id),
+                                 ('t.transaction_type = ?', transaction_type),
+                                 ('t.created_at >= ?', start_date),
+                                 ('t.created_at < ?', end_date)):
+            if value is not None:
+                query += ' AND ' + condition
+                params.append(value)
+        return query, params
     
     def get_transactions_by_product(self, product_id):
+        return self._all_history(product_id)
+    
+    def _all_history(self, product_id=None):
         conn = self.db.get_connection()
-        cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT t.id, p.name, t.transaction_type, t.quantity, t.price, 
-                   u.username, t.notes, t.created_at
-            FROM transactions t
-            JOIN products p ON t.product_id = p.id
-            JOIN users u ON t.user_id = u.id
-            WHERE t.product_id = ?
-            ORDER BY t.created_at DESC
-        ''', (product_id,))
+        query, params = self._history_query(product_id, None, None, None, None)
+        rows = conn.execute(query + ' ORDER BY t.created_at DESC', params).fetchall()
         
-        transactions = cursor.fetchall()
-        conn.close()
-        return transactions
+        years = self.archive.years()
+        for year in years:
+            query, params = self._history_query(product_id, None, None, None, None,
+                                                f'{self.archive.attach(year)}.transactions t')
+            rows += conn.execute(query, params).fetchall()
+        if years:
+            rows.sort(key=lambda row: row[7] or '', reverse=True)
+        return rows
     
     def get_sales_summary(self, start_date=None, end_date=None):
+        if self._needs_archives(start_date, end_date):
+            return self._archived_sales_summary(start_date, end_date)
+        
         conn = self.db.get_connection()
-        cursor = conn.cursor()
         
+        query, params = self._sales_summary_query(start_date, end_date)
+        cursor = conn.execute(query, params)
+        return cursor.fetchall()
+    
+    def iter_sales_summary(self, start_date=None, end_date=None, batch_size=1000):
+        """Yield the sales summary in batches (for exports)"""
+        if self._needs_archives(start_date, end_date):
+            summary = self._archived_sales_summary(start_date, end_date)
+            return (summary[i:i + batch_size] for i in range(0, len(summary), batch_size))
+        
+        query, params = self._sales_summary_query(start_date, end_date)
+        return self.db.iter_rows(query, params, batch_size)
+    
+    def _sales_summary_query(self, start_date, end_date):
+        """Whole-day ranges are answered from the daily_sales rollup"""
+        if self._is_day(start_date) and self._is_day(end_date):
+            return self._rollup_sales_summary_query(start_date, end_date)
+        return self._raw_sales_summary_query(start_date, end_date)
+    
+    @staticmethod
+    def _is_day(value):
+        if not value:
+            return True
+        try:
+            datetime.strptime(value, '%Y-%m-%d')
+            return True
+        except (TypeError, ValueError):
+            return False
+    
+    def _rollup_sales_summary_query(self, start_date, end_date):
+        # Same bounds as the raw query: created_at >= 'YYYY-MM-DD' includes that
+        # day, created_at <= 'YYYY-MM-DD' stops before it.
+        query = '''
+            SELECT p.name, SUM(d.quantity) as total_sold, 
+                   SUM(d.revenue) as total_revenue
+            FROM daily_sales d
+            JOIN products p ON d.product_id = p.id
+            WHERE 1 = 1
+        '''
+        
+        params = []
+        if start_date:
+            query += ' AND d.day >= ?'
+            params.append(start_date)
+        if end_date:
+            query += ' AND d.day < ?'
+            params.append(end_date)
+        
+        query += '''
+            GROUP BY p.id, p.name
+            HAVING SUM(d.quantity) != 0 OR SUM(d.revenue) != 0
+            ORDER BY total_revenue DESC
+        '''
+        
+        return query, params
+    
+    def _raw_sales_summary_query(self, start_date, end_date):
         query = '''
             SELECT p.name, SUM(t.quantity) as total_sold, 
                    SUM(t.quantity * t.price) as total_revenue
@@ -61,7 +229,128 @@ class Transaction:
         
         query += ' GROUP BY p.id, p.name ORDER BY total_revenue DESC'
         
-        cursor.execute(query, params)
-        summary = cursor.fetchall()
-        conn.close()
+        return query, params
+    
+    def _needs_archives(self, start_date, end_date):
+        # Only timestamp ranges read raw transactions; whole days (and All
+        # Time) come from daily_sales, which still counts archived sales
+        if self._is_day(start_date) and self._is_day(end_date):
+            return False
+        newest = self.archive.newest_archived()
+        return newest is not None and (not start_date or start_date <= newest)
+    
+    def _archived_sales_summary(self, start_date, end_date):
+        """The raw sales summary over the working database and the archives"""
+        conn = self.db.get_connection()
+        
+        # Attach each year right before reading it: attach() detaches the
+        # oldest archive once MAX_ATTACHED are open
+        sources = [None] + self.archive.years(start_date, end_date)
+        totals = {}
+        for year in sources:
+            schema = 'main' if year is None else self.archive.attach(year)
+            query = f'''
+                SELECT product_id, SUM(quantity), SUM(quantity * price)
+                FROM {schema}.transactions
+                WHERE transaction_type = 'sale'
+            '''
+            params = []
+            if start_date:
+                query += ' AND created_at >= ?'
+                params.append(start_date)
+            if end_date:
+                query += ' AND created_at <= ?'
+                params.append(end_date)
+            query += ' GROUP BY product_id'
+            
+            for product_id, quantity, revenue in conn.execute(query, params):
+                sold, earned = totals.get(product_id, (0, 0))
+                totals[product_id] = (sold + quantity, earned + (revenue or 0))
+        
+        names = {}
+        product_ids = [product_id for product_id in totals if product_id is not None]
+        for start in range(0, len(product_ids), 500):
+            chunk = product_ids[start:start + 500]
+            names.update(conn.execute(
+                f"SELECT id, name FROM products WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall())
+        
+        summary = [(names[product_id], sold, earned)
+                   for product_id, (sold, earned) in totals.items() if product_id in names]
+        summary.sort(key=lambda row: row[2], reverse=True)
         return summary
+    
+    def _archived_daily_sales(self):
+        """daily_sales rows (day, product_id, quantity, revenue) for archived sales"""
+        conn = self.db.get_connection()
+        
+        rows = []
+        for year in self.archive.years():
+            schema = self.archive.attach(year)
+            rows += conn.execute(f'''
+                SELECT date(created_at), product_id, SUM(quantity),
+                       SUM(quantity * COALESCE(price, 0))
+                FROM {schema}.transactions
+                WHERE transaction_type = 'sale' AND product_id IS NOT NULL
+                GROUP BY date(created_at), product_id
+            ''').fetchall()
+        return rows
+    
+    @retry_on_busy
+    def rebuild_sales_rollup(self):
+        """Regenerate daily_sales from the raw sale transactions, archived
+        ones included"""
+        archived = self._archived_daily_sales()
+        
+        with self.db.transaction(immediate=True) as cursor:
+            cursor.execute('DELETE FROM daily_sales')
+            cursor.execute('''
+                INSERT INTO daily_sales (day, product_id, quantity, revenue)
+                SELECT date(created_at), product_id, SUM(quantity),
+                       SUM(quantity * COALESCE(price, 0))
+                FROM transactions
+                WHERE transaction_type = 'sale' AND product_id IS NOT NULL
+                GROUP BY date(created_at), product_id
+            ''')
+            cursor.executemany('''
+                INSERT INTO daily_sales (day, product_id, quantity, revenue)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (day, product_id) DO UPDATE SET
+                    quantity = quantity + excluded.quantity,
+                    revenue = revenue + excluded.revenue
+            ''', archived)
+            
+            cursor.execute('SELECT COUNT(*) FROM daily_sales')
+            return cursor.fetchone()[0]
+    
+    def check_sales_rollup(self):
+        """Compare per-product totals in daily_sales with the raw transactions.
+        
+        Returns a list of (product_id, (rollup quantity, revenue),
+        (raw quantity, revenue)) for every product that disagrees.
+        """
+        conn = self.db.get_connection()
+        
+        rollup = {row[0]: row[1:] for row in conn.execute('''
+            SELECT product_id, SUM(quantity), SUM(revenue)
+            FROM daily_sales GROUP BY product_id
+        ''')}
+        raw = {row[0]: row[1:] for row in conn.execute('''
+            SELECT product_id, SUM(quantity), SUM(quantity * COALESCE(price, 0))
+            FROM transactions
+            WHERE transaction_type = 'sale' AND product_id IS NOT NULL
+            GROUP BY product_id
+        ''')}
+        for day, product_id, quantity, revenue in self._archived_daily_sales():
+            sold, earned = raw.get(product_id, (0, 0.0))
+            raw[product_id] = (sold + quantity, earned + revenue)
+        
+        mismatches = []
+        for product_id in rollup.keys() | raw.keys():
+            rollup_totals = rollup.get(product_id, (0, 0.0))
+            raw_totals = raw.get(product_id, (0, 0.0))
+            if (rollup_totals[0] != raw_totals[0]
+                    or abs(rollup_totals[1] - raw_totals[1]) > 0.005):
+                mismatches.append((product_id, rollup_totals, raw_totals))
+        return mismatches
@@ -1,57 +1,75 @@
-import hashlib
-from .database import Database
+from .database import Database, retry_on_busy
+from ..utils.passwords import hash_password, verify_password, needs_rehash
 import sqlite3
 
 
 class User:
+    # Hash checked for unknown usernames, so they take as long as a wrong password
+    _unknown_user_hash = None
+    
     def __init__(self):
         self.db = Database()
     
     def authenticate(self, username, password):
+        """Return the user dict if the password matches, else None.
+        
+        Verifying costs one key derivation (see config.py), so interactive
+        callers should run this off the UI thread. A hash in an outdated
+        format or cost is replaced with a current one on success.
+        """
         conn = self.db.get_connection()
-        cursor = conn.cursor()
         
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
-        cursor.execute('''
-            SELECT id, username, role FROM users 
-            WHERE username = ? AND password_hash = ?
-        ''', (username, password_hash))
+        cursor = conn.execute('''
+            SELECT id, username, role, password_hash FROM users 
+            WHERE username = ?
+        ''', (username,))
         
         user = cursor.fetchone()
-        conn.close()
-        
-        if user:
-            return {
-                'id': user[0],
-                'username': user[1],
-                'role': user[2]
-            }
-        return None
-    
-    def create_user(self, username, password, role='user'):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        cursor.close()
+        
+        if user is None:
+            if User._unknown_user_hash is None:
+                User._unknown_user_hash = hash_password('unknown user')
+            verify_password(password, User._unknown_user_hash)
+            return None
         
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
+        if not verify_password(password, user[3]):
+            return None
         
+        if needs_rehash(user[3]):
+            self._replace_hash(user[0], user[3], hash_password(password))
+        
+        return {
+            'id': user[0],
+            'username': user[1],
+            'role': user[2]
+        }
+    
+    @retry_on_busy
+    def _replace_hash(self, user_id, old_hash, new_hash):
+        # Only if nobody changed the password since it was read
+        with self.db.transaction() as cursor:
+            cursor.execute('UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?',
+                           (new_hash, user_id, old_hash))
+    
+    def create_user(self, username, password, role='user'):
+        # Hash before taking the write lock; it is the slow part
+        return self._insert_user(username, hash_password(password), role)
+    
+    @retry_on_busy
+    def _insert_user(self, username, password_hash, role):
         try:
-            cursor.execute('''
-                INSERT INTO users (username, password_hash, role)
-                VALUES (?, ?, ?)
-            ''', (username, password_hash, role))
-            conn.commit()
+            with self.db.transaction() as cursor:
+                cursor.execute('''
+                    INSERT INTO users (username, password_hash, role)
+                    VALUES (?, ?, ?)
+                ''', (username, password_hash, role))
             return True
         except sqlite3.IntegrityError:
             return False
-        finally:
-            conn.close()
     
     def get_all_users(self):
         conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT id, username, role, created_at FROM users')
-        users = cursor.fetchall()
-        conn.close()
         
-        return users
+        cursor = conn.execute('SELECT id, username, role, created_at FROM users')
+        return cursor.fetchall()
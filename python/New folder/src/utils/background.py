@@ -0,0 +1,180 @@
+import queue
+import threading
+from ..models.database import Database
+
+
+class DebouncedQuery:
+    """Run a query on a worker thread once input has settled.
+
+    submit() restarts the debounce window; when it expires the newest
+    arguments go to a single worker thread. Any submit() or cancel() made
+    meanwhile supersedes that request, so its result is dropped and only the
+    latest one reaches on_result, on the Tk thread via after().
+    """
+
+    POLL_INTERVAL_MS = 20
+
+    def __init__(self, widget, query, on_result, delay_ms=250, on_error=None):
+        self.widget = widget
+        self.query = query
+        self.on_result = on_result
+        self.on_error = on_error
+        self.delay_ms = delay_ms
+
+        self._generation = 0
+        self._dispatched = None
+        self._pending = None
+        self._polling = None
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, *args):
+        """Schedule query(*args) after the debounce window"""
+        self._generation += 1
+        self._cancel_pending()
+        self._pending = self.widget.after(self.delay_ms, self._dispatch,
+                                          self._generation, args)
+
+    def submit_now(self, *args):
+        """Run query(*args) without waiting for the debounce window"""
+        self._generation += 1
+        self._cancel_pending()
+        self._dispatch(self._generation, args)
+
+    def cancel(self):
+        """Drop the pending request and any result still in flight"""
+        self._generation += 1
+        self._cancel_pending()
+
+    def close(self):
+        self.cancel()
+        if self._polling is not None:
+            self.widget.after_cancel(self._polling)
+            self._polling = None
+        self._requests.put(None)
+
+    def _cancel_pending(self):
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+
+    def _dispatch(self, generation, args):
+        self._pending = None
+        self._dispatched = generation
+        self._requests.put((generation, args))
+        if self._polling is None:
+            self._poll()
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+
+            # Skip straight to the newest request queued while we were busy
+            while request is not None:
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+            if request is None:
+                return
+
+            generation, args = request
+            if generation != self._generation:
+                continue
+
+            try:
+                self._results.put((generation, self.query(*args), None))
+            except Exception as e:
+                self._results.put((generation, None, e))
+
+    def _poll(self):
+        """Apply the newest finished result; keep polling while one is due"""
+        latest = None
+        while True:
+            try:
+                latest = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+        if latest is not None:
+            generation, result, error = latest
+            if generation == self._generation:
+                self._polling = None
+                if error is None:
+                    self.on_result(result)
+                elif self.on_error is not None:
+                    self.on_error(error)
+                return
+
+        if self._dispatched != self._generation:
+            # Cancelled, or still debouncing; _dispatch restarts polling
+            self._polling = None
+            return
+        self._polling = self.widget.after(self.POLL_INTERVAL_MS, self._poll)
+
+
+class BackgroundTask:
+    """Run a long job on a worker thread and report back on the Tk thread.
+
+    work(progress, cancel_event) runs on the thread. It may call
+    progress(done, total) as often as it likes (only the latest value is
+    shown) and should stop early once cancel_event is set. Its return value
+    goes to on_done and any exception to on_error, both via after().
+    """
+
+    POLL_INTERVAL_MS = 50
+
+    def __init__(self, widget, work, on_done, on_progress=None, on_error=None):
+        self.widget = widget
+        self.work = work
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.on_error = on_error
+
+        self.cancel_event = threading.Event()
+        self._progress = None
+        self._outcome = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self.widget.after(self.POLL_INTERVAL_MS, self._poll)
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def _report(self, done, total):
+        # A single slot is enough: the UI only needs the newest value
+        self._progress = (done, total)
+
+    def _run(self):
+        try:
+            self._outcome = (self.work(self._report, self.cancel_event), None)
+        except Exception as e:
+            self._outcome = (None, e)
+        finally:
+            # The thread ends here; do not leave its connection open until exit
+            Database.close_thread()
+
+    def _poll(self):
+        progress, self._progress = self._progress, None
+        if progress is not None and self.on_progress is not None:
+            self.on_progress(*progress)
+
+        if self._outcome is None:
+            self.widget.after(self.POLL_INTERVAL_MS, self._poll)
+            return
+
+        result, error = self._outcome
+        if error is None:
+            self.on_done(result)
+        elif self.on_error is not None:
+            self.on_error(error)
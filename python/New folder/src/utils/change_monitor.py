@@ -0,0 +1,96 @@
+from ..models.database import Database
+
+
+class ChangeMonitor:
+    """Tell views which tables changed, so they refresh only when needed.
+
+    Views subscribe(tables, callback). check() compares the per-table change
+    counters with the last ones seen and calls the callbacks of every
+    subscription whose tables changed; call it after a local write. Writes
+    from other threads or processes are picked up by polling PRAGMA
+    data_version every interval_ms, which costs one pragma while idle.
+
+    A subscription tied to a widget that is not on screen (e.g. a notebook
+    tab in the background) is held back until the widget is next shown, so
+    hidden tabs refresh once when shown instead of on every change.
+    """
+
+    def __init__(self, widget, interval_ms=1000, db=None):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self.db = db or Database()
+
+        # (tables, callback, widget) subscriptions
+        self._subscriptions = []
+        # widget -> callbacks waiting for it to be shown
+        self._deferred = {}
+        self._watched = set()
+        self._versions = self.db.table_versions()
+        self._data_version = self.db.data_version()
+        self._polling = None
+
+    def subscribe(self, tables, callback, widget=None):
+        """Call callback() whenever one of tables changes"""
+        self._subscriptions.append((frozenset(tables), callback, widget))
+        if widget is not None and widget not in self._deferred:
+            self._deferred[widget] = []
+            self._watch(widget)
+
+    def unsubscribe(self, callback):
+        self._subscriptions = [s for s in self._subscriptions if s[1] != callback]
+        for callbacks in self._deferred.values():
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def check(self):
+        """Notify subscribers of tables changed since the last check and
+        return the set of changed table names"""
+        self._data_version = self.db.data_version()
+        versions = self.db.table_versions()
+        changed = {table for table, version in versions.items()
+                   if version != self._versions.get(table)}
+        self._versions = versions
+        if not changed:
+            return changed
+
+        for tables, callback, widget in list(self._subscriptions):
+            if not tables & changed:
+                continue
+            if widget is None or widget.winfo_viewable():
+                callback()
+            elif callback not in self._deferred[widget]:
+                self._deferred[widget].append(callback)
+        return changed
+
+    def start(self):
+        """Start polling for writes made by other connections"""
+        if self._polling is None:
+            self._polling = self.widget.after(self.interval_ms, self._poll)
+
+    def stop(self):
+        if self._polling is not None:
+            self.widget.after_cancel(self._polling)
+            self._polling = None
+
+    def _poll(self):
+        self._polling = self.widget.after(self.interval_ms, self._poll)
+        if self.db.data_version() != self._data_version:
+            self.check()
+
+    def _watch(self, widget):
+        # A tab inside a hidden tab is never unmapped itself, so also listen
+        # for its ancestors being mapped (but not the toplevel, whose
+        # bindings apply to every widget in it).
+        toplevel = widget.winfo_toplevel()
+        while widget is not None and widget != toplevel:
+            if widget not in self._watched:
+                self._watched.add(widget)
+                widget.bind('<Map>', self._run_deferred, add='+')
+            widget = widget.master
+
+    def _run_deferred(self, event=None):
+        for widget, callbacks in self._deferred.items():
+            if callbacks and widget.winfo_viewable():
+                self._deferred[widget] = []
+                for callback in callbacks:
+                    callback()
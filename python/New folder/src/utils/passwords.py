@@ -0,0 +1,124 @@
+import base64
+import hashlib
+import hmac
+import os
+import time
+from ..config import (PASSWORD_HASH_ALGORITHM, PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R,
+                      PASSWORD_SCRYPT_P, PASSWORD_PBKDF2_ITERATIONS)
+
+# hashlib.scrypt needs OpenSSL 1.1+; without it new hashes use PBKDF2
+SCRYPT_AVAILABLE = hasattr(hashlib, 'scrypt')
+SALT_BYTES = 16
+
+
+def hash_password(password, algorithm=None, cost=None):
+    """Salted hash of password in the form stored in users.password_hash.
+
+    scrypt:        scrypt$<n>$<r>$<p>$<salt>$<hash>
+    PBKDF2-SHA256: pbkdf2_sha256$<iterations>$<salt>$<hash>
+    cost overrides the configured n (scrypt) or iterations (PBKDF2).
+    """
+    algorithm = effective_algorithm(algorithm)
+    salt = os.urandom(SALT_BYTES)
+    if algorithm == 'scrypt':
+        n = cost or PASSWORD_SCRYPT_N
+        digest = _scrypt(password, salt, n, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P)
+        return f'scrypt${n}${PASSWORD_SCRYPT_R}${PASSWORD_SCRYPT_P}${_b64(salt)}${_b64(digest)}'
+
+    iterations = cost or PASSWORD_PBKDF2_ITERATIONS
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    return f'pbkdf2_sha256${iterations}${_b64(salt)}${_b64(digest)}'
+
+
+def verify_password(password, stored):
+    """Check password against a stored hash of any supported format,
+    including the legacy unsalted SHA-256 hex digests"""
+    if not stored:
+        return False
+    parts = stored.split('$')
+    try:
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            if not SCRYPT_AVAILABLE:
+                # Hashed on a build with scrypt; this one cannot check it
+                return False
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            digest = _scrypt(password, _unb64(parts[4]), n, r, p)
+            return hmac.compare_digest(digest, _unb64(parts[5]))
+        if parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            digest = hashlib.pbkdf2_hmac('sha256', password.encode(), _unb64(parts[2]), int(parts[1]))
+            return hmac.compare_digest(digest, _unb64(parts[3]))
+    except (ValueError, TypeError):
+        return False
+    if len(parts) == 1:
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, stored)
+    return False
+
+
+def needs_rehash(stored):
+    """True if stored is a legacy hash or was made with other settings than
+    the configured ones"""
+    parts = stored.split('$')
+    algorithm = effective_algorithm()
+    if algorithm == 'scrypt':
+        return parts[:4] != ['scrypt', str(PASSWORD_SCRYPT_N), str(PASSWORD_SCRYPT_R),
+                             str(PASSWORD_SCRYPT_P)]
+    return parts[:2] != ['pbkdf2_sha256', str(PASSWORD_PBKDF2_ITERATIONS)]
+
+
+def calibrate(target_ms, algorithm=None):
+    """Return (cost, measured ms): the scrypt n (a power of two) or PBKDF2
+    iteration count whose hash takes closest to target_ms on this machine"""
+    algorithm = effective_algorithm(algorithm)
+    salt = os.urandom(SALT_BYTES)
+
+    if algorithm == 'scrypt':
+        def timed(n):
+            began = time.perf_counter()
+            _scrypt('calibration', salt, n, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P)
+            return (time.perf_counter() - began) * 1000
+
+        n, elapsed = 2 ** 10, timed(2 ** 10)
+        # Cost doubles with n; stop at the first n past the target and keep
+        # whichever neighbour is closer
+        while elapsed < target_ms and n < 2 ** 24:
+            previous = (n, elapsed)
+            n *= 2
+            elapsed = min(timed(n), timed(n))
+            if elapsed >= target_ms and target_ms - previous[1] < elapsed - target_ms:
+                return previous
+        return n, elapsed
+
+    def timed(iterations):
+        began = time.perf_counter()
+        hashlib.pbkdf2_hmac('sha256', b'calibration', salt, iterations)
+        return (time.perf_counter() - began) * 1000
+
+    # PBKDF2 time is linear in the iteration count
+    sample = 100000
+    per_iteration = min(timed(sample), timed(sample)) / sample
+    iterations = max(10000, int(target_ms / per_iteration) // 1000 * 1000)
+    return iterations, timed(iterations)
+
+
+def effective_algorithm(algorithm=None):
+    """The algorithm new hashes use: algorithm or the configured one, with
+    PBKDF2 standing in for scrypt where hashlib lacks it"""
+    algorithm = algorithm or PASSWORD_HASH_ALGORITHM
+    if algorithm == 'scrypt' and not SCRYPT_AVAILABLE:
+        return 'pbkdf2_sha256'
+    return algorithm
+
+
+def _scrypt(password, salt, n, r, p):
+    # maxmem must cover scrypt's 128 * r * n bytes (OpenSSL's default is 32 MB)
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=128 * r * n + 1024 * 1024, dklen=32)
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def _unb64(text):
+    return base64.b64decode(text.encode('ascii'), validate=True)
@@ -1,17 +1,27 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from datetime import datetime, timedelta
 from ..models.product import Product
 from ..models.transaction import Transaction
+from ..config import TREE_PAGE_SIZE, TREE_MAX_PAGES
+from .paged_treeview import PagedTreeview
 
 class InventoryManagementFrame(ttk.Frame):
-    def __init__(self, parent, user):
+    def __init__(self, parent, user, changes):
         super().__init__(parent)
         self.user = user
+        self.changes = changes
         self.product_model = Product()
         self.transaction_model = Transaction()
         
         self.setup_ui()
         self.refresh()
+        
+        # New transactions are appended to the history as they arrive; a
+        # user rename needs the loaded rows re-read
+        changes.subscribe(('products',), self.refresh_stock, self.stock_frame)
+        changes.subscribe(('transactions',), self.tail_history, self.history_frame)
+        changes.subscribe(('users',), self.refresh_history, self.history_frame)
     
     def setup_ui(self):
         # Create notebook for sub-tabs
@@ -54,7 +64,15 @@ class InventoryManagementFrame(ttk.Frame):
         
         # Scrollbar
         stock_scroll = ttk.Scrollbar(left_frame, orient=tk.VERTICAL, command=self.stock_tree.yview)
-        self.stock_tree.configure(yscrollcommand=stock_scroll.set)
+        self.stock_pages = PagedTreeview(self.stock_tree, stock_scroll,
+                                         self.product_model.get_products_page,
+                                         Product.page_key, self.make_stock_item,
+                                         page_size=TREE_PAGE_SIZE, max_pages=TREE_MAX_PAGES)
+        
+        # Configure tag colors
+        self.stock_tree.tag_configure('out_of_stock', background='#ffcccc')
+        self.stock_tree.tag_configure('low_stock', background='#fff2cc')
+        self.stock_tree.tag_configure('in_stock', background='#ccffcc')
         
         self.stock_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         stock_scroll.pack(side=tk.RIGHT, fill=tk.Y)
@@ -120,6 +138,33 @@ class InventoryManagementFrame(ttk.Frame):
                   command=self.refresh_stock).pack(fill=tk.X, pady=2)
     
     def setup_transaction_history(self):
+        # Filters
+        filter_frame = ttk.Frame(self.history_frame)
+        filter_frame.pack(fill=tk.X, padx=5, pady=(5, 0))
+        
+        ttk.Label(filter_frame, text="Type:").pack(side=tk.LEFT)
+        self.history_type_var = tk.StringVar(value="All")
+        ttk.Combobox(filter_frame, textvariable=self.history_type_var,
+                     values=["All", "restock", "sale", "adjustment", "return"],
+                     state="readonly", width=12).pack(side=tk.LEFT, padx=(5, 10))
+        
+        ttk.Label(filter_frame, text="From (YYYY-MM-DD):").pack(side=tk.LEFT)
+        self.history_from_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.history_from_var, width=12).pack(side=tk.LEFT, padx=(5, 10))
+        
+        ttk.Label(filter_frame, text="To:").pack(side=tk.LEFT)
+        self.history_to_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.history_to_var, width=12).pack(side=tk.LEFT, padx=(5, 10))
+        
+        self.history_product_var = tk.BooleanVar()
+        ttk.Checkbutton(filter_frame, text="Selected product only",
+                        variable=self.history_product_var).pack(side=tk.LEFT, padx=(0, 10))
+        
+        ttk.Button(filter_frame, text="Apply", command=self.apply_history_filters).pack(side=tk.LEFT, padx=5)
+        ttk.Button(filter_frame, text="Clear", command=self.clear_history_filters).pack(side=tk.LEFT)
+        
+        self.history_filters = {}
+        
         # Transaction history treeview
         columns = ('ID', 'Product', 'Type', 'Quantity', 'Price', 'User', 'Date', 'Notes')
         self.history_tree = ttk.Treeview(self.history_frame, columns=columns, show='headings')
@@ -139,7 +184,11 @@ class InventoryManagementFrame(ttk.Frame):
         # Scrollbars
         h_scroll = ttk.Scrollbar(self.history_frame, orient=tk.HORIZONTAL, command=self.history_tree.xview)
         v_scroll = ttk.Scrollbar(self.history_frame, orient=tk.VERTICAL, command=self.history_tree.yview)
-        self.history_tree.configure(xscrollcommand=h_scroll.set, yscrollcommand=v_scroll.set)
+        self.history_tree.configure(xscrollcommand=h_scroll.set)
+        self.history_pages = PagedTreeview(self.history_tree, v_scroll,
+                                           self.fetch_history_page,
+                                           Transaction.page_key, self.make_history_item,
+                                           page_size=TREE_PAGE_SIZE, max_pages=TREE_MAX_PAGES)
         
         self.history_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 0), pady=5)
         v_scroll.pack(side=tk.RIGHT, fill=tk.Y, pady=5)
@@ -152,56 +201,106 @@ class InventoryManagementFrame(ttk.Frame):
     
     def refresh_stock(self):
         """Refresh stock list"""
-        # Clear existing items
-        for item in self.stock_tree.get_children():
-            self.stock_tree.delete(item)
-        
-        # Load products
-        products = self.product_model.get_all_products()
-        for product in products:
-            product_id, name, _, _, _, quantity, min_stock, _, _, _ = product
-            
-            # Determine status
-            if quantity <= 0:
-                status = "Out of Stock"
-                tags = ['out_of_stock']
-            elif quantity <= min_stock:
-                status = "Low Stock"
-                tags = ['low_stock']
-            else:
-                status = "In Stock"
-                tags = ['in_stock']
-            
-            self.stock_tree.insert('', tk.END, values=(
-                product_id, name, quantity, min_stock, status
-            ), tags=tags)
-        
-        # Configure tag colors
-        self.stock_tree.tag_configure('out_of_stock', background='#ffcccc')
-        self.stock_tree.tag_configure('low_stock', background='#fff2cc')
-        self.stock_tree.tag_configure('in_stock', background='#ccffcc')
+        self.stock_pages.refresh()
+    
+    def make_stock_item(self, product):
+        """Treeview values and tags for a product row"""
+        product_id, name, _, _, _, quantity, min_stock, _, _, _ = product
+        
+        # Determine status
+        if quantity <= 0:
+            status = "Out of Stock"
+            tags = ['out_of_stock']
+        elif quantity <= min_stock:
+            status = "Low Stock"
+            tags = ['low_stock']
+        else:
+            status = "In Stock"
+            tags = ['in_stock']
+        
+        return (product_id, name, quantity, min_stock, status), tags
     
     def refresh_history(self):
         """Refresh transaction history"""
-        # Clear existing items
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
-        
-        # Load transactions
-        transactions = self.transaction_model.get_all_transactions()
-        for transaction in transactions:
-            trans_id, product_name, trans_type, quantity, price, username, notes, created_at = transaction
-            
-            # Format price
-            price_formatted = f"${price:.2f}" if price else "N/A"
-            
-            # Format date
-            date_formatted = created_at[:19] if created_at else ""
-            
-            self.history_tree.insert('', tk.END, values=(
-                trans_id, product_name, trans_type.title(), quantity,
-                price_formatted, username, date_formatted, notes or ""
-            ))
+        self.history_last_id = self.transaction_model.get_last_id()
+        self.history_pages.refresh()
+    
+    def tail_history(self):
+        """Show transactions recorded since the history was last read"""
+        last_id = self.transaction_model.get_last_id()
+        if last_id - self.history_last_id > TREE_PAGE_SIZE:
+            # Too far behind (e.g. the tab was hidden for a while): reload
+            self.refresh_history()
+            return
+        
+        rows = self.transaction_model.get_since(self.history_last_id, last_id,
+                                                **self.history_filters)
+        self.history_last_id = last_id
+        
+        # Only rows that sort above the current top row go in; anything
+        # older shows up when its page is loaded.
+        pages = self.history_pages.pages
+        if pages:
+            top_key = pages[0][0]
+            rows = [row for row in rows if Transaction.page_key(row) > top_key]
+        rows.sort(key=Transaction.page_key, reverse=True)
+        self.history_pages.prepend(rows)
+    
+    def fetch_history_page(self, after=None, before=None, limit=100):
+        """One page of history with the current filters applied"""
+        return self.transaction_model.get_transactions_page(after, before, limit,
+                                                            **self.history_filters)
+    
+    def apply_history_filters(self):
+        """Reload the history with the filters from the filter bar"""
+        filters = {}
+        
+        transaction_type = self.history_type_var.get()
+        if transaction_type != "All":
+            filters['transaction_type'] = transaction_type
+        
+        try:
+            start = self.history_from_var.get().strip()
+            if start:
+                filters['start_date'] = datetime.strptime(start, '%Y-%m-%d').strftime('%Y-%m-%d')
+            end = self.history_to_var.get().strip()
+            if end:
+                # Include the whole "To" day
+                end_day = datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1)
+                filters['end_date'] = end_day.strftime('%Y-%m-%d')
+        except ValueError:
+            messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format")
+            return
+        
+        if self.history_product_var.get():
+            if not hasattr(self, 'selected_product_id'):
+                messagebox.showwarning("Warning", "Please select a product first")
+                return
+            filters['product_id'] = self.selected_product_id
+        
+        self.history_filters = filters
+        self.history_last_id = self.transaction_model.get_last_id()
+        self.history_pages.reset()
+    
+    def clear_history_filters(self):
+        self.history_type_var.set("All")
+        self.history_from_var.set("")
+        self.history_to_var.set("")
+        self.history_product_var.set(False)
+        self.apply_history_filters()
+    
+    def make_history_item(self, transaction):
+        """Treeview values and tags for a transaction row"""
+        trans_id, product_name, trans_type, quantity, price, username, notes, created_at = transaction
+        
+        # Format price
+        price_formatted = f"${price:.2f}" if price else "N/A"
+        
+        # Format date
+        date_formatted = created_at[:19] if created_at else ""
+        
+        return (trans_id, product_name, trans_type.title(), quantity,
+                price_formatted, username, date_formatted, notes or ""), ()
     
     def on_stock_select(self, event):
         """Handle stock item selection"""
@@ -255,7 +354,7 @@ class InventoryManagementFrame(ttk.Frame):
             if success:
                 messagebox.showinfo("Success", f"Transaction applied successfully!")
                 self.clear_adjustment_form()
-                self.refresh()
+                self.changes.check()
             else:
                 messagebox.showerror("Error", "Transaction failed. Check if sufficient stock is available.")
         
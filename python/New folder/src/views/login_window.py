@@ -2,12 +2,14 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from ..models.user import User
 from ..utils.validators import Validator
+from ..utils.background import BackgroundTask
 
 class LoginWindow:
     def __init__(self, on_login_success):
         self.on_login_success = on_login_success
         self.user_model = User()
         self.current_user = None
+        self.login_task = None
         
         self.root = tk.Tk()
         self.root.title("Inventory Management System - Login")
@@ -48,8 +50,8 @@ class LoginWindow:
         password_entry.grid(row=2, column=1, pady=5, padx=(10, 0))
         
         # Login button
-        login_btn = ttk.Button(main_frame, text="Login", command=self.login)
-        login_btn.grid(row=3, column=0, columnspan=2, pady=20)
+        self.login_btn = ttk.Button(main_frame, text="Login", command=self.login)
+        self.login_btn.grid(row=3, column=0, columnspan=2, pady=20)
         
         # Create user button (for admin)
         create_user_btn = ttk.Button(main_frame, text="Create New User", 
@@ -57,9 +59,14 @@ class LoginWindow:
         create_user_btn.grid(row=4, column=0, columnspan=2, pady=5)
         
         # Default credentials info
-        info_label = ttk.Label(main_frame, text="Default: admin / admin123", 
-                              font=("Arial", 9), foreground="gray")
-        info_label.grid(row=5, column=0, columnspan=2, pady=10)
+        self.info_label = ttk.Label(main_frame, text="Default: admin / admin123", 
+                                   font=("Arial", 9), foreground="gray")
+        self.info_label.grid(row=5, column=0, columnspan=2, pady=10)
+        
+        # Shown in place of the info line while the password is checked
+        self.login_progress = ttk.Progressbar(main_frame, mode='indeterminate', length=200)
+        self.login_progress.grid(row=5, column=0, columnspan=2, pady=10)
+        self.login_progress.grid_remove()
         
         # Bind Enter key to login
         self.root.bind('<Return>', lambda e: self.login())
@@ -73,7 +80,32 @@ class LoginWindow:
             messagebox.showerror("Error", "Please enter both username and password")
             return
         
-        user = self.user_model.authenticate(username, password)
+        if self.login_task is not None and self.login_task.running:
+            return
+        
+        # Password hashing is deliberately slow; keep the window responsive
+        self.set_busy(True)
+        self.login_task = BackgroundTask(
+            self.root,
+            lambda progress, cancel_event: self.user_model.authenticate(username, password),
+            on_done=self.on_login_done,
+            on_error=self.on_login_error
+        ).start()
+    
+    def set_busy(self, busy):
+        if busy:
+            self.login_btn.config(state='disabled', text="Checking...")
+            self.info_label.grid_remove()
+            self.login_progress.grid()
+            self.login_progress.start(15)
+        else:
+            self.login_progress.stop()
+            self.login_progress.grid_remove()
+            self.info_label.grid()
+            self.login_btn.config(state='normal', text="Login")
+    
+    def on_login_done(self, user):
+        self.set_busy(False)
         if user:
             self.current_user = user
             self.root.destroy()
@@ -82,6 +114,10 @@ class LoginWindow:
             messagebox.showerror("Error", "Invalid username or password")
             self.password_var.set("")
     
+    def on_login_error(self, error):
+        self.set_busy(False)
+        messagebox.showerror("Error", f"Login failed: {str(error)}")
+    
     def show_create_user_dialog(self):
         CreateUserDialog(self.root, self.user_model)
     
@@ -135,7 +171,8 @@ class CreateUserDialog:
         btn_frame = ttk.Frame(main_frame)
         btn_frame.grid(row=3, column=0, columnspan=2, pady=20)
         
-        ttk.Button(btn_frame, text="Create", command=self.create_user).pack(side=tk.LEFT, padx=5)
+        self.create_btn = ttk.Button(btn_frame, text="Create", command=self.create_user)
+        self.create_btn.pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Cancel", command=self.dialog.destroy).pack(side=tk.LEFT, padx=5)
     
     def create_user(self):
@@ -154,9 +191,23 @@ class CreateUserDialog:
             messagebox.showerror("Error", msg)
             return
         
-        # Create user
-        if self.user_model.create_user(username, password, role):
+        # Create user (hashing the password takes a moment)
+        self.create_btn.config(state='disabled', text="Creating...")
+        BackgroundTask(
+            self.dialog,
+            lambda progress, cancel_event: self.user_model.create_user(username, password, role),
+            on_done=self.on_user_created,
+            on_error=self.on_create_error
+        ).start()
+    
+    def on_user_created(self, created):
+        self.create_btn.config(state='normal', text="Create")
+        if created:
             messagebox.showinfo("Success", "User created successfully!")
             self.dialog.destroy()
         else:
             messagebox.showerror("Error", "Username already exists!")
+    
+    def on_create_error(self, error):
+        self.create_btn.config(state='normal', text="Create")
+        messagebox.showerror("Error", f"Failed to create user: {str(error)}")
@@ -1,20 +1,37 @@
+import os
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
 from .product_management import ProductManagementFrame
 from .inventory_management import InventoryManagementFrame
 from .reports import ReportsFrame
 from .user_management import UserManagementFrame
+from ..models.product import Product
+from ..utils.change_monitor import ChangeMonitor
+from ..config import CHANGE_POLL_MS, QUERY_TRACE_ENABLED
 
 class MainWindow:
-    def __init__(self, user):
+    def __init__(self, user, started_at=None):
         self.user = user
+        # perf_counter() at login, for the startup time shown in the status bar
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.startup_time = None
         
         self.root = tk.Tk()
         self.root.title(f"Inventory Management System - {user['username']} ({user['role']})")
         self.root.geometry("1200x800")
         self.root.state('zoomed')  # Maximize window on Windows
         
+        # Tabs subscribe to the tables they show and refresh only when those change
+        self.changes = ChangeMonitor(self.root, CHANGE_POLL_MS)
+        
+        # Stock alerts already recorded at login are not announced again
+        self.product = Product()
+        self.last_alert_id = self.product.get_last_stock_alert_id()
+        
         self.setup_ui()
+        self.changes.subscribe(('stock_alerts',), self.on_stock_alerts)
+        self.changes.start()
     
     def setup_ui(self):
         # Create menu bar
@@ -28,11 +45,14 @@ class MainWindow:
         self.notebook = ttk.Notebook(main_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True)
         
+        # Status bar
+        self.create_status_bar()
+        
         # Add tabs
         self.add_tabs()
         
-        # Status bar
-        self.create_status_bar()
+        # First idle callback runs once the window is drawn with the Products tab
+        self.root.after_idle(self.record_startup_time)
     
     def create_menu(self):
         menubar = tk.Menu(self.root)
@@ -47,6 +67,8 @@ class MainWindow:
         view_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="View", menu=view_menu)
         view_menu.add_command(label="Refresh All", command=self.refresh_all_tabs)
+        if QUERY_TRACE_ENABLED:
+            view_menu.add_command(label="Dump Query Statistics", command=self.dump_query_stats)
         
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -54,22 +76,58 @@ class MainWindow:
         help_menu.add_command(label="About", command=self.show_about)
     
     def add_tabs(self):
-        # Product Management Tab
-        self.product_frame = ProductManagementFrame(self.notebook, self.user)
-        self.notebook.add(self.product_frame, text="Products")
+        # Each tab starts as an empty placeholder; its frame is built (and
+        # loads its data) the first time the tab is selected.
+        self.pending_tabs = {}
+        
+        # Product Management Tab (built now, it is shown first)
+        products_tab = self.add_tab("Products", 'product_frame', ProductManagementFrame)
         
         # Inventory Management Tab
-        self.inventory_frame = InventoryManagementFrame(self.notebook, self.user)
-        self.notebook.add(self.inventory_frame, text="Inventory")
+        self.add_tab("Inventory", 'inventory_frame', InventoryManagementFrame)
         
         # Reports Tab
-        self.reports_frame = ReportsFrame(self.notebook, self.user)
-        self.notebook.add(self.reports_frame, text="Reports")
+        self.add_tab("Reports", 'reports_frame', ReportsFrame)
         
         # User Management Tab (Admin only)
         if self.user['role'] == 'admin':
-            self.user_frame = UserManagementFrame(self.notebook, self.user)
-            self.notebook.add(self.user_frame, text="Users")
+            self.add_tab("Users", 'user_frame', UserManagementFrame)
+        
+        self.build_tab(products_tab)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+    
+    def add_tab(self, text, attribute, frame_class):
+        placeholder = ttk.Frame(self.notebook)
+        self.notebook.add(placeholder, text=text)
+        self.pending_tabs[str(placeholder)] = (placeholder, attribute, frame_class)
+        return placeholder
+    
+    def build_tab(self, placeholder):
+        """Create the frame for a placeholder tab, if not built yet"""
+        pending = self.pending_tabs.pop(str(placeholder), None)
+        if pending is None:
+            return
+        
+        placeholder, attribute, frame_class = pending
+        self.status_label.config(text="Loading...")
+        self.root.update_idletasks()
+        
+        frame = frame_class(placeholder, self.user, self.changes)
+        frame.pack(fill=tk.BOTH, expand=True)
+        setattr(self, attribute, frame)
+        self.status_label.config(text="Ready")
+    
+    def on_tab_changed(self, event=None):
+        try:
+            self.build_tab(self.notebook.select())
+        except Exception as e:
+            self.status_label.config(text="Ready")
+            messagebox.showerror("Error", f"Failed to load tab: {str(e)}")
+    
+    def record_startup_time(self):
+        """Time from login to the Products tab being on screen and usable"""
+        self.startup_time = time.perf_counter() - self.started_at
+        self.status_label.config(text=f"Ready (started in {self.startup_time:.2f}s)")
     
     def create_status_bar(self):
         self.status_bar = ttk.Frame(self.root)
@@ -82,18 +140,62 @@ class MainWindow:
         user_info = ttk.Label(self.status_bar, 
                              text=f"Logged in as: {self.user['username']} ({self.user['role']})")
         user_info.pack(side=tk.RIGHT, padx=5)
+        
+        # Latest low stock alert, kept apart from the status messages
+        self.alert_label = ttk.Label(self.status_bar, text="", foreground="red")
+        self.alert_label.pack(side=tk.RIGHT, padx=15)
+    
+    def on_stock_alerts(self):
+        """Announce products that went low or out of stock since the last check"""
+        alerts = self.product.get_stock_alerts_since(self.last_alert_id, limit=100)
+        if not alerts:
+            return
+        self.last_alert_id = alerts[-1][0]
+        if len(alerts) == 100:
+            # A bulk change; skip the rest rather than page through it here
+            self.last_alert_id = self.product.get_last_stock_alert_id()
+        
+        # Only the latest state of each product matters
+        states = {}
+        for alert in alerts:
+            states[alert[2]] = alert[3]
+        out = [name for name, state in states.items() if state == 'out']
+        low = [name for name, state in states.items() if state == 'low']
+        if not out and not low:
+            return
+        
+        def names(items):
+            shown = ', '.join(items[:3])
+            return shown if len(items) <= 3 else f"{shown} and {len(items) - 3} more"
+        
+        parts = []
+        if out:
+            parts.append(f"Out of stock: {names(out)}")
+        if low:
+            parts.append(f"Low stock: {names(low)}")
+        self.alert_label.config(text='; '.join(parts))
+        self.root.bell()
     
     def refresh_all_tabs(self):
         try:
-            self.product_frame.refresh()
-            self.inventory_frame.refresh()
-            self.reports_frame.refresh()
-            if hasattr(self, 'user_frame'):
-                self.user_frame.refresh()
-            self.status_label.config(text="All tabs refreshed")
+            # Only tabs showing a changed table reload
+            changed = self.changes.check()
+            if changed:
+                self.status_label.config(text=f"Refreshed: {', '.join(sorted(changed))}")
+            else:
+                self.status_label.config(text="All tabs up to date")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to refresh: {str(e)}")
     
+    def dump_query_stats(self):
+        """Write the per-method query latency histograms to the log directory"""
+        from ..models.query_trace import tracer
+        try:
+            path = tracer.dump()
+            self.status_label.config(text=f"Query statistics written to {os.path.abspath(path)}")
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to write query statistics: {str(e)}")
+    
     def show_about(self):
         messagebox.showinfo("About", 
                            "Inventory Management System v1.0\n"
@@ -0,0 +1,188 @@
+from collections import deque
+from .tree_binding import TreeBinding
+
+
+class PagedTreeview:
+    """Virtual scrolling for a ttk.Treeview backed by a keyset-paged query.
+
+    Rows are fetched a page at a time as the view nears either end, and at
+    most max_pages pages are kept in the tree; pages scrolled far out of
+    view are dropped and re-fetched if the user scrolls back.
+
+    fetch_page(after=key, before=key, limit=n) returns rows in display
+    order, key_of(row) returns the keyset position of a row, and
+    make_item(row) returns the (values, tags) to insert for it. Items are
+    keyed by row id through a TreeBinding, so refresh() only touches the
+    rows that changed.
+    """
+
+    EDGE = 0.1
+
+    def __init__(self, tree, scrollbar, fetch_page, key_of, make_item,
+                 page_size=200, max_pages=5, row_id=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.key_of = key_of
+        self.binding = TreeBinding(tree, make_item, row_id)
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+        # Each page is (first_key, last_key, item_ids)
+        self.pages = deque()
+        self.at_start = True
+        self.at_end = True
+        self.paging = False
+        self._loading = False
+
+        self.tree.configure(yscrollcommand=self.on_yscroll)
+
+    def reset(self):
+        """Reload from the first page"""
+        self.paging = True
+        self._clear()
+        self.at_start = True
+        self.at_end = False
+        self._load_next()
+
+    def refresh(self):
+        """Re-read the loaded window and apply only the rows that changed"""
+        if not self.paging or not self.pages:
+            self.reset()
+            return
+        
+        loaded = sum(len(page[2]) for page in self.pages)
+        after = None
+        if not self.at_start:
+            previous = self.fetch_page(before=self.pages[0][0], limit=1)
+            if previous:
+                after = self.key_of(previous[0])
+        
+        # Read one row past the window to tell whether more follow. With the
+        # end loaded, read up to a page further, so rows inserted into the
+        # window do not push the last loaded rows out of it.
+        limit = loaded + (self.page_size if self.at_end else 1)
+        rows = self.fetch_page(after=after, limit=limit)
+        self.at_end = len(rows) < limit
+        if not self.at_end:
+            rows = rows[:limit - 1]
+        iids = self.binding.sync(rows)
+        
+        self.pages.clear()
+        for start in range(0, len(rows), self.page_size):
+            page = rows[start:start + self.page_size]
+            self.pages.append((self.key_of(page[0]), self.key_of(page[-1]),
+                               iids[start:start + self.page_size]))
+        self.at_start = after is None
+    
+    def prepend(self, rows):
+        """Add rows (in display order) above the first loaded row, e.g. new
+        entries at the top of a newest-first list.
+
+        Only applies while the start of the list is loaded; otherwise the
+        rows come in with the previous page when the user scrolls back up.
+        """
+        if not rows or not self.paging or not self.at_start:
+            return
+        if not self.pages:
+            self.reset()
+            return
+
+        if self.tree.yview()[0] > 0:
+            # Scrolled down a little: keep the rows on screen where they are
+            self._scroll_load(lambda: self._insert_first(rows))
+        else:
+            self._insert_first(rows)
+
+    def show_rows(self, rows):
+        """Show a fixed list of rows with paging switched off"""
+        self.paging = False
+        self.pages.clear()
+        self.binding.sync(rows)
+
+    def on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if not self.paging or self._loading:
+            return
+
+        first, last = float(first), float(last)
+        if last >= 1 - self.EDGE and not self.at_end:
+            self.tree.after_idle(self._scroll_load, self._load_next)
+        elif first <= self.EDGE and not self.at_start:
+            self.tree.after_idle(self._scroll_load, self._load_previous)
+
+    def _scroll_load(self, load):
+        if self._loading or not self.paging:
+            return
+
+        # Remember the top visible row so trimming does not move the view
+        children = self.tree.get_children()
+        anchor = None
+        if children:
+            first = self.tree.yview()[0]
+            anchor = children[min(round(first * len(children)), len(children) - 1)]
+
+        self._loading = True
+        try:
+            load()
+            if anchor is not None and self.tree.exists(anchor):
+                children = self.tree.get_children()
+                self.tree.yview_moveto(self.tree.index(anchor) / len(children))
+        finally:
+            self._loading = False
+
+    def _clear(self):
+        self.binding.clear()
+        self.pages.clear()
+
+    def _load_next(self):
+        after = self.pages[-1][1] if self.pages else None
+        rows = self.fetch_page(after=after, limit=self.page_size)
+        if len(rows) < self.page_size:
+            self.at_end = True
+        if not rows:
+            return
+
+        items = self._claim(self.binding.insert(rows))
+        self.pages.append((self.key_of(rows[0]), self.key_of(rows[-1]), items))
+
+        if len(self.pages) > self.max_pages:
+            self.binding.delete(self.pages.popleft()[2])
+            self.at_start = False
+
+    def _insert_first(self, rows):
+        items = self._claim(self.binding.insert(rows, 0))
+        first_key, last_key, page_items = self.pages[0]
+        if len(items) + len(page_items) <= self.page_size:
+            self.pages[0] = (self.key_of(rows[0]), last_key, items + page_items)
+            return
+
+        self.pages.appendleft((self.key_of(rows[0]), self.key_of(rows[-1]), items))
+        if len(self.pages) > self.max_pages:
+            self.binding.delete(self.pages.pop()[2])
+            self.at_end = False
+
+    def _claim(self, items):
+        """Take items out of the pages that held them before: insert() moves
+        a row that another client changed into the page just fetched, and
+        dropping its old page must not delete it"""
+        claimed = set(items)
+        for index, (first_key, last_key, page_items) in enumerate(self.pages):
+            if not claimed.isdisjoint(page_items):
+                self.pages[index] = (first_key, last_key,
+                                     [iid for iid in page_items if iid not in claimed])
+        return items
+
+    def _load_previous(self):
+        rows = self.fetch_page(before=self.pages[0][0], limit=self.page_size)
+        if len(rows) < self.page_size:
+            self.at_start = True
+        if not rows:
+            return
+
+        items = self._claim(self.binding.insert(rows, 0))
+        self.pages.appendleft((self.key_of(rows[0]), self.key_of(rows[-1]), items))
+
+        if len(self.pages) > self.max_pages:
+            self.binding.delete(self.pages.pop()[2])
+            self.at_end = False
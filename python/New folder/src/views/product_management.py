@@ -1,17 +1,27 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from ..models.product import Product
+from ..models.product_import import ProductImporter
 from ..utils.validators import Validator
+from ..utils.background import DebouncedQuery, BackgroundTask
+from ..config import SEARCH_DEBOUNCE_MS, SEARCH_RESULT_LIMIT, TREE_PAGE_SIZE, TREE_MAX_PAGES
+from .paged_treeview import PagedTreeview
 
 class ProductManagementFrame(ttk.Frame):
-    def __init__(self, parent, user):
+    def __init__(self, parent, user, changes):
         super().__init__(parent)
         self.user = user
+        self.changes = changes
         self.product_model = Product()
         self.selected_product_id = None
+        self.import_task = None
+        self.search = DebouncedQuery(self, self.run_search, self.show_products,
+                                     delay_ms=SEARCH_DEBOUNCE_MS,
+                                     on_error=self.on_search_error)
         
         self.setup_ui()
         self.refresh()
+        changes.subscribe(('products',), self.on_products_changed, self)
     
     def setup_ui(self):
         # Main container
@@ -32,8 +42,17 @@ class ProductManagementFrame(ttk.Frame):
         search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
         search_entry.bind('<KeyRelease>', self.on_search)
         
+        ttk.Button(search_frame, text="Import CSV", command=self.import_csv).pack(side=tk.RIGHT, padx=(5, 0))
         ttk.Button(search_frame, text="Clear", command=self.clear_search).pack(side=tk.RIGHT, padx=(5, 0))
         
+        # Import progress (shown only while an import runs)
+        self.import_frame = ttk.Frame(left_frame)
+        self.import_label = ttk.Label(self.import_frame, text="")
+        self.import_label.pack(side=tk.LEFT)
+        self.import_progress = ttk.Progressbar(self.import_frame, mode='determinate', maximum=100)
+        self.import_progress.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        ttk.Button(self.import_frame, text="Cancel", command=self.cancel_import).pack(side=tk.RIGHT)
+        
         # Products treeview
         columns = ('ID', 'Name', 'Category', 'Price', 'Quantity', 'Min Stock', 'Supplier')
         self.products_tree = ttk.Treeview(left_frame, columns=columns, show='headings', height=15)
@@ -57,7 +76,11 @@ class ProductManagementFrame(ttk.Frame):
         
         # Scrollbar for treeview
         tree_scroll = ttk.Scrollbar(left_frame, orient=tk.VERTICAL, command=self.products_tree.yview)
-        self.products_tree.configure(yscrollcommand=tree_scroll.set)
+        self.product_pages = PagedTreeview(self.products_tree, tree_scroll,
+                                           self.product_model.get_products_page,
+                                           Product.page_key, self.make_product_item,
+                                           page_size=TREE_PAGE_SIZE, max_pages=TREE_MAX_PAGES)
+        self.products_tree.tag_configure('low_stock', background='#ffcccc')
         
         self.products_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
@@ -124,66 +147,123 @@ class ProductManagementFrame(ttk.Frame):
     
     def refresh(self):
         """Refresh the products list"""
-        # Clear existing items
-        for item in self.products_tree.get_children():
-            self.products_tree.delete(item)
-        
-        # Load products
-        products = self.product_model.get_all_products()
-        for product in products:
-            # Format price
-            price_formatted = f"${product[4]:.2f}"
-            
-            # Check if low stock
-            tags = []
-            if product[5] <= product[6]:  # quantity <= min_stock_level
-                tags = ['low_stock']
-            
-            self.products_tree.insert('', tk.END, values=(
-                product[0],  # ID
-                product[1],  # Name
-                product[3],  # Category
-                price_formatted,  # Price
-                product[5],  # Quantity
-                product[6],  # Min Stock Level
-                product[7]   # Supplier
-            ), tags=tags)
-        
-        # Configure tag colors
-        self.products_tree.tag_configure('low_stock', background='#ffcccc')
+        self.search.cancel()
+        self.product_pages.refresh()
     
-    def on_search(self, event=None):
-        """Handle search functionality"""
+    def on_products_changed(self):
+        """Reload the list (or re-run the current search) after a change"""
         search_term = self.search_var.get().strip()
-        
-        # Clear existing items
-        for item in self.products_tree.get_children():
-            self.products_tree.delete(item)
-        
-        # Load filtered products
         if search_term:
-            products = self.product_model.search_products(search_term)
+            self.search.submit_now(search_term)
         else:
-            products = self.product_model.get_all_products()
-        
-        for product in products:
-            price_formatted = f"${product[4]:.2f}"
-            tags = []
-            if product[5] <= product[6]:
-                tags = ['low_stock']
-            
-            self.products_tree.insert('', tk.END, values=(
-                product[0], product[1], product[3], price_formatted,
-                product[5], product[6], product[7]
-            ), tags=tags)
+            self.product_pages.refresh()
+    
+    def show_products(self, products):
+        """Replace the products list with the given rows"""
+        self.product_pages.show_rows(products)
+    
+    def make_product_item(self, product):
+        """Treeview values and tags for a product row"""
+        # Format price
+        price_formatted = f"${product[4]:.2f}"
+        
+        # Check if low stock
+        tags = []
+        if product[5] <= product[6]:  # quantity <= min_stock_level
+            tags = ['low_stock']
+        
+        return (
+            product[0],  # ID
+            product[1],  # Name
+            product[3],  # Category
+            price_formatted,  # Price
+            product[5],  # Quantity
+            product[6],  # Min Stock Level
+            product[7]   # Supplier
+        ), tags
+    
+    def on_search(self, event=None):
+        """Handle search functionality"""
+        search_term = self.search_var.get().strip()
+        if not search_term:
+            self.refresh()
+            return
         
-        self.products_tree.tag_configure('low_stock', background='#ffcccc')
+        # Runs on the search worker once typing pauses (see DebouncedQuery)
+        self.search.submit(search_term)
+    
+    def run_search(self, search_term):
+        """Query for the search box; called on the search worker thread"""
+        return self.product_model.search_products(search_term, SEARCH_RESULT_LIMIT)
+    
+    def on_search_error(self, error):
+        messagebox.showerror("Error", f"Search failed: {str(error)}")
     
     def clear_search(self):
         """Clear search and refresh all products"""
         self.search_var.set("")
         self.refresh()
     
+    def import_csv(self):
+        """Import products from a CSV file on a background thread"""
+        if self.import_task and self.import_task.running:
+            messagebox.showwarning("Warning", "An import is already running")
+            return
+        
+        filename = filedialog.askopenfilename(
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            title="Import Products"
+        )
+        if not filename:
+            return
+        
+        importer = ProductImporter()
+        self.import_progress['value'] = 0
+        self.import_label.config(text="Importing...")
+        self.import_frame.pack(fill=tk.X, pady=(0, 10), before=self.products_tree)
+        
+        self.import_task = BackgroundTask(
+            self,
+            lambda progress, cancel_event: importer.import_file(filename, progress, cancel_event),
+            on_done=self.on_import_done,
+            on_progress=self.on_import_progress,
+            on_error=self.on_import_error
+        ).start()
+    
+    def cancel_import(self):
+        if self.import_task:
+            self.import_task.cancel()
+            self.import_label.config(text="Cancelling...")
+    
+    def on_import_progress(self, done, total):
+        self.import_progress['value'] = 100 * done / total if total else 100
+    
+    def on_import_done(self, result):
+        self.import_frame.pack_forget()
+        self.changes.check()
+        
+        message = f"Imported {result['imported']} products."
+        if result['cancelled']:
+            message = "Import cancelled. " + message
+        errors = result['errors']
+        if errors:
+            shown = "\n".join(f"Line {line}: {error}" for line, error in errors[:20])
+            more = f"\n...and {len(errors) - 20} more" if len(errors) > 20 else ""
+            messagebox.showwarning("Import Finished",
+                                   f"{message}\n{len(errors)} rows skipped:\n{shown}{more}")
+        else:
+            messagebox.showinfo("Import Finished", message)
+    
+    def on_import_error(self, error):
+        self.import_frame.pack_forget()
+        messagebox.showerror("Error", f"Failed to import products: {str(error)}")
+    
+    def destroy(self):
+        self.search.close()
+        if self.import_task:
+            self.import_task.cancel()
+        super().destroy()
+    
     def on_product_select(self, event):
         """Handle product selection"""
         selection = self.products_tree.selection()
@@ -250,7 +330,7 @@ class ProductManagementFrame(ttk.Frame):
             if product_id:
                 messagebox.showinfo("Success", "Product added successfully!")
                 self.clear_form()
-                self.refresh()
+                self.changes.check()
             else:
                 messagebox.showerror("Error", "Failed to add product")
         
@@ -280,7 +360,7 @@ class ProductManagementFrame(ttk.Frame):
             
             if success:
                 messagebox.showinfo("Success", "Product updated successfully!")
-                self.refresh()
+                self.changes.check()
             else:
                 messagebox.showerror("Error", "Failed to update product")
         
@@ -305,7 +385,7 @@ class ProductManagementFrame(ttk.Frame):
             if success:
                 messagebox.showinfo("Success", "Product deleted successfully!")
                 self.clear_form()
-                self.refresh()
+                self.changes.check()
             else:
                 messagebox.showerror("Error", "Failed to delete product")
         
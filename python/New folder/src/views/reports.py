@@ -2,19 +2,29 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from tkinter import filedialog
 import csv
+import os
 from datetime import datetime, timedelta
 from ..models.product import Product
 from ..models.transaction import Transaction
+from ..config import TREE_PAGE_SIZE, TREE_MAX_PAGES
+from .paged_treeview import PagedTreeview
+from .tree_binding import TreeBinding
+from ..utils.background import BackgroundTask
 
 class ReportsFrame(ttk.Frame):
-    def __init__(self, parent, user):
+    def __init__(self, parent, user, changes):
         super().__init__(parent)
         self.user = user
         self.product_model = Product()
         self.transaction_model = Transaction()
+        self.export_task = None
         
         self.setup_ui()
         self.refresh()
+        
+        changes.subscribe(('products',), self.refresh_inventory_report, self.inventory_frame)
+        changes.subscribe(('transactions', 'products'), self.refresh_sales_report, self.sales_frame)
+        changes.subscribe(('products',), self.refresh_low_stock_report, self.low_stock_frame)
     
     def setup_ui(self):
         # Create notebook for different reports
@@ -35,6 +45,14 @@ class ReportsFrame(ttk.Frame):
         self.low_stock_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.low_stock_frame, text="Low Stock Report")
         self.setup_low_stock_report()
+        
+        # Export progress (shown only while an export runs)
+        self.export_frame = ttk.Frame(self)
+        self.export_label = ttk.Label(self.export_frame, text="")
+        self.export_label.pack(side=tk.LEFT, padx=5)
+        self.export_progress = ttk.Progressbar(self.export_frame, mode='determinate', maximum=100)
+        self.export_progress.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        ttk.Button(self.export_frame, text="Cancel", command=self.cancel_export).pack(side=tk.RIGHT, padx=5)
     
     def setup_inventory_report(self):
         # Control frame
@@ -73,7 +91,15 @@ class ReportsFrame(ttk.Frame):
         # Scrollbar
         inv_scroll = ttk.Scrollbar(self.inventory_frame, orient=tk.VERTICAL, 
                                   command=self.inventory_tree.yview)
-        self.inventory_tree.configure(yscrollcommand=inv_scroll.set)
+        self.inventory_pages = PagedTreeview(self.inventory_tree, inv_scroll,
+                                             self.product_model.get_products_page,
+                                             Product.page_key, self.make_inventory_item,
+                                             page_size=TREE_PAGE_SIZE, max_pages=TREE_MAX_PAGES)
+        
+        # Configure tag colors
+        self.inventory_tree.tag_configure('out_of_stock', background='#ffcccc')
+        self.inventory_tree.tag_configure('low_stock', background='#fff2cc')
+        self.inventory_tree.tag_configure('in_stock', background='#ccffcc')
         
         self.inventory_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(10, 0), pady=5)
         inv_scroll.pack(side=tk.RIGHT, fill=tk.Y, pady=5, padx=(0, 10))
@@ -124,6 +150,8 @@ class ReportsFrame(ttk.Frame):
         sales_scroll = ttk.Scrollbar(self.sales_frame, orient=tk.VERTICAL, 
                                     command=self.sales_tree.yview)
         self.sales_tree.configure(yscrollcommand=sales_scroll.set)
+        # Sales rows carry no id; the product name keys them
+        self.sales_binding = TreeBinding(self.sales_tree, self.make_sales_item)
         
         self.sales_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(10, 0), pady=5)
 
@@ -169,6 +197,11 @@ class ReportsFrame(ttk.Frame):
         low_stock_scroll = ttk.Scrollbar(self.low_stock_frame, orient=tk.VERTICAL, 
                                         command=self.low_stock_tree.yview)
         self.low_stock_tree.configure(yscrollcommand=low_stock_scroll.set)
+        self.low_stock_binding = TreeBinding(self.low_stock_tree, self.make_low_stock_item)
+        
+        # Configure tag colors
+        self.low_stock_tree.tag_configure('critical', background='#ffcccc')
+        self.low_stock_tree.tag_configure('warning', background='#fff2cc')
         
         self.low_stock_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(10, 0), pady=5)
         low_stock_scroll.pack(side=tk.RIGHT, fill=tk.Y, pady=5, padx=(0, 10))
@@ -181,61 +214,41 @@ class ReportsFrame(ttk.Frame):
     
     def refresh_inventory_report(self, event=None):
         """Refresh inventory report"""
-        # Clear existing items
-        for item in self.inventory_tree.get_children():
-            self.inventory_tree.delete(item)
-        
-        # Load products
-        products = self.product_model.get_all_products()
+        self.inventory_pages.refresh()
         
-        total_products = len(products)
-        total_value = 0
-        low_stock_count = 0
-        out_of_stock_count = 0
-        
-        for product in products:
-            product_id, name, description, category, price, quantity, min_stock, supplier, created_at, updated_at = product
-            
-            # Calculate value
-            value = price * quantity
-            total_value += value
-            
-            # Determine status
-            if quantity <= 0:
-                status = "Out of Stock"
-                out_of_stock_count += 1
-                tags = ['out_of_stock']
-            elif quantity <= min_stock:
-                status = "Low Stock"
-                low_stock_count += 1
-                tags = ['low_stock']
-            else:
-                status = "In Stock"
-                tags = ['in_stock']
-            
-            self.inventory_tree.insert('', tk.END, values=(
-                name, category or "N/A", quantity, min_stock, 
-                f"${value:.2f}", status
-            ), tags=tags)
-        
-        # Configure tag colors
-        self.inventory_tree.tag_configure('out_of_stock', background='#ffcccc')
-        self.inventory_tree.tag_configure('low_stock', background='#fff2cc')
-        self.inventory_tree.tag_configure('in_stock', background='#ccffcc')
+        # Summary is one row kept current by triggers, not the rows on screen
+        totals = self.product_model.get_inventory_totals()
         
         # Update summary
-        summary_text = (f"Total Products: {total_products} | "
-                       f"Total Inventory Value: ${total_value:.2f} | "
-                       f"Low Stock: {low_stock_count} | "
-                       f"Out of Stock: {out_of_stock_count}")
+        summary_text = (f"Total Products: {totals['total_products']} | "
+                       f"Total Inventory Value: ${totals['total_value']:.2f} | "
+                       f"Low Stock: {totals['low_stock_count']} | "
+                       f"Out of Stock: {totals['out_of_stock_count']}")
         self.inventory_summary_label.config(text=summary_text)
     
+    def make_inventory_item(self, product):
+        """Treeview values and tags for a product row"""
+        product_id, name, description, category, price, quantity, min_stock, supplier, created_at, updated_at = product
+        
+        # Calculate value
+        value = price * quantity
+        
+        # Determine status
+        if quantity <= 0:
+            status = "Out of Stock"
+            tags = ['out_of_stock']
+        elif quantity <= min_stock:
+            status = "Low Stock"
+            tags = ['low_stock']
+        else:
+            status = "In Stock"
+            tags = ['in_stock']
+        
+        return (name, category or "N/A", quantity, min_stock, 
+                f"${value:.2f}", status), tags
+    
     def refresh_sales_report(self, event=None):
         """Refresh sales report"""
-        # Clear existing items
-        for item in self.sales_tree.get_children():
-            self.sales_tree.delete(item)
-        
         # Calculate date range
         period = self.period_var.get()
         start_date = None
@@ -255,14 +268,10 @@ class ReportsFrame(ttk.Frame):
         
         for sale in sales_data:
             product_name, quantity_sold, revenue = sale
-            avg_price = revenue / quantity_sold if quantity_sold > 0 else 0
-            
             total_revenue += revenue
             total_quantity += quantity_sold
-            
-            self.sales_tree.insert('', tk.END, values=(
-                product_name, quantity_sold, f"${revenue:.2f}", f"${avg_price:.2f}"
-            ))
+        
+        self.sales_binding.sync(sales_data)
         
         # Update summary
         summary_text = (f"Period: {period} | "
@@ -270,38 +279,21 @@ class ReportsFrame(ttk.Frame):
                        f"Total Items Sold: {total_quantity}")
         self.sales_summary_label.config(text=summary_text)
     
+    def make_sales_item(self, sale):
+        """Treeview values and tags for a sales summary row"""
+        product_name, quantity_sold, revenue = sale
+        avg_price = revenue / quantity_sold if quantity_sold > 0 else 0
+        
+        return (product_name, quantity_sold, f"${revenue:.2f}", f"${avg_price:.2f}"), ()
+    
     def refresh_low_stock_report(self, event=None):
         """Refresh low stock report"""
-        # Clear existing items
-        for item in self.low_stock_tree.get_children():
-            self.low_stock_tree.delete(item)
-        
-        # Load low stock products
         low_stock_products = self.product_model.get_low_stock_products()
+        self.low_stock_binding.sync(low_stock_products)
         
-        critical_count = 0  # Out of stock
-        warning_count = 0   # Low stock
-        
-        for product in low_stock_products:
-            product_id, name, description, category, price, quantity, min_stock, supplier, created_at, updated_at = product
-            
-            shortage = min_stock - quantity
-            
-            if quantity <= 0:
-                critical_count += 1
-                tags = ['critical']
-            else:
-                warning_count += 1
-                tags = ['warning']
-            
-            self.low_stock_tree.insert('', tk.END, values=(
-                name, category or "N/A", quantity, min_stock, 
-                shortage, supplier or "N/A"
-            ), tags=tags)
-        
-        # Configure tag colors
-        self.low_stock_tree.tag_configure('critical', background='#ffcccc')
-        self.low_stock_tree.tag_configure('warning', background='#fff2cc')
+        # Count the rows listed: inventory_totals also counts products at zero
+        # stock that have no (or a negative) minimum level, which are not listed
+        critical_count, warning_count = self.count_alerts(low_stock_products)
         
         # Update summary
         total_alerts = len(low_stock_products)
@@ -310,120 +302,167 @@ class ReportsFrame(ttk.Frame):
                        f"Warning (Low Stock): {warning_count}")
         self.low_stock_summary_label.config(text=summary_text)
     
+    @staticmethod
+    def count_alerts(low_stock_products):
+        """(critical, warning) counts of low stock product rows"""
+        critical_count = sum(1 for product in low_stock_products if product[5] <= 0)
+        return critical_count, len(low_stock_products) - critical_count
+    
+    def make_low_stock_item(self, product):
+        """Treeview values and tags for a low stock product row"""
+        product_id, name, description, category, price, quantity, min_stock, supplier, created_at, updated_at = product
+        
+        shortage = min_stock - quantity
+        
+        if quantity <= 0:
+            tags = ['critical']
+        else:
+            tags = ['warning']
+        
+        return (name, category or "N/A", quantity, min_stock, 
+                shortage, supplier or "N/A"), tags
+    
     def export_inventory_report(self):
         """Export inventory report to CSV"""
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
-                title="Save Inventory Report"
-            )
-            
-            if not filename:
-                return
-            
-            products = self.product_model.get_all_products()
+        def make_row(product):
+            name, description, category, price, quantity, min_stock, supplier = product[1:8]
+            value = price * quantity
             
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Write header
-                writer.writerow(['Product Name', 'Category', 'Current Stock', 'Min Stock', 
-                               'Price', 'Total Value', 'Supplier', 'Status'])
-                
-                # Write data
-                for product in products:
-                    name, description, category, price, quantity, min_stock, supplier = product[1:8]
-                    value = price * quantity
-                    
-                    if quantity <= 0:
-                        status = "Out of Stock"
-                    elif quantity <= min_stock:
-                        status = "Low Stock"
-                    else:
-                        status = "In Stock"
-                    
-                    writer.writerow([name, category or "N/A", quantity, min_stock, 
-                                   f"${price:.2f}", f"${value:.2f}", supplier or "N/A", status])
+            if quantity <= 0:
+                status = "Out of Stock"
+            elif quantity <= min_stock:
+                status = "Low Stock"
+            else:
+                status = "In Stock"
             
-            messagebox.showinfo("Success", f"Inventory report exported to {filename}")
-        
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export report: {str(e)}")
+            return [name, category or "N/A", quantity, min_stock, 
+                    f"${price:.2f}", f"${value:.2f}", supplier or "N/A", status]
+        
+        self.start_export(
+            "Inventory",
+            ['Product Name', 'Category', 'Current Stock', 'Min Stock', 
+             'Price', 'Total Value', 'Supplier', 'Status'],
+            self.product_model.iter_products,
+            make_row,
+            total=self.product_model.get_inventory_totals()['total_products']
+        )
     
     def export_sales_report(self):
         """Export sales report to CSV"""
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
-                title="Save Sales Report"
-            )
-            
-            if not filename:
-                return
-            
-            # Calculate date range
-            period = self.period_var.get()
-            start_date = None
-            
-            if period == "Last 7 Days":
-                start_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-            elif period == "Last 30 Days":
-                start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-            elif period == "Last 90 Days":
-                start_date = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
-            
-            sales_data = self.transaction_model.get_sales_summary(start_date)
-            
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Write header
-                writer.writerow(['Product Name', 'Quantity Sold', 'Total Revenue', 'Average Price'])
-                
-                # Write data
-                for sale in sales_data:
-                    product_name, quantity_sold, revenue = sale
-                    avg_price = revenue / quantity_sold if quantity_sold > 0 else 0
-                    writer.writerow([product_name, quantity_sold, f"${revenue:.2f}", f"${avg_price:.2f}"])
-            
-            messagebox.showinfo("Success", f"Sales report exported to {filename}")
+        # Calculate date range
+        period = self.period_var.get()
+        start_date = None
+        
+        if period == "Last 7 Days":
+            start_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+        elif period == "Last 30 Days":
+            start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        elif period == "Last 90 Days":
+            start_date = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
         
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export report: {str(e)}")
+        def make_row(sale):
+            product_name, quantity_sold, revenue = sale
+            avg_price = revenue / quantity_sold if quantity_sold > 0 else 0
+            return [product_name, quantity_sold, f"${revenue:.2f}", f"${avg_price:.2f}"]
+        
+        self.start_export(
+            "Sales",
+            ['Product Name', 'Quantity Sold', 'Total Revenue', 'Average Price'],
+            lambda: self.transaction_model.iter_sales_summary(start_date),
+            make_row
+        )
     
     def export_low_stock_report(self):
         """Export low stock report to CSV"""
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
-                title="Save Low Stock Report"
-            )
-            
-            if not filename:
-                return
-            
-            low_stock_products = self.product_model.get_low_stock_products()
+        def make_row(product):
+            name, description, category, price, quantity, min_stock, supplier = product[1:8]
+            shortage = min_stock - quantity
+            status = "Out of Stock" if quantity <= 0 else "Low Stock"
             
+            return [name, category or "N/A", quantity, min_stock, 
+                    shortage, supplier or "N/A", status]
+        
+        self.start_export(
+            "Low Stock",
+            ['Product Name', 'Category', 'Current Stock', 'Min Stock', 
+             'Shortage', 'Supplier', 'Status'],
+            self.product_model.iter_low_stock_products,
+            make_row,
+            total=self.product_model.count_low_stock_products()
+        )
+    
+    def start_export(self, title, header, batches, make_row, total=None):
+        """Write a report to CSV on a background thread.
+        
+        batches() is called on the worker thread and yields lists of rows,
+        which are written as they arrive so memory stays flat. total, when
+        known, drives the progress bar.
+        """
+        if self.export_task and self.export_task.running:
+            messagebox.showwarning("Warning", "An export is already running")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            title=f"Save {title} Report"
+        )
+        
+        if not filename:
+            return
+        
+        def work(progress, cancel_event):
+            written = 0
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.writer(csvfile)
-                
-                # Write header
-                writer.writerow(['Product Name', 'Category', 'Current Stock', 'Min Stock', 
-                               'Shortage', 'Supplier', 'Status'])
-                
-                # Write data
-                for product in low_stock_products:
-                    name, description, category, price, quantity, min_stock, supplier = product[1:8]
-                    shortage = min_stock - quantity
-                    status = "Out of Stock" if quantity <= 0 else "Low Stock"
-                    
-                    writer.writerow([name, category or "N/A", quantity, min_stock, 
-                                   shortage, supplier or "N/A", status])
+                writer.writerow(header)
+                for batch in batches():
+                    writer.writerows(make_row(row) for row in batch)
+                    written += len(batch)
+                    progress(written, total)
+                    if cancel_event.is_set():
+                        break
             
-            messagebox.showinfo("Success", f"Low stock report exported to {filename}")
-        
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export report: {str(e)}")
+            if cancel_event.is_set():
+                os.remove(filename)
+            return written, cancel_event.is_set()
+        
+        def on_done(result):
+            self.export_progress.stop()
+            self.export_frame.pack_forget()
+            written, cancelled = result
+            if cancelled:
+                messagebox.showinfo("Cancelled", f"{title} report export cancelled")
+            else:
+                messagebox.showinfo("Success", 
+                                  f"{title} report exported to {filename} ({written} rows)")
+        
+        def on_error(error):
+            self.export_progress.stop()
+            self.export_frame.pack_forget()
+            messagebox.showerror("Error", f"Failed to export report: {str(error)}")
+        
+        if total:
+            self.export_progress.config(mode='determinate', value=0)
+        else:
+            self.export_progress.config(mode='indeterminate')
+            self.export_progress.start()
+        self.export_label.config(text=f"Exporting {title.lower()} report...")
+        self.export_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
+        
+        self.export_task = BackgroundTask(self, work, on_done, self.on_export_progress, on_error).start()
+    
+    def on_export_progress(self, written, total):
+        if total:
+            self.export_progress['value'] = min(100, 100 * written / total)
+        self.export_label.config(text=f"Exported {written} rows...")
+    
+    def cancel_export(self):
+        if self.export_task:
+            self.export_task.cancel()
+            self.export_label.config(text="Cancelling...")
+    
+    def destroy(self):
+        if self.export_task:
+            self.export_task.cancel()
+        super().destroy()
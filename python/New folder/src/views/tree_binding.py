@@ -0,0 +1,85 @@
+import tkinter as tk
+
+
+class TreeBinding:
+    """Keep a ttk.Treeview in step with a list of rows keyed by row id.
+    
+    Items use the row id as their Treeview iid, so sync() only deletes,
+    inserts, updates or moves the rows that actually changed. Untouched
+    items keep their selection and the view keeps its scroll position.
+    
+    make_item(row) returns the (values, tags) to show; row_id(row) defaults
+    to the first column (the primary key in every model query).
+    """
+    
+    def __init__(self, tree, make_item, row_id=None):
+        self.tree = tree
+        self.make_item = make_item
+        self.row_id = row_id or (lambda row: row[0])
+        
+        # iid -> (values, tags) last written to the tree
+        self.rendered = {}
+    
+    def iids(self, rows):
+        """Treeview iids for rows; repeated ids get a #n suffix"""
+        seen = {}
+        iids = []
+        for row in rows:
+            iid = str(self.row_id(row))
+            count = seen.get(iid, 0)
+            seen[iid] = count + 1
+            iids.append(iid if count == 0 else f"{iid}#{count}")
+        return iids
+    
+    def sync(self, rows):
+        """Make the tree show rows, in order, with as few changes as possible"""
+        iids = self.iids(rows)
+        wanted = set(iids)
+        
+        stale = [iid for iid in self.tree.get_children() if iid not in wanted]
+        if stale:
+            self.delete(stale)
+        
+        current = list(self.tree.get_children())
+        in_order = current == [iid for iid in iids if iid in self.rendered]
+        
+        for index, (iid, row) in enumerate(zip(iids, rows)):
+            item = self.make_item(row)
+            if iid not in self.rendered:
+                self.tree.insert('', index, iid=iid, values=item[0], tags=item[1])
+            else:
+                if self.rendered[iid] != item:
+                    self.tree.item(iid, values=item[0], tags=item[1])
+                if not in_order:
+                    self.tree.move(iid, '', index)
+            self.rendered[iid] = item
+        
+        return iids
+    
+    def insert(self, rows, index=tk.END):
+        """Insert rows at index (e.g. a newly fetched page) and return their iids.
+        
+        A row that is already in the tree, because it moved into the fetched
+        range after it was loaded, is moved to index and updated instead.
+        """
+        iids = self.iids(rows)
+        for offset, (iid, row) in enumerate(zip(iids, rows)):
+            item = self.make_item(row)
+            position = index if index == tk.END else index + offset
+            if iid in self.rendered and self.tree.exists(iid):
+                self.tree.move(iid, '', position)
+                if self.rendered[iid] != item:
+                    self.tree.item(iid, values=item[0], tags=item[1])
+            else:
+                self.tree.insert('', position, iid=iid, values=item[0], tags=item[1])
+            self.rendered[iid] = item
+        return iids
+    
+    def delete(self, iids):
+        self.tree.delete(*iids)
+        for iid in iids:
+            self.rendered.pop(iid, None)
+    
+    def clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self.rendered.clear()
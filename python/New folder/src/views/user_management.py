@@ -2,11 +2,14 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from ..models.user import User
 from ..utils.validators import Validator
+from ..utils.background import BackgroundTask
+from .tree_binding import TreeBinding
 
 class UserManagementFrame(ttk.Frame):
-    def __init__(self, parent, user):
+    def __init__(self, parent, user, changes):
         super().__init__(parent)
         self.current_user = user
+        self.changes = changes
         self.user_model = User()
         
         # Only allow admin access
@@ -17,6 +20,7 @@ class UserManagementFrame(ttk.Frame):
         
         self.setup_ui()
         self.refresh()
+        changes.subscribe(('users',), self.refresh, self)
     
     def setup_ui(self):
         # Title
@@ -44,6 +48,7 @@ class UserManagementFrame(ttk.Frame):
         # Scrollbar
         users_scroll = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.users_tree.yview)
         self.users_tree.configure(yscrollcommand=users_scroll.set)
+        self.users_binding = TreeBinding(self.users_tree, self.make_user_item)
         
         self.users_tree
 
@@ -59,21 +64,18 @@ class UserManagementFrame(ttk.Frame):
     
     def refresh(self):
         """Refresh users list"""
-        # Clear existing items
-        for item in self.users_tree.get_children():
-            self.users_tree.delete(item)
-        
         # Load users
         users = self.user_model.get_all_users()
-        for user in users:
-            user_id, username, role, created_at = user
-            
-            # Format date
-            date_formatted = created_at[:19] if created_at else ""
-            
-            self.users_tree.insert('', tk.END, values=(
-                user_id, username, role.title(), date_formatted
-            ))
+        self.users_binding.sync(users)
+    
+    def make_user_item(self, user):
+        """Treeview values and tags for a user row"""
+        user_id, username, role, created_at = user
+        
+        # Format date
+        date_formatted = created_at[:19] if created_at else ""
+        
+        return (user_id, username, role.title(), date_formatted), ()
     
     def show_context_menu(self, event):
         """Show context menu on right-click"""
@@ -83,7 +85,7 @@ class UserManagementFrame(ttk.Frame):
     
     def show_add_user_dialog(self):
         """Show add user dialog"""
-        AddUserDialog(self, self.user_model, self.refresh)
+        AddUserDialog(self, self.user_model, self.changes.check)
     
     def delete_user(self):
         """Delete selected user"""
@@ -170,7 +172,8 @@ class AddUserDialog:
         btn_frame = ttk.Frame(main_frame)
         btn_frame.grid(row=4, column=0, columnspan=2, pady=20)
         
-        ttk.Button(btn_frame, text="Create User", command=self.create_user).pack(side=tk.LEFT, padx=5)
+        self.create_btn = ttk.Button(btn_frame, text="Create User", command=self.create_user)
+        self.create_btn.pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Cancel", command=self.dialog.destroy).pack(side=tk.LEFT, padx=5)
     
     def create_user(self):
@@ -194,10 +197,24 @@ class AddUserDialog:
             messagebox.showerror("Error", "Passwords do not match")
             return
         
-        # Create user
-        if self.user_model.create_user(username, password, role):
+        # Create user (hashing the password takes a moment)
+        self.create_btn.config(state='disabled', text="Creating...")
+        BackgroundTask(
+            self.dialog,
+            lambda progress, cancel_event: self.user_model.create_user(username, password, role),
+            on_done=self.on_user_created,
+            on_error=self.on_create_error
+        ).start()
+    
+    def on_user_created(self, created):
+        self.create_btn.config(state='normal', text="Create User")
+        if created:
             messagebox.showinfo("Success", "User created successfully!")
             self.refresh_callback()
             self.dialog.destroy()
         else:
             messagebox.showerror("Error", "Username already exists!")
+    
+    def on_create_error(self, error):
+        self.create_btn.config(state='normal', text="Create User")
+        messagebox.showerror("Error", f"Failed to create user: {str(error)}")
@@ -0,0 +1,23 @@
+"""
+Shared fixtures. Tests run from a fresh temporary directory, so the models'
+default data/inventory.db is a new database migrated to the latest schema.
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.models.database import Database
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run the test in an empty directory; close its connections afterwards"""
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    Database.close_all()
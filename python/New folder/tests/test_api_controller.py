@@ -0,0 +1,135 @@
+"""
+ApiController.handle() with parsed requests, without the HTTP server.
+"""
+
+import json
+
+import pytest
+
+from src.controllers.api_controller import ApiController
+
+
+@pytest.fixture
+def api(workdir):
+    controller = ApiController()
+    status, payload = controller.handle('POST', '/api/login', {},
+                                       json.dumps({'username': 'admin', 'password': 'admin123'}))
+    assert status == 200
+    controller.authorization = f"Bearer {payload['token']}"
+    return controller
+
+
+def get(api, path, **query):
+    return api.handle('GET', path, {key: [str(value)] for key, value in query.items()}, b'',
+                      api.authorization)
+
+
+def post(api, path, body):
+    return api.handle('POST', path, {}, json.dumps(body).encode(), api.authorization)
+
+
+def add_products(api, *stock):
+    return [api.product_model.add_product(f'Item {n}', '', 'Test', 2.0, quantity, 5, '')
+            for n, quantity in enumerate(stock)]
+
+
+@pytest.mark.parametrize('path, query', [
+    ('/api/reports/sales', {'start_date': 'yesterday'}),
+    ('/api/reports/sales', {'end_date': '2024-13-01'}),
+    ('/api/transactions', {'start_date': '24-01-01'}),
+    ('/api/transactions', {'after_id': 5}),
+    ('/api/transactions', {'after_id': 5, 'after_created_at': 'x'}),
+])
+def test_malformed_dates_are_rejected(api, path, query):
+    status, payload = get(api, path, **query)
+    assert status == 400
+    assert 'must be a date' in payload['error']
+
+
+def test_dates_and_timestamps_are_accepted(api):
+    assert get(api, '/api/reports/sales', start_date='2024-01-01')[0] == 200
+    assert get(api, '/api/reports/sales', start_date='2024-01-01 08:00:00',
+               end_date='')[0] == 200
+    assert get(api, '/api/transactions', after_id=5,
+               after_created_at='2024-01-01 08:00:00')[0] == 200
+
+
+def test_requests_need_a_valid_token(api):
+    assert api.handle('GET', '/api/products', {}, b'')[0] == 401
+    assert api.handle('GET', '/api/products', {}, b'', 'Bearer wrong')[0] == 401
+    status, payload = api.handle('POST', '/api/login', {},
+                                 json.dumps({'username': 'admin', 'password': 'wrong'}))
+    assert status == 401 and 'error' in payload
+    
+    assert get(api, '/api/nowhere')[0] == 404
+    assert api.handle('DELETE', '/api/products', {}, b'', api.authorization)[0] == 405
+    assert api.handle('POST', '/api/stock', {}, b'not json', api.authorization)[0] == 400
+
+
+def test_products_are_paged_and_searchable(api):
+    add_products(api, 10, 3, 0)
+    
+    status, first = get(api, '/api/products', limit=2)
+    assert status == 200
+    assert [product['name'] for product in first['products']] == ['Item 0', 'Item 1']
+    status, rest = get(api, '/api/products', limit=2, **first['next'])
+    assert [product['name'] for product in rest['products']] == ['Item 2']
+    assert rest['next'] is None
+    
+    assert [product['name'] for product in get(api, '/api/products', search='item')[1]['products']]
+    assert get(api, '/api/products', limit='many')[0] == 400
+    
+    low = get(api, '/api/products/low-stock')[1]['products']
+    assert sorted(product['name'] for product in low) == ['Item 1', 'Item 2']
+    
+    product_id = first['products'][0]['id']
+    assert get(api, f'/api/products/{product_id}')[1]['quantity'] == 10
+    assert get(api, '/api/products/9999')[0] == 404
+
+
+def test_stock_changes_and_sales(api):
+    apple, pear = add_products(api, 10, 4)
+    
+    status, payload = post(api, '/api/stock', {'product_id': apple, 'quantity': 3})
+    assert status == 200 and payload['quantity_change'] == -3
+    assert post(api, '/api/stock', {'product_id': apple, 'quantity': 5,
+                                    'transaction_type': 'restock'})[1]['quantity_change'] == 5
+    assert post(api, '/api/stock', {'product_id': apple, 'quantity': 50})[0] == 409
+    assert post(api, '/api/stock', {'product_id': apple, 'quantity': 1,
+                                    'transaction_type': 'gift'})[0] == 400
+    assert post(api, '/api/stock', {'product_id': apple, 'quantity': -1})[0] == 400
+    
+    # A basket is all or nothing
+    assert post(api, '/api/sales', {'items': [{'product_id': apple, 'quantity': 2},
+                                              {'product_id': pear, 'quantity': 9}]})[0] == 409
+    assert post(api, '/api/sales', {'items': [{'product_id': apple, 'quantity': 2},
+                                              {'product_id': pear, 'quantity': 4}]})[0] == 200
+    assert post(api, '/api/sales', {'items': []})[0] == 400
+    
+    quantities = {product['id']: product['quantity']
+                  for product in get(api, '/api/products')[1]['products']}
+    assert quantities == {apple: 10, pear: 0}
+    
+    history = get(api, '/api/transactions')[1]['transactions']
+    assert [(row['transaction_type'], row['quantity']) for row in history] == [
+        ('sale', 4), ('sale', 2), ('restock', 5), ('sale', 3)]
+    since = get(api, '/api/transactions', since_id=history[-1]['id'])[1]['transactions']
+    assert len(since) == 3 and all(row['username'] == 'admin' for row in since)
+    
+    alerts = get(api, '/api/alerts')[1]['alerts']
+    assert [(alert['product'], alert['state']) for alert in alerts] == [('Item 1', 'low'),
+                                                                         ('Item 1', 'out')]
+    assert get(api, '/api/alerts', since_id=alerts[-1]['id'])[1]['alerts'] == []
+
+
+def test_reports(api):
+    apple, pear = add_products(api, 10, 4)
+    post(api, '/api/sales', {'items': [{'product_id': apple, 'quantity': 2}]})
+    
+    inventory = get(api, '/api/reports/inventory')[1]
+    assert inventory['total_products'] == 2
+    assert inventory['total_value'] == pytest.approx(2.0 * (8 + 4))
+    assert inventory['low_stock_count'] == 1
+    
+    sales = get(api, '/api/reports/sales')[1]['sales']
+    assert sales == [{'product': 'Item 0', 'quantity_sold': 2, 'revenue': 4.0}]
@@ -0,0 +1,154 @@
+"""
+Archiving moves old transactions into per-year files without changing
+what the history, the paging and the sales summaries return.
+"""
+
+import os
+import sqlite3
+
+import pytest
+
+from src.models.archive import TransactionArchive
+from src.models.product import Product
+from src.models.transaction import Transaction
+
+DAYS = ['2022-02-01', '2022-11-30', '2023-06-15', '2023-12-31', '2024-01-01', '2024-05-20']
+
+
+def seed(product):
+    apple = product.add_product('Apple', '', 'Fruit', 1.0, 100, 5, '')
+    pear = product.add_product('Pear', '', 'Fruit', 2.0, 100, 5, '')
+    conn = product.db.get_connection()
+    for number, day in enumerate(DAYS):
+        for product_id, transaction_type in ((apple, 'sale'), (pear, 'sale'), (apple, 'restock')):
+            conn.execute('''
+                INSERT INTO transactions (product_id, transaction_type, quantity, price, user_id,
+                                          created_at)
+                VALUES (?, ?, ?, ?, 1, ?)
+            ''', (product_id, transaction_type, number + 1, 1.5, f'{day} 12:00:00'))
+    conn.commit()
+    return apple
+
+
+def archived_ids(archive, year):
+    conn = sqlite3.connect(archive.path(year))
+    ids = [row[0] for row in conn.execute('SELECT id FROM transactions')]
+    conn.close()
+    return ids
+
+
+def all_pages(transaction, **filters):
+    ids = []
+    after = None
+    while True:
+        rows = transaction.get_transactions_page(after=after, limit=4, **filters)
+        ids += [row[0] for row in rows]
+        if len(rows) < 4:
+            return ids
+        after = Transaction.page_key(rows[-1])
+
+
+def snapshot(transaction, apple):
+    return {
+        'history': sorted(row[0] for row in transaction.get_all_transactions()),
+        'product history': sorted(row[0] for row in transaction.get_transactions_by_product(apple)),
+        'pages': all_pages(transaction),
+        'sale pages': all_pages(transaction, transaction_type='sale'),
+        'all time': transaction.get_sales_summary(),
+        '2022': transaction.get_sales_summary('2022-01-01', '2023-01-01'),
+        'partial day': transaction.get_sales_summary('2023-06-15 00:00:00', '2024-01-01 13:00:00'),
+    }
+
+
+def test_archiving_keeps_every_read_the_same(workdir):
+    product = Product()
+    transaction = Transaction()
+    apple = seed(product)
+    before = snapshot(transaction, apple)
+    
+    archive = TransactionArchive(product.db)
+    moved = archive.archive_before('2024-01-01')
+    assert moved == {2022: 6, 2023: 6}
+    assert archive.years() == [2023, 2022]
+    assert os.path.exists(archive.path(2022)) and os.path.exists(archive.path(2023))
+    assert archive.newest_archived() == '2023-12-31 12:00:00'
+    
+    conn = product.db.get_connection()
+    assert conn.execute("SELECT MIN(created_at) FROM transactions").fetchone()[0] >= '2024-01-01'
+    
+    assert snapshot(transaction, apple) == before
+    assert transaction.check_sales_rollup() == []
+    
+    transaction.rebuild_sales_rollup()
+    assert snapshot(transaction, apple) == before
+
+
+def test_archiving_again_moves_nothing(workdir):
+    product = Product()
+    seed(product)
+    archive = TransactionArchive(product.db)
+    archive.archive_before('2023-01-01')
+    
+    assert archive.archive_before('2023-01-01') == {}
+    assert archive.archive_before('2024-01-01') == {2023: 6}
+    assert Transaction().check_sales_rollup() == []
+
+
+def test_failure_between_copy_and_delete_loses_nothing(workdir, monkeypatch):
+    product = Product()
+    transaction = Transaction()
+    apple = seed(product)
+    before = snapshot(transaction, apple)
+    archive = TransactionArchive(product.db)
+    
+    def crash(*args):
+        raise RuntimeError("crashed before the delete")
+    with monkeypatch.context() as patch:
+        patch.setattr(TransactionArchive, '_delete', crash)
+        with pytest.raises(RuntimeError):
+            archive.archive_before('2024-01-01')
+    
+    conn = product.db.get_connection()
+    assert conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0] == 3 * len(DAYS)
+    assert len(archived_ids(archive, 2022)) == 6 and len(archived_ids(archive, 2023)) == 6
+    
+    assert archive.archive_before('2024-01-01') == {2022: 6, 2023: 6}
+    assert snapshot(transaction, apple) == before
+    assert transaction.check_sales_rollup() == []
+
+
+def test_rows_missing_from_the_archive_stay_in_main(workdir, monkeypatch):
+    product = Product()
+    seed(product)
+    archive = TransactionArchive(product.db)
+    
+    # As if the archive file's commit was lost while main's went through
+    with monkeypatch.context() as patch:
+        patch.setattr(TransactionArchive, '_copy', lambda *args: None)
+        assert archive.archive_before('2024-01-01') == {2022: 0, 2023: 0}
+    conn = product.db.get_connection()
+    assert conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0] == 3 * len(DAYS)
+    
+    assert archive.archive_before('2024-01-01') == {2022: 6, 2023: 6}
+
+
+def test_summary_reads_more_years_than_can_be_attached(workdir):
+    product = Product()
+    transaction = Transaction()
+    apple = product.add_product('Apple', '', 'Fruit', 1.0, 100, 5, '')
+    years = range(2010, 2011 + TransactionArchive.MAX_ATTACHED)
+    conn = product.db.get_connection()
+    for year in years:
+        conn.execute('''
+            INSERT INTO transactions (product_id, transaction_type, quantity, price, user_id,
+                                      created_at)
+            VALUES (?, 'sale', 1, 2.0, 1, ?)
+        ''', (apple, f'{year}-06-01 12:00:00'))
+    conn.commit()
+    
+    archive = TransactionArchive(product.db)
+    assert len(archive.archive_before('2024-01-01')) == len(years)
+    
+    expected = [('Apple', len(years), 2.0 * len(years))]
+    assert transaction.get_sales_summary('2000-01-01 00:00:00', '2030-01-01 00:00:00') == expected
+    assert transaction.get_sales_summary('2000-01-01 00:00:00', '2030-01-01 00:00:00') == expected
@@ -0,0 +1,132 @@
+"""
+Change counters bumped by triggers, and ChangeMonitor calling back only
+the views whose tables changed, with stand-ins for the Tk widgets.
+"""
+
+import sqlite3
+
+from src.models.database import Database
+from src.models.product import Product
+from src.models.user import User
+from src.utils.change_monitor import ChangeMonitor
+
+
+class FakeWidget:
+    """A widget that can be shown or hidden, with a manual after() queue"""
+    
+    def __init__(self, master=None, viewable=True):
+        self.master = master
+        self.viewable = viewable
+        self.bindings = []
+        self.scheduled = []
+    
+    def winfo_toplevel(self):
+        widget = self
+        while widget.master is not None:
+            widget = widget.master
+        return widget
+    
+    def winfo_viewable(self):
+        widget = self
+        while widget is not None:
+            if not widget.viewable:
+                return False
+            widget = widget.master
+        return True
+    
+    def bind(self, sequence, func, add=None):
+        self.bindings.append(func)
+    
+    def show(self):
+        self.viewable = True
+        for func in self.bindings:
+            func(None)
+    
+    def after(self, ms, func):
+        self.scheduled.append(func)
+        return len(self.scheduled)
+    
+    def after_cancel(self, identifier):
+        self.scheduled.clear()
+    
+    def run_scheduled(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for func in scheduled:
+            func()
+
+
+def test_every_row_change_bumps_its_table(workdir):
+    db = Database()
+    product = Product()
+    before = db.table_versions()
+    
+    apple = product.add_product('Apple', '', 'Fruit', 1.0, 10, 2, '')
+    product.update_stock(apple, -1, 'sale', 1)
+    product.delete_product(apple)
+    User().create_user('clerk', 'pass')
+    
+    after = db.table_versions()
+    # insert, stock update, delete
+    assert after['products'] == before['products'] + 3
+    assert after['transactions'] == before['transactions'] + 1
+    assert after['users'] == before['users'] + 1
+
+
+def test_only_subscribers_of_changed_tables_are_called(workdir):
+    monitor = ChangeMonitor(FakeWidget())
+    calls = []
+    monitor.subscribe(['products'], lambda: calls.append('products'))
+    monitor.subscribe(['transactions', 'users'], lambda: calls.append('history'))
+    
+    assert monitor.check() == set()
+    Product().add_product('Apple', '', 'Fruit', 1.0, 10, 2, '')
+    assert monitor.check() == {'products'}
+    assert calls == ['products']
+    
+    apple = Product().add_product('Pear', '', 'Fruit', 1.0, 10, 2, '')
+    Product().update_stock(apple, -1, 'sale', 1)
+    assert monitor.check() == {'products', 'transactions'}
+    assert calls == ['products', 'products', 'history']
+    assert monitor.check() == set()
+
+
+def test_hidden_views_refresh_once_when_shown(workdir):
+    root = FakeWidget()
+    tab = FakeWidget(FakeWidget(root), viewable=False)
+    monitor = ChangeMonitor(root)
+    calls = []
+    monitor.subscribe(['products'], lambda: calls.append('tab'), tab)
+    
+    product = Product()
+    for name in ('Apple', 'Pear'):
+        product.add_product(name, '', 'Fruit', 1.0, 10, 2, '')
+        monitor.check()
+    assert calls == []
+    
+    tab.show()
+    assert calls == ['tab']
+    tab.show()
+    assert calls == ['tab']
+
+
+def test_polling_picks_up_writes_from_other_connections(workdir):
+    root = FakeWidget()
+    monitor = ChangeMonitor(root)
+    calls = []
+    monitor.subscribe(['products'], lambda: calls.append('products'))
+    monitor.start()
+    
+    root.run_scheduled()
+    assert calls == []
+    
+    conn = sqlite3.connect('data/inventory.db')
+    conn.execute("INSERT INTO products (name, price, quantity) VALUES ('Apple', 1.0, 5)")
+    conn.commit()
+    conn.close()
+    root.run_scheduled()
+    assert calls == ['products']
+    root.run_scheduled()
+    assert calls == ['products']
+    
+    monitor.stop()
+    assert root.scheduled == []
@@ -0,0 +1,217 @@
+"""
+DebouncedQuery replayed against simulated keystroke timelines. A fake
+after()/after_cancel() clock stands in for Tk, so the debounce window and
+result polling run on simulated time while the query itself runs on the
+real worker thread.
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.utils.background import DebouncedQuery
+
+DELAY_MS = 250
+
+
+class FakeClock:
+    """The after()/after_cancel() part of a Tk widget, on simulated time"""
+    
+    def __init__(self):
+        self.now = 0
+        self._tasks = {}
+        self._next_id = 0
+    
+    def after(self, ms, func, *args):
+        self._next_id += 1
+        self._tasks[self._next_id] = (self.now + ms, self._next_id, func, args)
+        return self._next_id
+    
+    def after_cancel(self, task_id):
+        self._tasks.pop(task_id, None)
+    
+    def advance(self, ms):
+        """Run every callback due within the next ms, in order"""
+        end = self.now + ms
+        while True:
+            due = [task for task in self._tasks.values() if task[0] <= end]
+            if not due:
+                break
+            when, task_id, func, args = min(due)
+            del self._tasks[task_id]
+            self.now = when
+            func(*args)
+        self.now = end
+    
+    def run_to(self, when):
+        """Advance to when in poll-sized steps, like advance(), but give the
+        worker thread a moment of real time after each step"""
+        while self.now < when:
+            self.advance(min(DebouncedQuery.POLL_INTERVAL_MS, when - self.now))
+            time.sleep(0.002)
+    
+    def run_until(self, condition, timeout=5.0):
+        """Advance in poll-sized steps until condition() holds, giving the
+        worker thread real time to finish between steps"""
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise AssertionError("condition not reached")
+            self.advance(DebouncedQuery.POLL_INTERVAL_MS)
+            time.sleep(0.001)
+
+
+class Search:
+    """A query that records its calls; terms in `held` block until released"""
+    
+    def __init__(self):
+        self.calls = []
+        self.applied = []
+        self.errors = []
+        self.held = {}
+    
+    def hold(self, term):
+        self.held[term] = threading.Event()
+        return self.held[term]
+    
+    def query(self, term):
+        self.calls.append(term)
+        if term in self.held:
+            self.held[term].wait(5)
+        if term == 'boom':
+            raise ValueError(term)
+        return f'results for {term}'
+
+
+@pytest.fixture
+def search():
+    clock = FakeClock()
+    search = Search()
+    search.clock = clock
+    search.debounced = DebouncedQuery(clock, search.query, search.applied.append,
+                                      delay_ms=DELAY_MS, on_error=search.errors.append)
+    yield search
+    for event in search.held.values():
+        event.set()
+    search.debounced.close()
+
+
+def replay(search, timeline):
+    """Submit (ms, text) keystrokes at their times on the fake clock"""
+    for at, text in timeline:
+        search.clock.run_to(at)
+        search.debounced.submit(text)
+
+
+def settle(search, ms=1000):
+    """Let the clock run well past any debounce window and poll"""
+    search.clock.run_to(search.clock.now + ms)
+
+
+def test_fast_typing_runs_only_the_last_query(search):
+    replay(search, [(0, 'a'), (90, 'ap'), (180, 'app'), (270, 'appl'), (360, 'apple')])
+    search.clock.run_until(lambda: search.applied)
+    settle(search)
+    
+    assert search.calls == ['apple']
+    assert search.applied == ['results for apple']
+
+
+def test_nothing_runs_before_the_window_expires(search):
+    replay(search, [(0, 'a'), (200, 'ap')])
+    search.clock.advance(DELAY_MS - 1)
+    time.sleep(0.05)
+    assert search.calls == []
+    
+    search.clock.run_until(lambda: search.applied)
+    assert search.applied == ['results for ap']
+
+
+def test_pauses_run_one_query_per_pause(search):
+    replay(search, [(0, 'a'), (100, 'ap')])
+    search.clock.run_until(lambda: len(search.applied) == 1)
+    replay(search, [(600, 'app'), (700, 'appl')])
+    search.clock.run_until(lambda: len(search.applied) == 2)
+    replay(search, [(1200, 'apple')])
+    search.clock.run_until(lambda: len(search.applied) == 3)
+    settle(search)
+    
+    assert search.calls == ['ap', 'appl', 'apple']
+    assert search.applied == ['results for ap', 'results for appl', 'results for apple']
+
+
+def test_superseded_result_is_dropped(search):
+    slow = search.hold('ap')
+    replay(search, [(0, 'ap')])
+    search.clock.run_until(lambda: search.calls == ['ap'])
+    
+    # Typing goes on while the first query is still running
+    newest = search.hold('apple')
+    replay(search, [(search.clock.now + 10, 'apple')])
+    search.clock.run_to(search.clock.now + DELAY_MS)
+    slow.set()
+    search.clock.run_until(lambda: search.calls == ['ap', 'apple'])
+    
+    # The stale result is polled on its own and must not be shown
+    settle(search, 200)
+    assert search.applied == []
+    
+    newest.set()
+    search.clock.run_until(lambda: search.applied)
+    settle(search)
+    
+    assert search.calls == ['ap', 'apple']
+    assert search.applied == ['results for apple']
+
+
+def test_requests_queued_behind_a_slow_query_are_skipped(search):
+    slow = search.hold('a')
+    search.debounced.submit_now('a')
+    search.clock.run_until(lambda: search.calls == ['a'])
+    
+    for text in ('ap', 'app', 'appl'):
+        search.debounced.submit_now(text)
+    slow.set()
+    search.clock.run_until(lambda: search.applied)
+    settle(search)
+    
+    assert search.calls == ['a', 'appl']
+    assert search.applied == ['results for appl']
+
+
+def test_cancel_before_the_window_expires(search):
+    replay(search, [(0, 'a'), (100, 'ap')])
+    search.debounced.cancel()
+    settle(search)
+    
+    assert search.calls == []
+    assert search.applied == []
+
+
+def test_cancel_drops_a_query_in_flight(search):
+    slow = search.hold('ap')
+    replay(search, [(0, 'ap')])
+    search.clock.run_until(lambda: search.calls == ['ap'])
+    
+    search.debounced.cancel()
+    slow.set()
+    settle(search)
+    
+    assert search.applied == []
+
+
+def test_submit_now_skips_the_window(search):
+    search.debounced.submit_now('apple')
+    search.clock.run_until(lambda: search.applied)
+    
+    assert search.clock.now < DELAY_MS
+    assert search.applied == ['results for apple']
+
+
+def test_errors_go_to_on_error(search):
+    replay(search, [(0, 'boom')])
+    search.clock.run_until(lambda: search.errors)
+    
+    assert search.applied == []
+    assert [str(error) for error in search.errors] == ['boom']
@@ -0,0 +1,85 @@
+"""
+The inventory_totals row kept by triggers on products must match the
+figures aggregated from the products table after every kind of change.
+"""
+
+import pytest
+
+from src.models.product import Product
+from src.models.product_import import ProductImporter
+from src.views.reports import ReportsFrame
+
+
+def assert_totals_match(product):
+    kept = product.get_inventory_totals()
+    computed = product.compute_inventory_totals()
+    assert kept['total_value'] == pytest.approx(computed['total_value'])
+    kept.pop('total_value')
+    computed.pop('total_value')
+    assert kept == computed
+
+
+def test_totals_follow_product_changes(workdir):
+    product = Product()
+    assert_totals_match(product)
+    
+    apple = product.add_product('Apple', '', 'Fruit', 1.25, 50, 10, '')
+    pear = product.add_product('Pear', '', 'Fruit', 2.0, 5, 10, '')
+    empty = product.add_product('Plum', '', 'Fruit', 3.0, 0, 10, '')
+    assert_totals_match(product)
+    assert product.get_inventory_totals()['low_stock_count'] == 1
+    assert product.get_inventory_totals()['out_of_stock_count'] == 1
+    
+    product.update_stock(apple, -45, 'sale', 1)
+    product.update_stock(pear, -5, 'sale', 1)
+    product.update_stock(empty, 20, 'restock', 1)
+    product.update_stock_many([(apple, -1, 'sale', 1), (pear, 3, 'return', 1)])
+    assert_totals_match(product)
+    
+    product.update_product(apple, 'Apple', '', 'Fruit', 4.0, 3, 2, '')
+    product.delete_product(pear)
+    assert_totals_match(product)
+
+
+def test_totals_follow_an_import(workdir, tmp_path):
+    path = tmp_path / 'products.csv'
+    path.write_text('id,name,price,quantity,min_stock_level\n'
+                    ',Apple,1.00,10,2\n,Pear,2.00,0,2\n,Plum,0.50,1,2\n', encoding='utf-8')
+    ProductImporter().import_file(str(path))
+    path.write_text('id,name,price,quantity,min_stock_level\n'
+                    '1,Apple,1.50,1,2\n2,Pear,2.00,8,2\n', encoding='utf-8')
+    ProductImporter().import_file(str(path))
+    
+    product = Product()
+    assert_totals_match(product)
+    assert product.get_inventory_totals()['total_products'] == 3
+
+
+def test_rebuild_restores_drifted_totals(workdir):
+    product = Product()
+    product.add_product('Apple', '', 'Fruit', 1.0, 50, 10, '')
+    conn = product.db.get_connection()
+    conn.execute('UPDATE inventory_totals SET total_products = 99, total_value = -1')
+    conn.commit()
+    
+    assert product.rebuild_inventory_totals() == product.compute_inventory_totals()
+
+
+def test_low_stock_report_counts_match_its_list(workdir):
+    product = Product()
+    product.add_product('Apple', '', 'Fruit', 1.0, 5, 10, '')
+    product.add_product('Pear', '', 'Fruit', 1.0, 0, 10, '')
+    product.add_product('Plum', '', 'Fruit', 1.0, 50, 10, '')
+    listed = product.get_low_stock_products()
+    totals = product.get_inventory_totals()
+    assert ReportsFrame.count_alerts(listed) == (1, 1)
+    assert (totals['out_of_stock_count'], totals['low_stock_count']) == (1, 1)
+    
+    # Out of stock in the inventory summary, but not low stock alerts
+    product.add_product('Fig', '', 'Fruit', 1.0, 0, None, '')
+    product.add_product('Kiwi', '', 'Fruit', 1.0, 0, -1, '')
+    listed = product.get_low_stock_products()
+    assert sorted(row[1] for row in listed) == ['Apple', 'Pear']
+    assert ReportsFrame.count_alerts(listed) == (1, 1)
+    assert product.get_inventory_totals()['out_of_stock_count'] == 3
+    assert_totals_match(product)
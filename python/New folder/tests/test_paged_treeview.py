@@ -0,0 +1,232 @@
+"""
+PagedTreeview over a list-backed keyset query, with a stand-in for the
+parts of ttk.Treeview it uses.
+"""
+
+import bisect
+
+from src.views.paged_treeview import PagedTreeview
+
+
+class FakeTree:
+    """Items in order with their values; no scrolling, so everything fits"""
+    
+    def __init__(self):
+        self.items = []
+        self.values = {}
+    
+    def configure(self, **options):
+        pass
+    
+    def get_children(self):
+        return tuple(self.items)
+    
+    def insert(self, parent, index, iid, values, tags):
+        if iid in self.values:
+            raise RuntimeError(f"Item {iid} already exists")
+        if index == 'end':
+            self.items.append(iid)
+        else:
+            self.items.insert(index, iid)
+        self.values[iid] = values
+    
+    def item(self, iid, values, tags):
+        self.values[iid] = values
+    
+    def move(self, iid, parent, index):
+        self.items.remove(iid)
+        if index == 'end':
+            self.items.append(iid)
+        else:
+            self.items.insert(index, iid)
+    
+    def delete(self, *iids):
+        for iid in iids:
+            self.items.remove(iid)
+            del self.values[iid]
+    
+    def exists(self, iid):
+        return iid in self.values
+    
+    def index(self, iid):
+        return self.items.index(iid)
+    
+    def yview(self, *args):
+        return (0.0, 1.0)
+    
+    def yview_moveto(self, fraction):
+        pass
+    
+    def after_idle(self, func, *args):
+        func(*args)
+
+
+class FakeScrollbar:
+    def set(self, first, last):
+        pass
+
+
+class Catalog:
+    """Products as (id, name) rows, paged by name like get_products_page"""
+    
+    def __init__(self, names):
+        self.rows = []
+        for name in names:
+            self.add(name)
+    
+    def add(self, name):
+        row = (len(self.rows) + 1, name)
+        self.rows.append(row)
+        self.rows.sort(key=self.key)
+        return row
+    
+    def rename(self, old, new):
+        self.rows = sorted(((row[0], new if row[1] == old else row[1]) for row in self.rows),
+                           key=self.key)
+    
+    def remove(self, name):
+        self.rows = [row for row in self.rows if row[1] != name]
+    
+    @staticmethod
+    def key(row):
+        return (row[1], row[0])
+    
+    def fetch_page(self, after=None, before=None, limit=100):
+        keys = [self.key(row) for row in self.rows]
+        if before is not None:
+            end = bisect.bisect_left(keys, before)
+            return self.rows[max(0, end - limit):end]
+        start = 0 if after is None else bisect.bisect_right(keys, after)
+        return self.rows[start:start + limit]
+
+
+def make_view(catalog, page_size=3, max_pages=5):
+    tree = FakeTree()
+    view = PagedTreeview(tree, FakeScrollbar(), catalog.fetch_page, catalog.key,
+                         lambda row: ((row[1],), ()), page_size=page_size, max_pages=max_pages)
+    view.reset()
+    return view, tree
+
+
+def shown(tree):
+    return [tree.values[iid][0] for iid in tree.items]
+
+
+def test_refresh_keeps_the_last_rows_after_an_insert():
+    catalog = Catalog(['Apple', 'Banana', 'Date'])
+    view, tree = make_view(catalog, page_size=5)
+    assert shown(tree) == ['Apple', 'Banana', 'Date']
+    assert view.at_end
+    
+    catalog.add('Cherry')
+    view.refresh()
+    assert shown(tree) == ['Apple', 'Banana', 'Cherry', 'Date']
+    assert view.at_end
+    
+    view.refresh()
+    assert shown(tree) == ['Apple', 'Banana', 'Cherry', 'Date']
+
+
+def test_refresh_at_the_end_picks_up_more_than_a_page_of_inserts():
+    catalog = Catalog(['Apple', 'Banana'])
+    view, tree = make_view(catalog)
+    
+    for name in ('Cherry', 'Date', 'Elderberry', 'Fig'):
+        catalog.add(name)
+    view.refresh()
+    assert shown(tree) == ['Apple', 'Banana', 'Cherry', 'Date']
+    assert not view.at_end
+    
+    # The rest come in with the next page
+    view.on_yscroll(0.0, 1.0)
+    assert shown(tree) == ['Apple', 'Banana', 'Cherry', 'Date', 'Elderberry', 'Fig']
+    assert view.at_end
+
+
+def test_refresh_before_the_end_knows_more_rows_follow():
+    catalog = Catalog([f'Item {i:02}' for i in range(20)])
+    view, tree = make_view(catalog)
+    assert shown(tree) == ['Item 00', 'Item 01', 'Item 02']
+    assert not view.at_end
+    
+    catalog.remove('Item 01')
+    view.refresh()
+    assert shown(tree) == ['Item 00', 'Item 02', 'Item 03']
+    assert not view.at_end
+    
+    catalog.add('Item 00a')
+    view.refresh()
+    assert shown(tree) == ['Item 00', 'Item 00a', 'Item 02']
+    assert not view.at_end
+
+
+def test_refresh_after_deletes_at_the_end():
+    catalog = Catalog(['Apple', 'Banana', 'Cherry', 'Date'])
+    view, tree = make_view(catalog)
+    view.on_yscroll(0.0, 1.0)
+    assert shown(tree) == ['Apple', 'Banana', 'Cherry', 'Date']
+    
+    catalog.remove('Date')
+    view.refresh()
+    assert shown(tree) == ['Apple', 'Banana', 'Cherry']
+    assert view.at_end
+
+
+def test_rows_that_moved_into_an_unloaded_page_are_not_inserted_twice():
+    catalog = Catalog(['Apple', 'Banana', 'Cherry', 'Date', 'Elderberry', 'Fig', 'Grape'])
+    view, tree = make_view(catalog, max_pages=2)
+    assert shown(tree) == ['Apple', 'Banana', 'Cherry']
+    
+    # Another client renames a loaded row into the pages not loaded yet
+    catalog.rename('Banana', 'Eggplant')
+    view.on_yscroll(0.0, 1.0)
+    assert shown(tree) == ['Apple', 'Cherry', 'Date', 'Eggplant', 'Elderberry']
+    
+    # Dropping the first page keeps the row where it is now
+    view.on_yscroll(0.0, 1.0)
+    assert shown(tree) == ['Date', 'Eggplant', 'Elderberry', 'Fig', 'Grape']
+    assert view.at_end
+    
+    view.refresh()
+    assert shown(tree) == ['Date', 'Eggplant', 'Elderberry', 'Fig', 'Grape']
+
+
+def test_rows_that_moved_into_the_previous_page_are_not_inserted_twice():
+    catalog = Catalog([f'Item {i:02}' for i in range(9)])
+    view, tree = make_view(catalog, max_pages=2)
+    view.on_yscroll(0.0, 1.0)
+    view.on_yscroll(0.0, 1.0)
+    assert shown(tree) == ['Item 03', 'Item 04', 'Item 05', 'Item 06', 'Item 07', 'Item 08']
+    
+    catalog.rename('Item 07', 'Item 01a')
+    view.on_yscroll(0.0, 0.5)
+    assert shown(tree) == ['Item 01', 'Item 01a', 'Item 02', 'Item 03', 'Item 04', 'Item 05']
+    
+    view.refresh()
+    assert shown(tree) == ['Item 01', 'Item 01a', 'Item 02', 'Item 03', 'Item 04', 'Item 05']
+
+
+def test_prepend_adds_rows_above_the_first_loaded_row():
+    catalog = Catalog(['Banana', 'Cherry', 'Date', 'Elderberry'])
+    view, tree = make_view(catalog)
+    
+    apricot = catalog.add('Apricot')
+    apple = catalog.add('Apple')
+    view.prepend([apple, apricot])
+    assert shown(tree) == ['Apple', 'Apricot', 'Banana', 'Cherry', 'Date']
+    view.refresh()
+    assert shown(tree) == ['Apple', 'Apricot', 'Banana', 'Cherry', 'Date']
+
+
+def test_prepend_waits_for_the_previous_page_when_the_start_is_not_loaded():
+    catalog = Catalog([f'Item {i:02}' for i in range(12)])
+    view, tree = make_view(catalog, max_pages=2)
+    view.on_yscroll(0.0, 1.0)
+    view.on_yscroll(0.0, 1.0)
+    assert not view.at_start
+    
+    view.prepend([catalog.add('Item 00a')])
+    assert 'Item 00a' not in shown(tree)
+    view.on_yscroll(0.0, 0.5)
+    view.on_yscroll(0.0, 0.5)
+    assert shown(tree)[:4] == ['Item 00', 'Item 00a', 'Item 01', 'Item 02']
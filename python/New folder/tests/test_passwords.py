@@ -0,0 +1,104 @@
+"""
+Salted password hashes, the legacy SHA-256 hashes they replace, and the
+upgrade User.authenticate does on a successful login.
+"""
+
+import hashlib
+
+import pytest
+
+from src.models.user import User
+from src.utils import passwords
+
+
+@pytest.fixture
+def cheap_hashes(monkeypatch):
+    """Configured costs low enough for tests"""
+    monkeypatch.setattr(passwords, 'PASSWORD_SCRYPT_N', 2 ** 10)
+    monkeypatch.setattr(passwords, 'PASSWORD_PBKDF2_ITERATIONS', 1000)
+
+
+def stored_hash(user, username):
+    conn = user.db.get_connection()
+    return conn.execute('SELECT password_hash FROM users WHERE username = ?',
+                        (username,)).fetchone()[0]
+
+
+@pytest.mark.parametrize('algorithm, cost', [('scrypt', 2 ** 10), ('pbkdf2_sha256', 1000)])
+def test_hashes_verify_only_their_password(algorithm, cost):
+    if algorithm == 'scrypt' and not passwords.SCRYPT_AVAILABLE:
+        pytest.skip("hashlib has no scrypt")
+    first = passwords.hash_password('secret', algorithm, cost)
+    second = passwords.hash_password('secret', algorithm, cost)
+    assert first.startswith(f'{algorithm}${cost}$')
+    assert first != second
+    assert passwords.verify_password('secret', first)
+    assert passwords.verify_password('secret', second)
+    assert not passwords.verify_password('Secret', first)
+
+
+@pytest.mark.parametrize('stored', [
+    '', 'scrypt$x$8$1$c2FsdA==$aGFzaA==', 'scrypt$1024$8$1$not base64$aGFzaA==',
+    'pbkdf2_sha256$1000$c2FsdA==', 'pbkdf2_sha256$-1$c2FsdA==$aGFzaA==', 'md5$abc',
+])
+def test_malformed_hashes_do_not_verify(stored):
+    assert not passwords.verify_password('secret', stored)
+
+
+def test_legacy_sha256_hashes_verify():
+    legacy = hashlib.sha256(b'secret').hexdigest()
+    assert passwords.verify_password('secret', legacy)
+    assert not passwords.verify_password('other', legacy)
+    assert passwords.needs_rehash(legacy)
+
+
+def test_scrypt_hashes_without_hashlib_scrypt(monkeypatch):
+    if not passwords.SCRYPT_AVAILABLE:
+        pytest.skip("hashlib has no scrypt")
+    stored = passwords.hash_password('secret', 'scrypt', 2 ** 10)
+    
+    monkeypatch.setattr(passwords, 'SCRYPT_AVAILABLE', False)
+    monkeypatch.delattr(hashlib, 'scrypt')
+    assert not passwords.verify_password('secret', stored)
+    assert passwords.effective_algorithm('scrypt') == 'pbkdf2_sha256'
+    assert passwords.hash_password('secret', 'scrypt', 1000).startswith('pbkdf2_sha256$1000$')
+
+
+def test_login_replaces_the_legacy_admin_hash(workdir, cheap_hashes):
+    user = User()
+    legacy = stored_hash(user, 'admin')
+    assert legacy == hashlib.sha256(b'admin123').hexdigest()
+    
+    assert user.authenticate('admin', 'wrong') is None
+    assert stored_hash(user, 'admin') == legacy
+    
+    assert user.authenticate('admin', 'admin123')['username'] == 'admin'
+    upgraded = stored_hash(user, 'admin')
+    assert upgraded != legacy and not passwords.needs_rehash(upgraded)
+    
+    assert user.authenticate('admin', 'admin123')['role'] == 'admin'
+    assert stored_hash(user, 'admin') == upgraded
+
+
+def test_rehash_keeps_a_password_changed_meanwhile(workdir, cheap_hashes):
+    user = User()
+    legacy = stored_hash(user, 'admin')
+    changed = passwords.hash_password('changed')
+    conn = user.db.get_connection()
+    conn.execute("UPDATE users SET password_hash = ? WHERE username = 'admin'", (changed,))
+    conn.commit()
+    
+    # What authenticate does after checking the password against legacy
+    admin_id = conn.execute("SELECT id FROM users WHERE username = 'admin'").fetchone()[0]
+    user._replace_hash(admin_id, legacy, passwords.hash_password('admin123'))
+    assert stored_hash(user, 'admin') == changed
+    assert user.authenticate('admin', 'changed') is not None
+    assert user.authenticate('admin', 'admin123') is None
+
+
+def test_unknown_users_are_refused(workdir, cheap_hashes):
+    user = User()
+    assert user.create_user('clerk', 'pass')
+    assert not user.create_user('clerk', 'other')
+    assert user.authenticate('clerk', 'pass')['role'] == 'user'
+    assert user.authenticate('nobody', 'pass') is None
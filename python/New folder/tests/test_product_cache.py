@@ -0,0 +1,119 @@
+"""
+ProductCache drops exactly the rows Product writes itself, and everything
+when products change behind its back: on another connection, in another
+thread or process.
+"""
+
+import sqlite3
+import threading
+
+from src.models.product import Product
+
+
+def raw_update(sql, params=()):
+    """A write the cache is not told about, as another process makes it"""
+    conn = sqlite3.connect('data/inventory.db')
+    conn.execute(sql, params)
+    conn.commit()
+    conn.close()
+
+
+def seed(product):
+    ids = [product.add_product(name, '', 'Fruit', 1.0, 50, 10, '')
+           for name in ('Apple', 'Banana', 'Cherry')]
+    for product_id in ids:
+        product.get_product_by_id(product_id)
+    return ids
+
+
+def test_own_writes_drop_only_the_rows_they_changed(workdir):
+    product = Product()
+    apple, banana, cherry = seed(product)
+    assert product.cache.stats()['size'] == 3
+    
+    product.update_product(apple, 'Apple', '', 'Fruit', 2.0, 50, 10, '')
+    product.update_stock(banana, -5, 'sale', 1)
+    stats = product.cache.stats()
+    assert stats['size'] == 1
+    
+    assert product.get_product_by_id(apple)[4] == 2.0
+    assert product.get_product_by_id(banana)[5] == 45
+    assert product.get_product_by_id(cherry)[1] == 'Cherry'
+    assert product.cache.stats()['hits'] == stats['hits'] + 1
+    
+    product.delete_product(cherry)
+    assert product.get_product_by_id(cherry) is None
+
+
+def test_cached_lists_follow_own_writes(workdir):
+    product = Product()
+    apple, banana, cherry = seed(product)
+    assert [row[1] for row in product.get_low_stock_products()] == []
+    
+    product.update_stock(apple, -45, 'sale', 1)
+    assert [row[1] for row in product.get_low_stock_products()] == ['Apple']
+    assert len(product.get_all_products()) == 3
+    product.add_product('Date', '', 'Fruit', 1.0, 50, 10, '')
+    assert len(product.get_all_products()) == 4
+
+
+def test_writes_from_another_connection_clear_the_cache(workdir):
+    product = Product()
+    apple, banana, cherry = seed(product)
+    
+    raw_update('UPDATE products SET price = 9.0 WHERE id = ?', (banana,))
+    assert product.get_product_by_id(banana)[4] == 9.0
+    assert product.get_product_by_id(apple)[4] == 1.0
+    assert product.cache.stats()['size'] == 2
+
+
+def test_writes_to_other_tables_keep_the_cache(workdir):
+    product = Product()
+    apple, banana, cherry = seed(product)
+    hits = product.cache.stats()['hits']
+    
+    raw_update("INSERT INTO transactions (product_id, transaction_type, quantity, price, user_id) "
+               "VALUES (?, 'sale', 1, 1.0, 1)", (apple,))
+    product.get_product_by_id(apple)
+    assert product.cache.stats()['hits'] == hits + 1
+    assert product.cache.stats()['size'] == 3
+
+
+def test_an_interleaved_foreign_write_is_not_mistaken_for_our_own(workdir):
+    product = Product()
+    apple, banana, cherry = seed(product)
+    
+    # Two counter bumps, but record_write was told about one: it cannot tell
+    # which other row changed, so it keeps nothing
+    raw_update('UPDATE products SET name = ? WHERE id = ?', ('Blueberry', banana))
+    product.update_product(apple, 'Apricot', '', 'Fruit', 1.0, 50, 10, '')
+    assert product.cache.stats()['size'] == 0
+    assert product.get_product_by_id(banana)[1] == 'Blueberry'
+
+
+def test_every_thread_checks_its_own_connection(workdir):
+    product = Product()
+    apple, banana, cherry = seed(product)
+    seen = []
+    
+    def read():
+        seen.append(Product().get_product_by_id(apple)[4])
+    
+    raw_update('UPDATE products SET price = 3.0 WHERE id = ?', (apple,))
+    worker = threading.Thread(target=read)
+    worker.start()
+    worker.join()
+    
+    # The worker refreshed the shared cache; this thread still checks its
+    # own data_version and reads the same row
+    assert seen == [3.0]
+    assert product.get_product_by_id(apple)[4] == 3.0
+    
+    # A write by this thread's connection, not reported to the cache, is
+    # noticed by the worker's connection and then by this one's counter check
+    product.db.get_connection().execute('UPDATE products SET price = 4.0 WHERE id = ?', (apple,))
+    product.db.get_connection().commit()
+    worker = threading.Thread(target=read)
+    worker.start()
+    worker.join()
+    assert seen == [3.0, 4.0]
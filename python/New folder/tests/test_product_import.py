@@ -0,0 +1,76 @@
+"""
+ProductImporter: bad rows are reported by line and skipped, and the rest
+of the file is still imported.
+"""
+
+from src.models.product import Product
+from src.models.product_import import ProductImporter
+
+
+def write_csv(path, lines):
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def imported_names():
+    return sorted(row[1] for row in Product().get_all_products())
+
+
+def test_invalid_rows_are_reported_and_skipped(workdir):
+    path = write_csv(workdir / 'products.csv', [
+        'name,price,quantity,min_stock_level',
+        'Apple,1.50,10,2',
+        'Not a number,nan,5,1',
+        'Infinite,inf,5,1',
+        'Negative,-1,5,1',
+        'Huge stock,2.00,99999999999999999999,1',
+        'Banana,0.25,40,5',
+    ])
+    result = ProductImporter(chunk_size=100).import_file(path)
+    
+    assert result['imported'] == 2
+    assert [line for line, message in result['errors']] == [3, 4, 5, 6]
+    assert imported_names() == ['Apple', 'Banana']
+    
+    totals = Product().get_inventory_totals()
+    assert totals['total_value'] == 1.50 * 10 + 0.25 * 40
+
+
+def test_a_row_the_database_rejects_does_not_abort_its_chunk(workdir):
+    importer = ProductImporter(chunk_size=100)
+    # Stand-in for a constraint the parser does not know about
+    Product().db.get_connection().execute('''
+        CREATE TRIGGER reject_forbidden BEFORE INSERT ON products
+        WHEN new.name = 'Forbidden' BEGIN
+            SELECT RAISE(ABORT, 'forbidden product');
+        END
+    ''')
+    path = write_csv(workdir / 'products.csv', [
+        'name,price,quantity',
+        'Apple,1.50,10',
+        'Forbidden,1.00,1',
+        'Banana,0.25,40',
+    ])
+    result = importer.import_file(path)
+    
+    assert result['imported'] == 2
+    assert [line for line, message in result['errors']] == [3]
+    assert 'forbidden product' in result['errors'][0][1]
+    assert imported_names() == ['Apple', 'Banana']
+
+
+def test_ids_must_be_ascii_digits(workdir):
+    path = write_csv(workdir / 'products.csv', [
+        'id,name,price,quantity',
+        '7,Apple,1.50,10',
+        '\u00b2,Squared,1.00,1',
+        '\u0661,Arabic one,1.00,1',
+        '\uff18,Fullwidth eight,1.00,1',
+        ',Banana,0.25,40',
+    ])
+    result = ProductImporter(chunk_size=100).import_file(path)
+    
+    assert result['imported'] == 2
+    assert result['errors'] == [(line, "ID must be a positive integer") for line in (3, 4, 5)]
+    assert imported_names() == ['Apple', 'Banana']
+    assert Product().get_product_by_id(7)[1] == 'Apple'
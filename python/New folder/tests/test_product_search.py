@@ -0,0 +1,77 @@
+"""
+search_products answers from the products_fts index, which triggers keep
+in step with products and bulk imports fill in one pass per chunk.
+"""
+
+from src.models.product import Product
+from src.models.product_import import ProductImporter
+
+
+def names(rows):
+    return [row[1] for row in rows]
+
+
+def assert_index_intact(product):
+    conn = product.db.get_connection()
+    conn.execute("INSERT INTO products_fts (products_fts) VALUES ('integrity-check')")
+    indexed = conn.execute('SELECT COUNT(*) FROM products_fts').fetchone()[0]
+    assert indexed == conn.execute('SELECT COUNT(*) FROM products').fetchone()[0]
+
+
+def test_search_follows_product_changes(workdir):
+    product = Product()
+    hinge = product.add_product('Copper Hinge', 'Door fitting', 'Hardware', 2.5, 10, 2, '')
+    product.add_product('Copper Wire', '2 mm', 'Electrical', 4.0, 10, 2, '')
+    product.add_product('Steel Hinge', 'Copper plated', 'Hardware', 3.0, 10, 2, '')
+    
+    # Every word is a prefix; name matches rank above description matches
+    assert names(product.search_products('copper hin')) == ['Copper Hinge', 'Steel Hinge']
+    assert names(product.search_products('elec')) == ['Copper Wire']
+    assert names(product.search_products('copper', limit=1)) == ['Copper Hinge']
+    
+    product.update_product(hinge, 'Brass Hinge', 'Door fitting', 'Hardware', 2.5, 10, 2, '')
+    assert names(product.search_products('brass')) == ['Brass Hinge']
+    assert names(product.search_products('copper hin')) == ['Steel Hinge']
+    
+    product.delete_product(hinge)
+    assert product.search_products('brass') == []
+    assert_index_intact(product)
+
+
+def test_search_input_is_not_fts_syntax(workdir):
+    product = Product()
+    product.add_product('Wire "AND" Rope', '', 'Hardware', 1.0, 1, 0, '')
+    product.add_product('Rope', '', 'Hardware', 1.0, 1, 0, '')
+    
+    assert names(product.search_products('wire AND')) == ['Wire "AND" Rope']
+    assert product.search_products('rope OR NEAR(*') == []
+    assert sorted(names(product.search_products('R'))) == ['Rope', 'Wire "AND" Rope']
+
+
+def test_imports_index_new_and_updated_rows(workdir):
+    product = Product()
+    existing = product.add_product('Old Name', '', 'Misc', 1.0, 1, 0, '')
+    path = workdir / 'products.csv'
+    path.write_text('\n'.join([
+        'id,name,description,category,price,quantity',
+        f'{existing},Renamed Lamp,,Lighting,1.0,1',
+        ',Desk Lamp,Adjustable arm,Lighting,12.0,5',
+        ',Floor Lamp,,Lighting,30.0,2',
+        ',Lamp Shade,,Lighting,8.0,9',
+    ]) + '\n', encoding='utf-8')
+    
+    importer = ProductImporter(chunk_size=2)
+    assert importer.defer_search_index
+    assert importer.import_file(str(path))['imported'] == 4
+    
+    assert sorted(names(product.search_products('lamp'))) == [
+        'Desk Lamp', 'Floor Lamp', 'Lamp Shade', 'Renamed Lamp']
+    assert names(product.search_products('adjustable')) == ['Desk Lamp']
+    assert product.search_products('old name') == []
+    
+    conn = product.db.get_connection()
+    assert conn.execute('SELECT COUNT(*) FROM products_fts_deferred').fetchone()[0] == 0
+    # Rows added after the import are indexed by the trigger again
+    product.add_product('Lamp Oil', '', 'Lighting', 3.0, 4, 0, '')
+    assert 'Lamp Oil' in names(product.search_products('lamp oil'))
+    assert_index_intact(product)
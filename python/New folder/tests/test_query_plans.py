@@ -0,0 +1,177 @@
+"""
+Every query a model method runs must be answered from an index: no plain
+table SCAN and no temp B-tree sort. The queries are captured with a trace
+callback while calling each public method, then checked with EXPLAIN QUERY
+PLAN, so a query change or a dropped index that brings back a full scan
+fails here.
+"""
+
+import inspect
+import os
+import sqlite3
+
+import pytest
+
+from src.models.database import Database
+from src.models.product import Product
+from src.models.transaction import Transaction
+from src.models.user import User
+
+# Calls for each public method, with the filters the views use
+CALLS = {
+    'Product.add_product': [lambda m: m.product.add_product('Cherry', '', 'Fruit', 1.5, 3, 5, 'Farm')],
+    'Product.update_product': [lambda m: m.product.update_product(m.apple, 'Apple', 'Red', 'Fruit',
+                                                                  1.0, 40, 10, 'Farm')],
+    'Product.delete_product': [lambda m: m.product.delete_product(
+        m.product.add_product('Doomed', '', '', 1.0, 1, 0, ''))],
+    'Product.get_all_products': [lambda m: m.product.get_all_products()],
+    'Product.get_product_by_id': [lambda m: m.product.get_product_by_id(m.apple)],
+    'Product.get_products_page': [
+        lambda m: m.product.get_products_page(limit=10),
+        lambda m: m.product.get_products_page(after=m.apple_key, limit=10),
+        lambda m: m.product.get_products_page(before=m.apple_key, limit=10)],
+    'Product.search_products': [lambda m: m.product.search_products('app', limit=10)],
+    'Product.get_low_stock_products': [lambda m: m.product.get_low_stock_products()],
+    'Product.iter_low_stock_products': [lambda m: list(m.product.iter_low_stock_products())],
+    'Product.count_low_stock_products': [lambda m: m.product.count_low_stock_products()],
+    'Product.iter_products': [lambda m: list(m.product.iter_products())],
+    'Product.get_inventory_totals': [lambda m: m.product.get_inventory_totals()],
+    'Product.get_stock_alerts_since': [lambda m: m.product.get_stock_alerts_since(0, limit=10)],
+    'Product.get_last_stock_alert_id': [lambda m: m.product.get_last_stock_alert_id()],
+    'Product.update_stock': [lambda m: m.product.update_stock(m.apple, -1, 'sale', 1)],
+    'Product.update_stock_many': [lambda m: m.product.update_stock_many(
+        [(m.apple, -1, 'sale', 1, ''), (m.banana, 1, 'restock', 1, '')])],
+    'Product.submit_stock_change': [lambda m: m.product.submit_stock_change(
+        m.apple, 1, 'restock', 1).result()],
+    'Transaction.get_all_transactions': [lambda m: m.transaction.get_all_transactions()],
+    'Transaction.get_last_id': [lambda m: m.transaction.get_last_id()],
+    'Transaction.get_sales_summary': [
+        lambda m: m.transaction.get_sales_summary(),
+        lambda m: m.transaction.get_sales_summary('2020-01-01', '2100-01-01')],
+    'Transaction.iter_sales_summary': [lambda m: list(m.transaction.iter_sales_summary())],
+    'Transaction.get_since': [
+        lambda m: m.transaction.get_since(1),
+        lambda m: m.transaction.get_since(1, product_id=m.apple)],
+    'Transaction.get_transactions_by_product': [
+        lambda m: m.transaction.get_transactions_by_product(m.apple)],
+    'Transaction.get_transactions_page': [
+        lambda m: m.transaction.get_transactions_page(limit=10),
+        lambda m: m.transaction.get_transactions_page(limit=10, product_id=m.apple),
+        lambda m: m.transaction.get_transactions_page(limit=10, user_id=1),
+        lambda m: m.transaction.get_transactions_page(limit=10, transaction_type='sale'),
+        lambda m: m.transaction.get_transactions_page(limit=10, start_date='2020-01-01',
+                                                      end_date='2100-01-01')],
+    'User.authenticate': [lambda m: m.user.authenticate('admin', 'admin123')],
+    'User.create_user': [lambda m: m.user.create_user('clerk', 'secret1', 'user')],
+    'User.get_all_users': [lambda m: m.user.get_all_users()],
+}
+
+# Methods that read every row on purpose, and helpers that run no query
+NOT_CHECKED = {
+    'Product.compute_inventory_totals', 'Product.rebuild_inventory_totals',
+    'Transaction.rebuild_sales_rollup', 'Transaction.check_sales_rollup',
+    'Product.page_key', 'Transaction.page_key',
+}
+
+# Plan steps that are fine for a method, and why
+ALLOWED = {
+    # Totals per product ordered by revenue: the sort is over the rollup
+    # rows aggregated per product and cannot come from an index, and All
+    # Time reads the whole rollup, which holds a row per product and day
+    'Transaction.get_sales_summary': {'SCAN d', 'USE TEMP B-TREE FOR GROUP BY',
+                                      'USE TEMP B-TREE FOR ORDER BY'},
+    'Transaction.iter_sales_summary': {'SCAN d', 'USE TEMP B-TREE FOR GROUP BY',
+                                       'USE TEMP B-TREE FOR ORDER BY'},
+    # The user list is every user, a handful of rows
+    'User.get_all_users': {'SCAN users'},
+}
+
+# Tables with a handful of rows by construction
+SMALL_TABLES = ('sqlite_master', 'transaction_archives')
+
+
+class Models:
+    def __init__(self):
+        self.product = Product()
+        self.transaction = Transaction()
+        self.user = User()
+        
+        self.apple = self.product.add_product('Apple', 'Red', 'Fruit', 1.0, 50, 10, 'Farm')
+        self.banana = self.product.add_product('Banana', '', 'Fruit', 2.0, 5, 10, 'Farm')
+        self.apple_key = Product.page_key(self.product.get_product_by_id(self.apple))
+        for _ in range(5):
+            self.product.update_stock(self.apple, -1, 'sale', 1)
+            self.product.update_stock(self.banana, 2, 'restock', 1)
+
+
+@pytest.fixture(scope='module')
+def models(tmp_path_factory):
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('plans'))
+    try:
+        yield Models()
+    finally:
+        Database.close_all()
+        os.chdir(cwd)
+
+
+def captured_statements(models, call):
+    """SQL statements run by call(models) on this thread's connection"""
+    statements = []
+    conn = models.product.db.get_connection()
+    models.product.cache.clear()
+    conn.set_trace_callback(statements.append)
+    try:
+        call(models)
+    finally:
+        conn.set_trace_callback(None)
+    
+    seen = []
+    for statement in statements:
+        words = statement.split()
+        # Trigger bodies are reported as comments, and have no plan of their own
+        if not words or words[0].startswith('--'):
+            continue
+        if words[0].upper() in ('BEGIN', 'COMMIT', 'ROLLBACK', 'PRAGMA'):
+            continue
+        if statement not in seen:
+            seen.append(statement)
+    return seen
+
+
+def bad_steps(conn, statement, allowed):
+    steps = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + statement)]
+    bad = []
+    for step in steps:
+        if step in allowed:
+            continue
+        if step.startswith('SCAN') and not any(word in step for word in
+                                               ('USING', 'VIRTUAL TABLE', 'CONSTANT ROW')):
+            if step.split()[1] not in SMALL_TABLES:
+                bad.append(step)
+        elif 'TEMP B-TREE' in step and 'RIGHT PART OF ORDER BY' not in step:
+            # A sort of just the ties left by an ordered index is incremental
+            bad.append(step)
+    return bad
+
+
+def test_every_public_method_is_checked():
+    public = {f'{cls.__name__}.{name}'
+              for cls in (Product, Transaction, User)
+              for name, member in inspect.getmembers(cls, inspect.isfunction)
+              if not name.startswith('_')}
+    assert sorted(public - set(CALLS) - NOT_CHECKED) == []
+
+
+@pytest.mark.parametrize('method', sorted(CALLS))
+def test_queries_use_indexes(models, method):
+    conn = models.product.db.get_connection()
+    problems = {}
+    for call in CALLS[method]:
+        statements = captured_statements(models, call)
+        assert statements, f"{method} ran no query"
+        for statement in statements:
+            bad = bad_steps(conn, statement, ALLOWED.get(method, ()))
+            if bad:
+                problems[' '.join(statement.split())] = bad
+    assert problems == {}
@@ -0,0 +1,113 @@
+"""
+QueryTracer on a traced connection: statements are attributed to the
+method that ran them, never logged with their values, and slow ones are
+logged with their plan.
+"""
+
+import importlib
+import logging
+import sqlite3
+
+import pytest
+
+from src import config
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+    
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def trace(workdir, monkeypatch):
+    """(query_trace module, fresh tracer, traced connection, slow log messages)"""
+    # No log files: importing query_trace would otherwise open them
+    monkeypatch.setattr(config, 'QUERY_TRACE_LOG', None)
+    monkeypatch.setattr(config, 'SLOW_QUERY_LOG', None)
+    query_trace = importlib.import_module('src.models.query_trace')
+    monkeypatch.setattr(query_trace, 'QUERY_TRACE_LOG', None)
+    monkeypatch.setattr(query_trace, 'SLOW_QUERY_LOG', None)
+    
+    tracer = query_trace.QueryTracer(slow_ms=float('inf'))
+    monkeypatch.setattr(query_trace, 'tracer', tracer)
+    slow = ListHandler()
+    tracer.slow_log.addHandler(slow)
+    
+    conn = sqlite3.connect('trace.db', factory=query_trace.TracedConnection)
+    conn.set_trace_callback(tracer.on_trace)
+    conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, secret TEXT)')
+    conn.execute('CREATE INDEX idx_items_name ON items (name)')
+    conn.execute('CREATE TABLE item_log (item_id INTEGER)')
+    conn.execute('''
+        CREATE TRIGGER items_logged AFTER INSERT ON items BEGIN
+            INSERT INTO item_log VALUES (new.id);
+        END
+    ''')
+    tracer.reset()
+    yield query_trace, tracer, conn, slow.messages
+    tracer.slow_log.removeHandler(slow)
+    conn.close()
+
+
+class Catalog:
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def add(self, name, secret):
+        self.conn.execute('INSERT INTO items (name, secret) VALUES (?, ?)', (name, secret))
+        self.conn.commit()
+    
+    def find(self, name):
+        return self.conn.execute('SELECT id FROM items WHERE name = ?', (name,)).fetchall()
+
+
+def test_statements_are_attributed_without_their_values(trace):
+    query_trace, tracer, conn, slow = trace
+    catalog = Catalog(conn)
+    catalog.add('Apple', 'hunter2')
+    assert catalog.find('Apple') == [(1,)]
+    
+    entries = [(method, sql, shape) for _, method, _, sql, shape in tracer.recent]
+    assert entries == [
+        ('Catalog.add', 'INSERT INTO items (name, secret) VALUES (?, ?)', '(str, str)'),
+        ('Catalog.add', 'COMMIT', '-'),
+        ('Catalog.find', 'SELECT id FROM items WHERE name = ?', '(str)'),
+    ]
+    assert 'hunter2' not in repr(list(tracer.recent))
+    
+    stats = tracer.stats()
+    assert stats['Catalog.add']['count'] == 2
+    assert stats['Catalog.find']['count'] == 1
+    assert sum(stats['Catalog.find']['buckets'].values()) == 1
+    assert slow == []
+
+
+def test_slow_statements_are_logged_with_their_plan(trace):
+    query_trace, tracer, conn, slow = trace
+    tracer.slow_ms = 0
+    catalog = Catalog(conn)
+    catalog.add('Apple', 'hunter2')
+    catalog.find('Apple')
+    
+    insert, commit, select = slow
+    assert 'in Catalog.add' in insert and 'trigger programs:' in insert
+    assert 'began a transaction' in insert
+    assert 'COMMIT' in commit and '(none)' in commit
+    assert 'SEARCH items USING COVERING INDEX idx_items_name (name=?)' in select
+    assert 'trigger programs' not in select
+    assert not any('hunter2' in message for message in slow)
+
+
+def test_dump_writes_the_histograms(trace, workdir):
+    query_trace, tracer, conn, slow = trace
+    catalog = Catalog(conn)
+    for name in ('Apple', 'Pear', 'Plum'):
+        catalog.find(name)
+    
+    path = tracer.dump(str(workdir / 'logs' / 'query_stats.txt'))
+    text = open(path).read()
+    assert 'Catalog.find: 3 statements' in text
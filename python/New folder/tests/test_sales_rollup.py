@@ -0,0 +1,86 @@
+"""
+The daily_sales rollup kept by triggers on transactions must always agree
+with the raw sales: after sales, edits and deletes, and after a rebuild.
+"""
+
+import sqlite3
+
+from src.models import migrations
+from src.models.product import Product
+from src.models.transaction import Transaction
+
+
+def insert_sale(conn, product_id, quantity, price, created_at):
+    conn.execute('''
+        INSERT INTO transactions (product_id, transaction_type, quantity, price, user_id, created_at)
+        VALUES (?, 'sale', ?, ?, 1, ?)
+    ''', (product_id, quantity, price, created_at))
+    conn.commit()
+
+
+def test_rollup_follows_sales_edits_and_deletes(workdir):
+    product = Product()
+    transaction = Transaction()
+    apple = product.add_product('Apple', '', 'Fruit', 1.0, 100, 5, '')
+    pear = product.add_product('Pear', '', 'Fruit', 2.0, 100, 5, '')
+    conn = product.db.get_connection()
+    
+    product.update_stock(apple, -3, 'sale', 1)
+    product.update_stock(pear, -2, 'sale', 1)
+    product.update_stock(apple, 10, 'restock', 1)
+    insert_sale(conn, apple, 4, None, '2024-03-01 10:00:00')
+    insert_sale(conn, pear, 1, 2.0, '2024-03-02 10:00:00')
+    assert transaction.check_sales_rollup() == []
+    
+    conn.execute("UPDATE transactions SET quantity = 6 WHERE created_at = '2024-03-01 10:00:00'")
+    conn.execute("UPDATE transactions SET product_id = ? WHERE created_at = '2024-03-02 10:00:00'",
+                 (apple,))
+    conn.execute("UPDATE transactions SET transaction_type = 'return' WHERE quantity = 2")
+    conn.commit()
+    assert transaction.check_sales_rollup() == []
+    
+    conn.execute("DELETE FROM transactions WHERE created_at = '2024-03-01 10:00:00'")
+    conn.commit()
+    assert transaction.check_sales_rollup() == []
+    
+    summary = transaction.get_sales_summary()
+    assert [(name, sold) for name, sold, revenue in summary] == [('Apple', 4)]
+    assert summary[0][2] == 3 * 1.0 + 1 * 2.0
+    
+    # Triggers leave emptied days at zero; a rebuild drops them
+    rollup = '''
+        SELECT * FROM daily_sales WHERE quantity != 0 OR revenue != 0 ORDER BY day, product_id
+    '''
+    before = conn.execute(rollup).fetchall()
+    transaction.rebuild_sales_rollup()
+    assert conn.execute(rollup).fetchall() == before
+
+
+def test_sales_without_a_product_are_left_out(workdir):
+    product = Product()
+    transaction = Transaction()
+    apple = product.add_product('Apple', '', 'Fruit', 1.0, 100, 5, '')
+    conn = product.db.get_connection()
+    
+    insert_sale(conn, None, 2, 5.0, '2024-03-01 10:00:00')
+    insert_sale(conn, apple, 1, 1.0, '2024-03-01 11:00:00')
+    conn.execute('UPDATE transactions SET product_id = NULL WHERE product_id = ?', (apple,))
+    conn.commit()
+    
+    assert conn.execute('SELECT SUM(quantity) FROM daily_sales').fetchone()[0] == 0
+    assert transaction.check_sales_rollup() == []
+
+
+def test_upgraded_database_accepts_sales_without_a_product(workdir):
+    conn = sqlite3.connect('upgrade.db')
+    cursor = conn.cursor()
+    version = migrations.MIGRATIONS.index(migrations.skip_unlinked_sales_in_rollup)
+    for number, migration in enumerate(migrations.MIGRATIONS[:version], 1):
+        migration(cursor)
+        cursor.execute(f'PRAGMA user_version = {number}')
+    conn.commit()
+    
+    migrations.migrate(conn)
+    insert_sale(conn, None, 2, 5.0, '2024-03-01 10:00:00')
+    assert conn.execute('SELECT COUNT(*) FROM daily_sales').fetchone()[0] == 0
+    conn.close()
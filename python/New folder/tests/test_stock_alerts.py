@@ -0,0 +1,69 @@
+"""
+Stock alerts are recorded by triggers on products when a product crosses
+its low stock threshold, in either direction, and only then.
+"""
+
+import sqlite3
+
+from src.models import migrations
+from src.models.product import Product
+
+
+def states(product, since=0):
+    return [(alert[2], alert[3], alert[4]) for alert in product.get_stock_alerts_since(since)]
+
+
+def test_crossings_are_recorded_once(workdir):
+    product = Product()
+    apple = product.add_product('Apple', '', 'Fruit', 1.0, 20, 10, '')
+    pear = product.add_product('Pear', '', 'Fruit', 1.0, 5, 10, '')
+    assert states(product) == [('Pear', 'low', 5)]
+    
+    last = product.get_last_stock_alert_id()
+    product.update_stock(apple, -10, 'sale', 1)
+    product.update_stock(apple, -2, 'sale', 1)
+    product.update_stock(apple, -8, 'sale', 1)
+    product.update_stock(pear, 10, 'restock', 1)
+    product.update_stock(pear, 1, 'restock', 1)
+    product.update_product(apple, 'Apple', '', 'Fruit', 1.0, 0, 0, '')
+    product.update_product(apple, 'Apple', '', 'Fruit', 2.0, 3, 2, '')
+    assert states(product, last) == [('Apple', 'low', 10), ('Apple', 'out', 0),
+                                     ('Pear', 'ok', 15), ('Apple', 'ok', 3)]
+    assert product.get_last_stock_alert_id() > last
+
+
+def test_alerts_bump_the_change_counter(workdir):
+    product = Product()
+    apple = product.add_product('Apple', '', 'Fruit', 1.0, 20, 10, '')
+    before = product.db.table_versions()['stock_alerts']
+    
+    product.update_stock(apple, -1, 'sale', 1)
+    assert product.db.table_versions()['stock_alerts'] == before
+    product.update_stock(apple, -15, 'sale', 1)
+    assert product.db.table_versions()['stock_alerts'] == before + 1
+
+
+def test_limit_and_deleted_products(workdir):
+    product = Product()
+    ids = [product.add_product(f'Item {i}', '', '', 1.0, 0, 5, '') for i in range(4)]
+    assert [alert[2] for alert in product.get_stock_alerts_since(0, limit=2)] == ['Item 0', 'Item 1']
+    
+    product.delete_product(ids[0])
+    assert [alert[2] for alert in product.get_stock_alerts_since(0)] == ['Item 1', 'Item 2', 'Item 3']
+
+
+def test_low_products_are_backfilled_on_upgrade(workdir):
+    conn = sqlite3.connect('upgrade.db')
+    cursor = conn.cursor()
+    version = migrations.MIGRATIONS.index(migrations.create_stock_alerts)
+    for number, migration in enumerate(migrations.MIGRATIONS[:version], 1):
+        migration(cursor)
+        cursor.execute(f'PRAGMA user_version = {number}')
+    cursor.executemany('INSERT INTO products (name, price, quantity, min_stock_level) VALUES (?, 1, ?, 10)',
+                       [('Low', 3), ('Out', 0), ('Fine', 50)])
+    conn.commit()
+    
+    migrations.migrate(conn)
+    rows = conn.execute('SELECT product_id, state, quantity FROM stock_alerts ORDER BY id').fetchall()
+    assert rows == [(1, 'low', 3), (2, 'out', 0)]
+    conn.close()
@@ -0,0 +1,85 @@
+"""
+Several processes sell the same products through update_stock and
+update_stock_many until they run out. Every unit must be sold exactly
+once: the units the workers report, the recorded sale quantities and the
+starting stock all agree, and no product goes below zero.
+"""
+
+import multiprocessing
+import os
+import random
+
+from src.models.product import Product
+
+PROCESSES = 4
+PRODUCTS = 3
+STOCK = 300
+
+
+def sell_until_empty(directory, product_ids, seed, start, results):
+    """Worker process: sell single units and two-line baskets until every
+    product is out of stock; put the number of units sold on results"""
+    os.chdir(directory)
+    product = Product()
+    rng = random.Random(seed)
+    # Start selling together, once every worker has its connection, and
+    # make one sale each before going on: on a busy machine one worker
+    # could otherwise sell everything before the others are scheduled
+    start.wait(60)
+    sold = 1 if product.update_stock(rng.choice(product_ids), -1, 'sale', 1, 'single') else 0
+    start.wait(60)
+    remaining = list(product_ids)
+    
+    while remaining:
+        if rng.random() < 0.5:
+            product_id = rng.choice(remaining)
+            if product.update_stock(product_id, -1, 'sale', 1, 'single'):
+                sold += 1
+            else:
+                remaining.remove(product_id)
+            continue
+        
+        basket = rng.sample(remaining, min(2, len(remaining)))
+        lines = product.update_stock_many([(product_id, -1, 'sale', 1, 'basket')
+                                           for product_id in basket])
+        if all(lines):
+            sold += len(basket)
+        else:
+            # Nothing was written; drop the lines that could not be filled
+            for product_id, ok in zip(basket, lines):
+                if not ok:
+                    remaining.remove(product_id)
+    results.put(sold)
+
+
+def test_no_stock_is_lost_or_oversold(workdir):
+    product = Product()
+    product_ids = [product.add_product(f'Contended {i}', '', 'Test', 2.5, STOCK, 0, '')
+                   for i in range(PRODUCTS)]
+    
+    # spawn: the children open their own connections instead of sharing ours
+    context = multiprocessing.get_context('spawn')
+    start = context.Barrier(PROCESSES)
+    results = context.Queue()
+    workers = [context.Process(target=sell_until_empty,
+                               args=(str(workdir), product_ids, seed, start, results))
+               for seed in range(PROCESSES)]
+    for worker in workers:
+        worker.start()
+    sold = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join()
+    
+    assert sum(sold) == PRODUCTS * STOCK
+    assert all(count > 0 for count in sold)
+    
+    conn = product.db.get_connection()
+    quantities = [row[0] for row in conn.execute('SELECT quantity FROM products WHERE id IN (?, ?, ?)',
+                                                 product_ids)]
+    assert quantities == [0] * PRODUCTS
+    
+    recorded = conn.execute('''
+        SELECT product_id, SUM(quantity), COUNT(*) FROM transactions
+        WHERE transaction_type = 'sale' GROUP BY product_id ORDER BY product_id
+    ''').fetchall()
+    assert recorded == [(product_id, STOCK, STOCK) for product_id in product_ids]
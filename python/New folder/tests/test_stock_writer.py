@@ -0,0 +1,111 @@
+"""
+StockWriter commits queued stock changes in groups; a change that fails
+its group is retried alone so the others still go through.
+"""
+
+import threading
+
+import pytest
+
+from src.models import product as product_module
+from src.models.database import Database
+from src.models.product import Product
+from src.models.stock_writer import StockWriter
+
+
+@pytest.fixture
+def catalog(workdir):
+    product = Product()
+    ids = [product.add_product(name, '', 'Fruit', 1.0, 10, 2, '') for name in ('Apple', 'Pear')]
+    yield product, ids
+    StockWriter.close_all()
+
+
+def quantities(product, ids):
+    conn = product.db.get_connection()
+    return [conn.execute('SELECT quantity FROM products WHERE id = ?', (product_id,)).fetchone()[0]
+            for product_id in ids]
+
+
+def sale_count(product):
+    conn = product.db.get_connection()
+    return conn.execute("SELECT COUNT(*) FROM transactions WHERE transaction_type = 'sale'").fetchone()[0]
+
+
+def test_queued_changes_commit_together(catalog):
+    product, (apple, pear) = catalog
+    writer = StockWriter(Database(), product._apply_stock_change, max_batch=100,
+                         max_latency_ms=200)
+    
+    futures = [writer.submit(apple if n % 2 else pear, -1, 'sale', 1) for n in range(8)]
+    assert [future.result(timeout=5) for future in futures] == [True] * 8
+    assert writer.stats()['batches'] < 8
+    writer.close()
+    
+    assert quantities(product, [apple, pear]) == [6, 6]
+    assert sale_count(product) == 8
+    # The writer reported the rows it changed to the shared cache
+    assert product.get_product_by_id(apple)[5] == 6
+
+
+def test_a_failing_change_does_not_fail_its_group(catalog):
+    product, (apple, pear) = catalog
+    
+    def apply_change(cursor, product_id, *change):
+        applied = product._apply_stock_change(cursor, product_id, *change)
+        if change[3] == 'bad':
+            raise ValueError("bad change")
+        return applied
+    
+    writer = StockWriter(Database(), apply_change, max_batch=100, max_latency_ms=200)
+    futures = [writer.submit(apple, -1, 'sale', 1),
+               writer.submit(pear, -1, 'sale', 1, 'bad'),
+               writer.submit(pear, -20, 'sale', 1),
+               writer.submit(pear, -2, 'sale', 1)]
+    
+    assert futures[0].result(timeout=5) is True
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=5)
+    assert futures[2].result(timeout=5) is False
+    assert futures[3].result(timeout=5) is True
+    writer.close()
+    
+    # The failed group was rolled back before the changes were retried alone
+    assert quantities(product, [apple, pear]) == [9, 8]
+    assert sale_count(product) == 2
+
+
+def test_close_commits_what_is_queued(catalog):
+    product, (apple, pear) = catalog
+    started = threading.Event()
+    release = threading.Event()
+    
+    def apply_change(cursor, *change):
+        started.set()
+        release.wait(5)
+        return product._apply_stock_change(cursor, *change)
+    
+    writer = StockWriter(Database(), apply_change, max_batch=1)
+    first = writer.submit(apple, -1, 'sale', 1)
+    started.wait(5)
+    queued = [writer.submit(pear, -1, 'sale', 1) for _ in range(3)]
+    release.set()
+    writer.close(timeout=5)
+    
+    assert first.result(timeout=0) and all(future.result(timeout=0) for future in queued)
+    assert quantities(product, [apple, pear]) == [9, 7]
+    with pytest.raises(RuntimeError):
+        writer.submit(apple, -1, 'sale', 1)
+
+
+def test_submit_stock_change_with_and_without_write_behind(catalog, monkeypatch):
+    product, (apple, pear) = catalog
+    
+    direct = product.submit_stock_change(apple, -3, 'sale', 1)
+    assert direct.done() and direct.result() is True
+    
+    monkeypatch.setattr(product_module, 'STOCK_WRITE_BEHIND', True)
+    queued = product.submit_stock_change(pear, -4, 'sale', 1)
+    refused = product.submit_stock_change(pear, -40, 'sale', 1)
+    assert queued.result(timeout=5) is True and refused.result(timeout=5) is False
+    assert quantities(product, [apple, pear]) == [7, 6]
@@ -0,0 +1,120 @@
+"""
+Keyset-paged transaction history: walking the pages with any filter gives
+the same rows, in the same order, as one ORDER BY over the whole table.
+"""
+
+import random
+
+import pytest
+
+from src.models.product import Product
+from src.models.transaction import Transaction
+from src.models.user import User
+
+TYPES = ('sale', 'restock', 'return', 'adjustment')
+
+FILTERS = [
+    {},
+    {'product_id': 2},
+    {'user_id': 2},
+    {'user_id': 1, 'transaction_type': 'sale'},
+    {'transaction_type': 'restock'},
+    {'start_date': '2024-01-10', 'end_date': '2024-01-20'},
+    {'user_id': 2, 'product_id': 1, 'start_date': '2024-01-05'},
+]
+
+
+@pytest.fixture
+def history(workdir):
+    product = Product()
+    User().create_user('clerk', 'pass')
+    for name in ('Apple', 'Pear', 'Plum'):
+        product.add_product(name, '', 'Fruit', 1.0, 100, 5, '')
+    
+    rng = random.Random(7)
+    conn = product.db.get_connection()
+    for _ in range(150):
+        # Few distinct timestamps, so many rows tie on created_at
+        day = rng.randint(1, 28)
+        conn.execute('''
+            INSERT INTO transactions (product_id, transaction_type, quantity, price, user_id,
+                                      created_at)
+            VALUES (?, ?, 1, 1.0, ?, ?)
+        ''', (rng.randint(1, 3), rng.choice(TYPES), rng.randint(1, 2),
+              f'2024-01-{day:02} {rng.choice(("09", "17"))}:00:00'))
+    conn.commit()
+    return Transaction()
+
+
+def expected(transaction, product_id=None, user_id=None, transaction_type=None,
+             start_date=None, end_date=None):
+    query, params = transaction._history_query(product_id, user_id, transaction_type,
+                                               start_date, end_date)
+    conn = transaction.db.get_connection()
+    rows = conn.execute(query + ' ORDER BY t.created_at DESC, t.id DESC', params).fetchall()
+    return [row[0] for row in rows]
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_pages_walk_the_filtered_history(history, filters):
+    ids = []
+    pages = []
+    after = None
+    while True:
+        rows = history.get_transactions_page(after=after, limit=7, **filters)
+        ids += [row[0] for row in rows]
+        pages.append(rows)
+        if len(rows) < 7:
+            break
+        after = Transaction.page_key(rows[-1])
+    assert ids == expected(history, **filters)
+    
+    # Walking back up from the last page gives the same pages
+    pages = [page for page in pages if page]
+    before = Transaction.page_key(pages[-1][0])
+    for page in reversed(pages[:-1]):
+        rows = history.get_transactions_page(before=before, limit=7, **filters)
+        assert rows == page
+        before = Transaction.page_key(rows[0])
+
+
+def test_user_filter_reads_the_user_index(history):
+    query, params = history._history_query(None, 2, None, None, None)
+    conn = history.db.get_connection()
+    plan = conn.execute('EXPLAIN QUERY PLAN ' + query + ' ORDER BY t.created_at DESC, t.id DESC '
+                        'LIMIT 7', params).fetchall()
+    details = ' '.join(row[3] for row in plan)
+    assert 'idx_transactions_user_created' in details
+    assert 'TEMP B-TREE' not in details
+
+
+def test_get_since_tails_new_rows(history):
+    product = Product()
+    last = history.get_last_id()
+    assert history.get_since(last) == []
+    
+    product.update_stock(1, -1, 'sale', 2)
+    product.update_stock(2, 5, 'restock', 1)
+    product.update_stock(1, -2, 'sale', 1)
+    newest = history.get_last_id()
+    assert newest == last + 3
+    
+    rows = history.get_since(last)
+    assert [row[0] for row in rows] == [last + 1, last + 2, last + 3]
+    # Same row shape as the pages, so the view can show them as they are
+    assert rows[::-1] == history.get_transactions_page(limit=200)[:3]
+    
+    assert [row[0] for row in history.get_since(last, transaction_type='sale')] == [last + 1, last + 3]
+    assert [row[0] for row in history.get_since(last, user_id=2)] == [last + 1]
+    assert [row[0] for row in history.get_since(last, until_id=last + 2)] == [last + 1, last + 2]
+    assert history.get_since(newest) == []
+
+
+def test_get_since_reads_a_rowid_range(history):
+    query, params = history._history_query(1, None, None, None, None,
+                                           'transactions t NOT INDEXED')
+    conn = history.db.get_connection()
+    plan = conn.execute('EXPLAIN QUERY PLAN ' + query + ' AND t.id > ? ORDER BY t.id',
+                        params + [100]).fetchall()
+    details = ' '.join(row[3] for row in plan)
+    assert 'SEARCH t USING INTEGER PRIMARY KEY (rowid>?)' in details